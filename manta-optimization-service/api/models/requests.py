@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 
 class ToolData(BaseModel):
     id: str
@@ -27,6 +27,33 @@ class OptimizationConstraints(BaseModel):
     min_border_distance: float = Field(50.0, ge=0, description="Distanza minima dal bordo in mm")
     min_tool_distance: float = Field(30.0, ge=0, description="Distanza minima tra tool in mm")
     allow_rotation: bool = Field(True, description="Permetti rotazione tool")
+    engine: Literal["cpsat", "skyline", "greedy", "guillotine", "shelf", "genetic", "lns", "auto"] = Field(
+        "cpsat",
+        description=(
+            "Motore di nesting: cpsat, skyline (interattivo), greedy (MaxRects), guillotine, "
+            "shelf (anteprima in millisecondi), genetic (GA su ordine e rotazioni), "
+            "lns (intorni riottimizzati con CP-SAT) o auto (portfolio). Con cpsat i batch "
+            "da lns_min_items tool in su passano a lns (riportato in engines_used)"
+        )
+    )
+    lns_min_items: int = Field(
+        80, ge=0,
+        description="Tool per batch oltre cui cpsat passa automaticamente a lns (0 = mai)"
+    )
+    cpsat_model: Literal["pairwise", "no_overlap_2d"] = Field(
+        "pairwise",
+        description="Formulazione CP-SAT: disgiunzioni a coppie o intervalli NoOverlap2D"
+    )
+    grid_resolution: int = Field(1, ge=1, le=100, description="Passo griglia CP-SAT in mm")
+    assignment_mode: Literal["cpsat", "rank"] = Field(
+        "cpsat",
+        description=(
+            "Assegnazione automatica cicli -> autoclavi: cpsat (makespan e cure totali, "
+            "cicli divisibili su due autoclavi, mai peggio di rank) o rank (abbinamento per dimensione)"
+        )
+    )
+    polish: bool = Field(False, description="Rifinitura dei batch con local search move/swap tra batch dello stesso ciclo")
+    right_size: bool = Field(False, description="Sposta i batch sull'autoclave più piccola in cui entrano")
 
 class AnalysisRequest(BaseModel):
     odls: List[ODLData]
@@ -16,6 +16,7 @@ class AutoclaveSuggestion(BaseModel):
     reason: str
     odl_count: int
     total_area: float
+    estimated_batches: Optional[int] = Field(None, description="Cure stimate sull'autoclave")
 
 class CycleAnalysisResponse(BaseModel):
     cycle_groups: List[CycleGroupResponse]
@@ -83,6 +84,10 @@ class BatchEfficiencyInfo(BaseModel):
     efficiency: float
     odl_count: int
     is_recommended: bool
+    optimality_gap: Optional[float] = Field(
+        None,
+        description="Distanza relativa dall'area massima ottenibile (0 = ottimo dimostrato)"
+    )
 
 class OptimizationResultResponse(BaseModel):
     optimization_id: str
@@ -95,6 +100,34 @@ class OptimizationResultResponse(BaseModel):
         None,
         description="Batch ordinati per efficienza con flag raccomandazione"
     )
+    engine: Optional[str] = Field(None, description="Motore di nesting richiesto")
+    engines_used: Optional[Dict[str, int]] = Field(
+        None,
+        description="Batch prodotti da ciascun motore (con auto: vincitori del portfolio)"
+    )
+    solver_metrics: Optional[Dict] = Field(
+        None,
+        description=(
+            "Metriche solver: chiamate, tempo speso, motivi di stop, motori andati in errore, "
+            "warm_start_wins (CP-SAT non ha migliorato il layout di partenza, motore riportato: cpsat)"
+        )
+    )
+    bounds: Optional[Dict] = Field(
+        None,
+        description="Bound: batch minimi necessari, area massima ottenibile e gap di ottimalità"
+    )
+    assignment: Optional[Dict] = Field(
+        None,
+        description="Piano di assegnazione cpsat: cure per autoclave, makespan, cicli divisi e metriche di rank"
+    )
+    polish: Optional[Dict] = Field(
+        None,
+        description="Rifinitura: metriche prima/dopo, mosse provate e accettate, motivo di stop"
+    )
+    right_sizing: Optional[Dict] = Field(
+        None,
+        description="Right-sizing: batch spostati su autoclavi più piccole e capacità liberata"
+    )
 
 class ErrorResponse(BaseModel):
     error: str
@@ -26,6 +26,7 @@ from core.pre_filters.curing_cycle_filter import CuringCycleFilter
 from core.pre_filters.elevated_support_filter import ElevatedSupportFilter
 from core.optimization.multi_autoclave_optimizer import MultiAutoclaveOptimizer
 from core.optimization.constraints import NestingConstraints
+from core.config import settings
 from core.visualization.layout_generator import LayoutGenerator
 from core.visualization.export_service import ExportService
 
@@ -81,15 +82,15 @@ async def analyze_odls(request: AnalysisRequest):
         autoclave_suggestions = None
         if autoclaves:
             from core.optimization.multi_autoclave_optimizer import MultiAutoclaveOptimizer
-            optimizer = MultiAutoclaveOptimizer(NestingConstraints())
+            optimizer = MultiAutoclaveOptimizer(
+                NestingConstraints(assignment_mode=request.constraints.assignment_mode)
+            )
             
             # Analizza aree cicli
             cycle_stats = optimizer._analyze_cycle_areas(odls)
             
             # Genera suggerimenti
-            assignments, suggestions = optimizer._assign_autoclaves_by_area_and_count(
-                cycle_stats, autoclaves
-            )
+            _, suggestions = optimizer._assign_autoclaves(cycle_stats, autoclaves)
             
             # Mappa autoclavi per ID
             autoclave_map = {a.id: a for a in autoclaves}
@@ -98,14 +99,16 @@ async def analyze_odls(request: AnalysisRequest):
             autoclave_suggestions = {}
             for suggestion in suggestions:
                 autoclave = autoclave_map.get(suggestion.autoclave_id)
-                if autoclave:
+                # Ciclo ripartito: si suggerisce l'autoclave principale (prima quota)
+                if autoclave and suggestion.cycle_code not in autoclave_suggestions:
                     autoclave_suggestions[suggestion.cycle_code] = AutoclaveSuggestion(
                         cycle_code=suggestion.cycle_code,
                         suggested_autoclave_id=suggestion.autoclave_id,
                         suggested_autoclave_code=autoclave.code,
                         reason=suggestion.reason,
                         odl_count=suggestion.odl_count,
-                        total_area=suggestion.total_area
+                        total_area=suggestion.total_area,
+                        estimated_batches=suggestion.estimated_batches
                     )
         
         # Prepara response
@@ -247,7 +250,17 @@ async def execute_optimization(request: ExecuteOptimizationRequest):
         constraints = NestingConstraints(
             min_border_distance=request.constraints.min_border_distance,
             min_tool_distance=request.constraints.min_tool_distance,
-            allow_rotation=request.constraints.allow_rotation
+            allow_rotation=request.constraints.allow_rotation,
+            engine=request.constraints.engine,
+            lns_min_items=request.constraints.lns_min_items,
+            cpsat_model=request.constraints.cpsat_model,
+            grid_resolution=request.constraints.grid_resolution,
+            assignment_mode=request.constraints.assignment_mode,
+            polish=request.constraints.polish,
+            right_size=request.constraints.right_size,
+            layout_cache=settings.layout_cache_enabled,
+            layout_cache_size=settings.layout_cache_size,
+            layout_cache_path=settings.layout_cache_path
         )
         
         # Ottimizza con eventuali assegnazioni manuali
@@ -369,7 +382,8 @@ async def execute_optimization(request: ExecuteOptimizationRequest):
                     batch_id=batch_responses[i].batch_id,
                     efficiency=info['efficiency'],
                     odl_count=info['odl_count'],
-                    is_recommended=info['is_recommended']
+                    is_recommended=info['is_recommended'],
+                    optimality_gap=info.get('optimality_gap')
                 )
                 for i, info in enumerate(metrics['batches_by_efficiency'])
             ]
@@ -381,7 +395,14 @@ async def execute_optimization(request: ExecuteOptimizationRequest):
             total_odls_input=metrics['total_odls_input'],
             success_rate=metrics['success_rate'],
             execution_time_seconds=time.time() - start_time,
-            batches_by_efficiency=batches_by_efficiency
+            batches_by_efficiency=batches_by_efficiency,
+            engine=metrics.get('engine'),
+            engines_used=metrics.get('solver', {}).get('engines_used'),
+            solver_metrics=metrics.get('solver'),
+            bounds=metrics.get('bounds'),
+            assignment=metrics.get('assignment'),
+            polish=metrics.get('polish'),
+            right_sizing=metrics.get('right_sizing')
         )
         
     except Exception as e:
@@ -0,0 +1,993 @@
+#!/usr/bin/env python3
+"""
+Benchmark Motori di Nesting
+===========================
+
+Confronta formulazioni e motori di nesting sugli scenari di test_realistic_dataset.py
+(carico 50% / 70% / 85%) chiamando direttamente il NestingEngine, senza passare dall'API.
+
+Uso:
+    python benchmark_nesting.py --suite cpsat-models --timeout 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from domain.entities import Tool, ODL, Autoclave
+from core.optimization.constraints import (
+    NestingConstraints, CPSAT_MODELS, MAXRECTS_RULES, GUILLOTINE_CHOICES, GUILLOTINE_SPLITS, SHELF_RULES
+)
+from core.optimization.nesting_engine import NestingEngine
+from core.optimization.multi_autoclave_optimizer import MultiAutoclaveOptimizer
+from core.optimization.rectangle_packer import RectanglePacker
+from core.optimization.portfolio import PortfolioSolver
+from core.optimization.genetic import GeneticSolver
+from core.optimization.bounds import max_batch_area, batch_count_lower_bound
+from core.optimization.item_types import aggregate_items
+from core.optimization.spatial_index import SpatialIndex
+
+# Stessi scenari di test_realistic_dataset.py
+UTILIZATION_SCENARIOS = [
+    (0.5, "Basso Carico (50% utilizzo)"),
+    (0.7, "Carico Normale (70% utilizzo)"),
+    (0.85, "Alto Carico (85% utilizzo)")
+]
+
+TYPICAL_PARTS = [
+    {"width": 1200, "height": 800},
+    {"width": 800, "height": 600},
+    {"width": 1500, "height": 1000},
+    {"width": 600, "height": 400},
+    {"width": 1000, "height": 700},
+    {"width": 400, "height": 300},
+]
+
+CYCLES = ["CICLO_STANDARD_180C", "CICLO_PESANTE_200C", "CICLO_RAPIDO_160C"]
+
+
+def print_header(title: str):
+    print(f"\n{'='*60}")
+    print(f"🎯 {title}")
+    print(f"{'='*60}")
+
+
+def print_section(title: str):
+    print(f"\n📊 {title}")
+    print("-" * 40)
+
+
+def realistic_autoclaves() -> List[Autoclave]:
+    """Autoclavi di test_realistic_dataset.py"""
+    return [
+        Autoclave(id="AC-001", code="AUTOCLAVE-GRANDE", width=4000, height=2500, vacuum_lines=6, max_weight=5000),
+        Autoclave(id="AC-002", code="AUTOCLAVE-MEDIA", width=3000, height=2000, vacuum_lines=4, max_weight=3000),
+        Autoclave(id="AC-003", code="AUTOCLAVE-PICCOLA", width=2000, height=1500, vacuum_lines=2, max_weight=2000),
+    ]
+
+
+def generate_realistic_odls(target_utilization: float, seed: int) -> Tuple[List[ODL], List[Autoclave]]:
+    """
+    Replica il generatore di test_realistic_dataset.py producendo entità di dominio.
+    Il seed rende gli scenari ripetibili tra un benchmark e l'altro.
+    """
+    rng = random.Random(seed)
+    autoclaves = realistic_autoclaves()
+    target_odl_area = sum(a.area for a in autoclaves) * target_utilization
+
+    odls = []
+    current_area = 0.0
+    odl_count = 0
+
+    while current_area < target_odl_area:
+        odl_count += 1
+        part = rng.choice(TYPICAL_PARTS)
+        width = part["width"] + rng.randint(-50, 50)
+        height = part["height"] + rng.randint(-25, 25)
+        num_tools = rng.choices([1, 2], weights=[70, 30])[0]
+
+        tools = [
+            Tool(
+                id=f"T{odl_count}_{j+1}",
+                width=width,
+                height=height,
+                weight=(width * height * 5) / 1000000
+            )
+            for j in range(num_tools)
+        ]
+        odl_area = sum(t.area for t in tools)
+
+        if current_area + odl_area > target_odl_area * 1.1:
+            break
+
+        odls.append(ODL(
+            id=f"ODL-2024-{odl_count:03d}",
+            odl_number=f"ODL-2024-{odl_count:03d}",
+            part_number=f"PN-AERO-{odl_count:03d}",
+            curing_cycle=rng.choice(CYCLES),
+            vacuum_lines=rng.randint(1, 3),
+            tools=tools
+        ))
+        current_area += odl_area
+
+    return odls, autoclaves
+
+
+def group_by_cycle(odls: List[ODL]) -> Dict[str, List[ODL]]:
+    groups: Dict[str, List[ODL]] = {}
+    for odl in odls:
+        groups.setdefault(odl.curing_cycle, []).append(odl)
+    return groups
+
+
+def build_items(odls: List[ODL]) -> List[Dict]:
+    """Items nel formato interno del NestingEngine"""
+    return [
+        {
+            'odl_id': odl.id,
+            'tool_id': tool.id,
+            'tool': tool,
+            'is_elevated': False,
+            'vacuum_lines': odl.vacuum_lines
+        }
+        for odl in odls
+        for tool in odl.tools
+    ]
+
+
+def benchmark_instances(args) -> List[Tuple[str, List[Dict], Autoclave]]:
+    """
+    Istanze (nome, items, autoclave) per i benchmark sul singolo autoclave:
+    un'istanza per ciclo di ogni scenario, più un'istanza di stress con tutti
+    i tool dello scenario ad alto carico e linee vuoto non vincolanti.
+    """
+    instances = []
+    for utilization, scenario_name in UTILIZATION_SCENARIOS:
+        odls, autoclaves = generate_realistic_odls(utilization, args.seed)
+        for cycle_code, cycle_odls in sorted(group_by_cycle(odls).items()):
+            instances.append((
+                f"{int(utilization * 100)}% {cycle_code}",
+                build_items(cycle_odls),
+                autoclaves[0]
+            ))
+
+    odls, autoclaves = generate_realistic_odls(UTILIZATION_SCENARIOS[-1][0], args.seed)
+    items = build_items(odls)
+    stress_autoclave = Autoclave(
+        id="AC-STRESS", code="AUTOCLAVE-STRESS", width=autoclaves[0].width,
+        height=autoclaves[0].height, vacuum_lines=sum(i['vacuum_lines'] for i in items)
+    )
+    instances.append(("stress tutti i tool", items, stress_autoclave))
+    return instances
+
+
+def benchmark_cpsat_models(args) -> None:
+    """Formulazione pairwise vs NoOverlap2D: tempo di build, tempo di solve, efficienza"""
+    print_header("CP-SAT: PAIRWISE vs NO_OVERLAP_2D")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'modello':<14}{'build s':>9}{'solve s':>9}{'eff %':>8}")
+    for name, items, autoclave in benchmark_instances(args):
+        for model_name in CPSAT_MODELS:
+            engine = NestingEngine(NestingConstraints(
+                cpsat_model=model_name,
+                timeout_seconds=args.timeout
+            ))
+            layout = engine._solve_with_cpsat(items, autoclave)
+            stats = engine.last_solve_stats
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name:<28}{len(items):>6}  {model_name:<14}"
+                  f"{stats['build_time']:>9.3f}{stats['solve_time']:>9.2f}{efficiency:>8.1f}")
+
+
+def repetitive_items(count: int, vacuum_lines: int = 1) -> List[Dict]:
+    """Backlog ripetitivo: poche geometrie di tool condivise da molti ODL"""
+    geometries = [(600, 400), (800, 600), (400, 300)]
+    odls = [
+        ODL(
+            id=f"ODL-REP-{i:03d}",
+            odl_number=f"ODL-REP-{i:03d}",
+            part_number=f"PN-REP-{i % len(geometries)}",
+            curing_cycle="CICLO_STANDARD_180C",
+            vacuum_lines=vacuum_lines,
+            tools=[Tool(id=f"T-REP-{i:03d}", width=w, height=h, weight=5)
+                   for w, h in [geometries[i % len(geometries)]]]
+        )
+        for i in range(count)
+    ]
+    return build_items(odls)
+
+
+def benchmark_symmetry(args) -> None:
+    """Symmetry breaking su tool identici: tempo al primo ottimo e stato finale"""
+    print_header("CP-SAT: SYMMETRY BREAKING SU TOOL IDENTICI")
+
+    autoclave = realistic_autoclaves()[1]
+    print(f"   {'items':>6}  {'modello':<14}{'symmetry':<10}{'solve s':>9}  {'stato':<10}{'eff %':>8}")
+    for count in (12, 24, 36):
+        items = repetitive_items(count)
+        big_autoclave = Autoclave(
+            id=autoclave.id, code=autoclave.code, width=autoclave.width,
+            height=autoclave.height, vacuum_lines=count
+        )
+        for model_name in CPSAT_MODELS:
+            for symmetry in (False, True):
+                engine = NestingEngine(NestingConstraints(
+                    cpsat_model=model_name,
+                    symmetry_breaking=symmetry,
+                    timeout_seconds=args.timeout
+                ))
+                layout = engine._solve_with_cpsat(items, big_autoclave)
+                stats = engine.last_solve_stats
+                efficiency = layout.efficiency * 100 if layout else 0.0
+                print(f"   {count:>6}  {model_name:<14}{str(symmetry):<10}"
+                      f"{stats['solve_time']:>9.2f}  {stats['status']:<10}{efficiency:>8.1f}")
+
+
+def benchmark_conflicts(args) -> None:
+    """Grafo dei conflitti: dimensione del modello pairwise, tempo di build e di solve"""
+    print_header("CP-SAT: PRUNING CON GRAFO DEI CONFLITTI")
+
+    rng = random.Random(args.seed)
+    autoclave = realistic_autoclaves()[1]
+    print(f"   {'items':>6}  {'pruning':<9}{'conflitti':>10}{'scartati':>10}{'vincoli':>9}"
+          f"{'build s':>9}{'solve s':>9}  {'stato':<10}{'eff %':>8}")
+    for count in (12, 24, 36):
+        # Metà tool grandi (oltre metà autoclave su entrambi i lati), qualcuno fuori misura
+        items = []
+        for i in range(count):
+            if i % 2:
+                width, height = rng.randint(150, 500), rng.randint(150, 400)
+            else:
+                width = rng.randint(int(autoclave.width * 0.55), int(autoclave.width * 1.05))
+                height = rng.randint(int(autoclave.height * 0.55), int(autoclave.height * 0.9))
+            tool = Tool(id=f"T-CNF{count}-{i}", width=width, height=height, weight=1)
+            items.append({'odl_id': f"ODL-CNF{count}-{i}", 'tool_id': tool.id, 'tool': tool,
+                          'is_elevated': False, 'vacuum_lines': 1})
+        big_autoclave = Autoclave(id=autoclave.id, code=autoclave.code, width=autoclave.width,
+                                  height=autoclave.height, vacuum_lines=count)
+
+        for pruning in (False, True):
+            constraints = NestingConstraints(conflict_pruning=pruning, timeout_seconds=args.timeout)
+            engine = NestingEngine(constraints)
+            layout = engine._solve_with_cpsat(items, big_autoclave)
+            stats = engine.last_solve_stats
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            conflicts = stats['conflicts'] if stats['conflicts'] is not None else "-"
+            print(f"   {count:>6}  {str(pruning):<9}{conflicts:>10}{stats['dropped_items']:>10}{stats['model_constraints']:>9}"
+                  f"{stats['build_time']:>9.3f}{stats['solve_time']:>9.2f}  {stats['status']:<10}{efficiency:>8.1f}")
+
+
+def benchmark_warm_start(args) -> None:
+    """CP-SAT a freddo vs avvio da hint Skyline con budget di 1 secondo"""
+    print_header("CP-SAT: COLD START vs WARM START SKYLINE (1s)")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'skyline %':>10}{'cold %':>9}{'warm %':>9}")
+    for name, items, autoclave in benchmark_instances(args):
+        results = {}
+        for warm_start in (False, True):
+            engine = NestingEngine(NestingConstraints(warm_start=warm_start, timeout_seconds=1))
+            hint = RectanglePacker(engine.constraints).pack_items(items, autoclave) if warm_start else None
+            layout = engine._solve_with_cpsat(items, autoclave, hint=hint)
+            results[warm_start] = (layout.efficiency * 100 if layout else 0.0, hint)
+
+        skyline = results[True][1].efficiency * 100 if results[True][1] else 0.0
+        print(f"   {name:<28}{len(items):>6}  {skyline:>10.1f}{results[False][0]:>9.1f}{results[True][0]:>9.1f}")
+
+
+def benchmark_budget(args) -> None:
+    """Budget fisso vs adattivo: tempo speso, motivo di stop ed efficienza"""
+    print_header("CP-SAT: BUDGET FISSO vs ADATTIVO")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'budget':<10}{'limite s':>9}{'speso s':>9}  {'stop':<12}{'eff %':>7}")
+    for name, items, autoclave in benchmark_instances(args):
+        for adaptive in (False, True):
+            engine = NestingEngine(NestingConstraints(
+                adaptive_budget=adaptive,
+                timeout_seconds=args.timeout
+            ))
+            odls = {}
+            for item in items:
+                odls.setdefault(item['odl_id'], ODL(
+                    id=item['odl_id'], odl_number=item['odl_id'], part_number=item['odl_id'],
+                    curing_cycle="CICLO_BENCH", vacuum_lines=item['vacuum_lines'], tools=[]
+                )).tools.append(item['tool'])
+            layout = engine.optimize_single_autoclave(list(odls.values()), autoclave)
+            stats = engine.last_solve_stats
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name:<28}{len(items):>6}  {'adattivo' if adaptive else 'fisso':<10}"
+                  f"{stats['time_limit']:>9.1f}{stats['solve_time']:>9.2f}  {stats['stop_reason']:<12}{efficiency:>7.1f}")
+
+
+def layout_is_collision_free(layout, autoclave: Autoclave, constraints: NestingConstraints) -> bool:
+    """Verifica a piena risoluzione: contenimento nei margini e gap minimo tra tool"""
+    border = constraints.min_border_distance
+    gap = constraints.min_tool_distance
+    placements = layout.placements if layout else []
+    for i, p1 in enumerate(placements):
+        if p1.x < border or p1.y < border:
+            return False
+        if p1.x + p1.width > autoclave.width - border or p1.y + p1.height > autoclave.height - border:
+            return False
+        for p2 in placements[i + 1:]:
+            if not (p1.x + p1.width + gap <= p2.x or p2.x + p2.width + gap <= p1.x or
+                    p1.y + p1.height + gap <= p2.y or p2.y + p2.height + gap <= p1.y):
+                return False
+    return True
+
+
+def benchmark_grid(args) -> None:
+    """Risoluzione griglia CP-SAT: compromesso velocità/efficienza"""
+    print_header("CP-SAT: RISOLUZIONE GRIGLIA")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'griglia':<12}{'tempo s':>9}{'eff %':>8}  {'valido'}")
+    instances = benchmark_instances(args)
+    for name, items, autoclave in [instances[0], instances[-1]]:
+        for resolution, refinement in ((1, False), (5, False), (10, False), (25, False), (25, True)):
+            constraints = NestingConstraints(
+                grid_resolution=resolution,
+                grid_refinement=refinement,
+                warm_start=False,
+                timeout_seconds=args.timeout
+            )
+            engine = NestingEngine(constraints)
+            started = time.time()
+            layout = engine._solve_with_cpsat(items, autoclave)
+            elapsed = time.time() - started
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            label = f"{resolution} mm" + (" +raff." if refinement else "")
+            valid = "✅" if layout_is_collision_free(layout, autoclave, constraints) else "❌"
+            print(f"   {name:<28}{len(items):>6}  {label:<12}{elapsed:>9.2f}{efficiency:>8.1f}  {valid}")
+
+
+def single_cycle_odls(count: int, seed: int, cycle_code: str = CYCLES[0], prefix: str = "BIG") -> List[ODL]:
+    """Ciclo unico con molti ODL, per misurare la crescita dei batch su istanze grandi"""
+    rng = random.Random(seed)
+    odls = []
+    for i in range(count):
+        part = rng.choice(TYPICAL_PARTS)
+        width = part["width"] + rng.randint(-50, 50)
+        height = part["height"] + rng.randint(-25, 25)
+        odls.append(ODL(
+            id=f"ODL-{prefix}-{i:03d}",
+            odl_number=f"ODL-{prefix}-{i:03d}",
+            part_number=f"PN-{prefix}-{i:03d}",
+            curing_cycle=cycle_code,
+            vacuum_lines=rng.randint(1, 3),
+            tools=[Tool(id=f"T{prefix}{i}_{j+1}", width=width, height=height, weight=5)
+                   for j in range(rng.choices([1, 2], weights=[70, 30])[0])]
+        ))
+    return odls
+
+
+def benchmark_batch_growth(args) -> None:
+    """Crescita batch incrementale contro ri-ottimizzazione completa a ogni ODL"""
+    print_header("CRESCITA BATCH: INCREMENTALE vs RE-SOLVE")
+
+    instances = []
+    for utilization, _ in UTILIZATION_SCENARIOS:
+        odls, autoclaves = generate_realistic_odls(utilization, args.seed)
+        for cycle_code, cycle_odls in sorted(group_by_cycle(odls).items()):
+            instances.append((f"{int(utilization * 100)}% {cycle_code}", cycle_odls, autoclaves[0]))
+    big_autoclave = Autoclave(id="AC-BIG", code="AUTOCLAVE-BIG", width=4000, height=2500, vacuum_lines=20)
+    instances.append(("ciclo unico 40 ODL", single_cycle_odls(40, args.seed), big_autoclave))
+
+    print(f"   {'istanza':<26}{'modo':<13}{'batch':>6}{'ODL':>5}{'eff media %':>13}{'tempo s':>9}")
+    for name, odls, autoclave in instances:
+        for incremental in (True, False):
+            constraints = NestingConstraints(incremental_batches=incremental, timeout_seconds=args.timeout)
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            started = time.time()
+            batches = optimizer._create_multiple_batches_per_autoclave(odls, autoclave, {})
+            elapsed = time.time() - started
+            placed = len({p.odl_id for b in batches for p in b.placements})
+            efficiency = sum(b.efficiency for b in batches) / len(batches) * 100 if batches else 0.0
+            mode = "incrementale" if incremental else "re-solve"
+            print(f"   {name:<26}{mode:<13}{len(batches):>6}{placed:>5}{efficiency:>13.1f}{elapsed:>9.2f}")
+
+
+def benchmark_parallel_cycles(args) -> None:
+    """Cicli di cura in sequenza contro pool di processi"""
+    print_header("CICLI DI CURA: SEQUENZIALE vs POOL DI PROCESSI")
+
+    autoclave = Autoclave(id="AC-BIG", code="AUTOCLAVE-BIG", width=4000, height=2500, vacuum_lines=20)
+    cycle_jobs = [
+        (single_cycle_odls(args.cycle_odls, args.seed + c, f"CICLO_{c}", f"C{c}"), autoclave)
+        for c in range(args.cycles)
+    ]
+    print(f"   {args.cycles} cicli x {args.cycle_odls} ODL, {os.cpu_count()} core")
+
+    print(f"   {'processi':>9}{'thread CP-SAT':>15}{'batch':>7}{'tempo s':>9}")
+    for workers in sorted({1, args.workers or os.cpu_count() or 1}):
+        constraints = NestingConstraints(
+            cycle_workers=workers,
+            incremental_batches=not args.resolve,
+            timeout_seconds=args.timeout
+        )
+        optimizer = MultiAutoclaveOptimizer(constraints)
+        started = time.time()
+        results, parallelism = optimizer._optimize_cycles(cycle_jobs, {}, started + 3600)
+        elapsed = time.time() - started
+        batches = sum(len(r) for r in results)
+        print(f"   {parallelism['processes']:>9}{parallelism['solver_threads']:>15}{batches:>7}{elapsed:>9.2f}")
+
+
+def benchmark_portfolio(args) -> None:
+    """Portfolio di motori in gara contro CP-SAT con warm start"""
+    print_header("PORTFOLIO: CP-SAT vs CORSA CP-SAT / SKYLINE / GREEDY")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'motore':<22}{'tempo s':>9}{'eff %':>8}")
+    for name, items, autoclave in benchmark_instances(args):
+        constraints = NestingConstraints(timeout_seconds=args.timeout)
+
+        engine = NestingEngine(constraints)
+        started = time.time()
+        hint = RectanglePacker(constraints).pack_items(items, autoclave)
+        layout = engine._solve_with_cpsat(items, autoclave, hint=hint)
+        elapsed = time.time() - started
+        efficiency = max(l.efficiency for l in (layout, hint) if l) * 100
+        print(f"   {name:<28}{len(items):>6}  {'cpsat':<22}{elapsed:>9.2f}{efficiency:>8.1f}")
+
+        engine = NestingEngine(constraints)
+        started = time.time()
+        layout = PortfolioSolver(engine).solve(items, autoclave)
+        elapsed = time.time() - started
+        efficiency = layout.efficiency * 100 if layout else 0.0
+        label = f"portfolio ({engine.last_portfolio['winner']})"
+        print(f"   {'':<28}{'':>6}  {label:<22}{elapsed:>9.2f}{efficiency:>8.1f}")
+
+
+def benchmark_greedy(args) -> None:
+    """Regole del greedy MaxRects a confronto con la Skyline"""
+    print_header("GREEDY MAXRECTS: REGOLE DI SCELTA vs SKYLINE")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'motore':<10}{'tempo ms':>10}{'eff %':>8}")
+    for name, items, autoclave in benchmark_instances(args):
+        for rule in MAXRECTS_RULES + ("skyline",):
+            constraints = NestingConstraints(maxrects_rule=rule if rule != "skyline" else "bssf")
+            started = time.time()
+            if rule == "skyline":
+                layout = RectanglePacker(constraints).pack_items(items, autoclave)
+            else:
+                layout = NestingEngine(constraints)._solve_with_greedy(items, autoclave)
+            elapsed = (time.time() - started) * 1000
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name if rule == MAXRECTS_RULES[0] else '':<28}"
+                  f"{len(items) if rule == MAXRECTS_RULES[0] else '':>6}  "
+                  f"{rule:<10}{elapsed:>10.1f}{efficiency:>8.1f}")
+
+
+def benchmark_spatial_index(args) -> None:
+    """Microbenchmark: costo per query di sovrapposizione al crescere dei tool posizionati"""
+    print_header("INDICE SPAZIALE: QUERY vs SCANSIONE LINEARE")
+
+    queries = 2000
+    print(f"   {'tool':>6}{'lineare µs':>13}{'indice µs':>12}")
+    for count in (10, 100, 500, 1000, 2000, 5000):
+        rng = random.Random(args.seed)
+
+        # Densità costante: il piano cresce con il numero di tool (~40% occupato)
+        side = (count * 400 * 300 / 0.4) ** 0.5
+        rects = []
+        for _ in range(count):
+            x, y = rng.uniform(0, side), rng.uniform(0, side)
+            rects.append((x, y, x + rng.uniform(200, 600), y + rng.uniform(150, 450)))
+        probes = []
+        for _ in range(queries):
+            x, y = rng.uniform(0, side), rng.uniform(0, side)
+            probes.append((x, y, x + 400, y + 300))
+
+        index = SpatialIndex()
+        for rect in rects:
+            index.insert(*rect)
+
+        started = time.perf_counter()
+        for x1, y1, x2, y2 in probes:
+            any(not (x2 <= r[0] or r[2] <= x1 or y2 <= r[1] or r[3] <= y1) for r in rects)
+        linear = (time.perf_counter() - started) / queries * 1e6
+
+        started = time.perf_counter()
+        for probe in probes:
+            index.overlaps(*probe)
+        indexed = (time.perf_counter() - started) / queries * 1e6
+
+        print(f"   {count:>6}{linear:>13.1f}{indexed:>12.1f}")
+
+
+def benchmark_skyline_scaling(args) -> None:
+    """Skyline su array: tempo di packing al crescere del numero di rettangoli"""
+    print_header("SKYLINE: SCALABILITÀ")
+
+    rng = random.Random(args.seed)
+    packer = RectanglePacker(NestingConstraints())
+    tall = Autoclave(id="AC-TALL", code="AUTOCLAVE-TALL", width=6000, height=10 ** 7, vacuum_lines=1)
+
+    print(f"   {'rettangoli':>11}{'tempo s':>9}{'µs/rett.':>10}")
+    for count in (100, 1000, 5000, 10000, 20000):
+        items = [
+            {
+                'odl_id': f"ODL-{i}", 'tool_id': f"T-{i}",
+                'tool': Tool(id=f"T-{i}", width=rng.randint(100, 600), height=rng.randint(100, 600), weight=1),
+                'is_elevated': False, 'vacuum_lines': 0
+            }
+            for i in range(count)
+        ]
+        started = time.time()
+        packer.pack_items(items, tall)
+        elapsed = time.time() - started
+        print(f"   {count:>11}{elapsed:>9.3f}{elapsed / count * 1e6:>10.1f}")
+
+
+def benchmark_multistart(args) -> None:
+    """Skyline multi-start (GRASP) contro passaggio singolo e CP-SAT"""
+    print_header("SKYLINE MULTI-START (GRASP)")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'motore':<16}{'tempo s':>9}{'eff %':>8}")
+    for name, items, autoclave in benchmark_instances(args):
+        rows = []
+        for runs in (1, 16, 64, 256):
+            constraints = NestingConstraints(multistart_runs=runs, random_seed=args.seed)
+            started = time.time()
+            layout = RectanglePacker(constraints).pack_best(items, autoclave)
+            rows.append((f"skyline x{runs}", time.time() - started, layout))
+
+        constraints = NestingConstraints(timeout_seconds=args.timeout)
+        started = time.time()
+        hint = RectanglePacker(constraints).pack_items(items, autoclave)
+        solution = NestingEngine(constraints)._solve_with_cpsat(items, autoclave, hint=hint)
+        layout = max((l for l in (solution, hint) if l), key=lambda l: l.efficiency)
+        rows.append(("cpsat", time.time() - started, layout))
+
+        for i, (label, elapsed, layout) in enumerate(rows):
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name if i == 0 else '':<28}{len(items) if i == 0 else '':>6}  "
+                  f"{label:<16}{elapsed:>9.3f}{efficiency:>8.1f}")
+
+
+def benchmark_guillotine(args) -> None:
+    """Packer a ghigliottina (scelta x regola di taglio) contro Skyline e CP-SAT"""
+    print_header("GUILLOTINE: REGOLE DI SCELTA E TAGLIO vs SKYLINE E CP-SAT")
+
+    print(f"   {'istanza':<28}{'items':>6}  {'motore':<28}{'tempo ms':>10}{'eff %':>8}")
+    for name, items, autoclave in benchmark_instances(args):
+        rows = []
+        for choice in GUILLOTINE_CHOICES:
+            for split in GUILLOTINE_SPLITS:
+                constraints = NestingConstraints(guillotine_choice=choice, guillotine_split=split)
+                started = time.time()
+                layout = RectanglePacker(constraints).pack_guillotine(items, autoclave)
+                rows.append((f"{choice}/{split}", time.time() - started, layout))
+
+        constraints = NestingConstraints(timeout_seconds=args.timeout)
+        started = time.time()
+        hint = RectanglePacker(constraints).pack_items(items, autoclave)
+        rows.append(("skyline", time.time() - started, hint))
+
+        started = time.time()
+        solution = NestingEngine(constraints)._solve_with_cpsat(items, autoclave, hint=hint)
+        layout = max((l for l in (solution, hint) if l), key=lambda l: l.efficiency)
+        rows.append(("cpsat", time.time() - started, layout))
+
+        for i, (label, elapsed, layout) in enumerate(rows):
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name if i == 0 else '':<28}{len(items) if i == 0 else '':>6}  "
+                  f"{label:<28}{elapsed * 1000:>10.1f}{efficiency:>8.1f}")
+
+
+def benchmark_shelf(args) -> None:
+    """Anteprima shelf packing: latenza per numero di tool ed efficienza contro la Skyline"""
+    print_header("SHELF PACKING: ANTEPRIMA IN MILLISECONDI")
+
+    print_section("Latenza (autoclave da 40 m, tool realistici)")
+    rng = random.Random(args.seed)
+    long_autoclave = Autoclave(id="AC-LONG", code="AUTOCLAVE-LUNGA", width=4000, height=40000, vacuum_lines=10 ** 6)
+    print(f"   {'tool':>6}" + "".join(f"{rule + ' ms':>11}" for rule in SHELF_RULES) + f"{'skyline ms':>12}")
+    for count in (50, 200, 1000):
+        items = []
+        for i in range(count):
+            part = rng.choice(TYPICAL_PARTS)
+            tool = Tool(id=f"T-{i}", width=part["width"], height=part["height"], weight=1)
+            items.append({'odl_id': f"ODL-{i}", 'tool_id': tool.id, 'tool': tool,
+                          'is_elevated': False, 'vacuum_lines': 1})
+
+        timings = []
+        for rule in SHELF_RULES:
+            packer = RectanglePacker(NestingConstraints(shelf_rule=rule))
+            started = time.perf_counter()
+            packer.pack_shelf(items, long_autoclave)
+            timings.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        RectanglePacker(NestingConstraints()).pack_items(items, long_autoclave)
+        skyline = (time.perf_counter() - started) * 1000
+        print(f"   {count:>6}" + "".join(f"{t:>11.2f}" for t in timings) + f"{skyline:>12.2f}")
+
+    print_section("Efficienza sulle istanze realistiche")
+    print(f"   {'istanza':<28}{'items':>6}" + "".join(f"{rule:>8}" for rule in SHELF_RULES) + f"{'skyline':>9}")
+    for name, items, autoclave in benchmark_instances(args):
+        efficiencies = []
+        for rule in SHELF_RULES:
+            layout = RectanglePacker(NestingConstraints(shelf_rule=rule)).pack_shelf(items, autoclave)
+            efficiencies.append(layout.efficiency * 100 if layout else 0.0)
+        layout = RectanglePacker(NestingConstraints()).pack_items(items, autoclave)
+        skyline = layout.efficiency * 100 if layout else 0.0
+        print(f"   {name:<28}{len(items):>6}" + "".join(f"{e:>8.1f}" for e in efficiencies) + f"{skyline:>9.1f}")
+
+
+def benchmark_genetic(args) -> None:
+    """GA con decoder Skyline contro passaggio singolo, multi-start e CP-SAT su cicli grandi"""
+    print_header("ALGORITMO GENETICO vs SKYLINE, MULTI-START E CP-SAT")
+
+    instances = [(name, items, autoclave) for name, items, autoclave in benchmark_instances(args)
+                 if len(items) >= 20]
+    autoclave = realistic_autoclaves()[0]
+    for count in (30, 60):
+        odls = single_cycle_odls(count, args.seed, prefix=f"GA{count}")
+        items = build_items(odls)
+        large = Autoclave(id=autoclave.id, code=autoclave.code, width=autoclave.width,
+                          height=autoclave.height, vacuum_lines=sum(i['vacuum_lines'] for i in items))
+        instances.append((f"ciclo unico {count} ODL", items, large))
+
+    print(f"   {'istanza':<28}{'items':>6}  {'motore':<18}{'tempo s':>9}{'eff %':>8}")
+    for name, items, autoclave in instances:
+        rows = []
+        started = time.time()
+        layout = RectanglePacker(NestingConstraints()).pack_items(items, autoclave)
+        rows.append(("skyline", time.time() - started, layout))
+
+        constraints = NestingConstraints(multistart_runs=256, random_seed=args.seed)
+        started = time.time()
+        layout = RectanglePacker(constraints).pack_best(items, autoclave)
+        rows.append(("skyline x256", time.time() - started, layout))
+
+        constraints = NestingConstraints(
+            genetic_time_budget=args.timeout, genetic_workers=args.workers, random_seed=args.seed
+        )
+        solver = GeneticSolver(constraints)
+        started = time.time()
+        layout = solver.solve(items, autoclave)
+        rows.append((f"genetic g{solver.last_run['generations']}", time.time() - started, layout))
+
+        constraints = NestingConstraints(timeout_seconds=args.timeout)
+        started = time.time()
+        hint = RectanglePacker(constraints).pack_items(items, autoclave)
+        solution = NestingEngine(constraints)._solve_with_cpsat(items, autoclave, hint=hint)
+        layout = max((l for l in (solution, hint) if l), key=lambda l: l.efficiency)
+        rows.append(("cpsat", time.time() - started, layout))
+
+        for i, (label, elapsed, layout) in enumerate(rows):
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name if i == 0 else '':<28}{len(items) if i == 0 else '':>6}  "
+                  f"{label:<18}{elapsed:>9.3f}{efficiency:>8.1f}")
+
+
+def benchmark_lns(args) -> None:
+    """LNS sul layout Skyline contro il modello CP-SAT completo su batch da 80+ tool"""
+    print_header("LARGE NEIGHBORHOOD SEARCH vs CP-SAT COMPLETO")
+
+    rng = random.Random(args.seed)
+    base = realistic_autoclaves()[0]
+    autoclave = Autoclave(id=base.id, code=base.code, width=base.width, height=base.height, vacuum_lines=1000)
+    instances = []
+    for count in (90, 150):
+        items = []
+        for i in range(count):
+            tool = Tool(id=f"T-LNS{count}-{i}", width=rng.randint(150, 600), height=rng.randint(100, 450), weight=1)
+            items.append({'odl_id': f"ODL-LNS{count}-{i // 2}", 'tool_id': tool.id, 'tool': tool,
+                          'is_elevated': False, 'vacuum_lines': 1})
+        instances.append((f"{count} tool misti", items, autoclave))
+    odls = single_cycle_odls(90, args.seed, prefix="LNS")
+    items = build_items(odls)
+    tall = Autoclave(id="AC-TALL", code="AUTOCLAVE-ALTA", width=4000, height=6000,
+                     vacuum_lines=sum(i['vacuum_lines'] for i in items))
+    instances.append(("ciclo unico 90 ODL", items, tall))
+
+    print(f"   {'istanza':<24}{'items':>6}  {'motore':<8}{'tempo s':>9}{'eff %':>8}  traiettoria (s: eff %)")
+    for name, items, autoclave in instances:
+        rows = []
+        skyline = RectanglePacker(NestingConstraints()).pack_best(items, autoclave)
+        rows.append(("skyline", 0.0, skyline, ""))
+
+        for engine_name in ("lns", "cpsat"):
+            constraints = NestingConstraints(timeout_seconds=args.timeout, engine=engine_name, lns_min_items=0)
+            engine = NestingEngine(constraints)
+            started = time.time()
+            layout, _ = engine._solve_with_engine(items, autoclave)
+            trajectory = ""
+            if engine_name == "lns":
+                # Al più 6 punti della traiettoria, ultimo miglioramento incluso
+                steps = engine.last_lns['trajectory']
+                shown = steps[::max(1, len(steps) // 5)][:5] + steps[-1:]
+                trajectory = " ".join(
+                    f"{step['time']:.1f}:{step['area'] / autoclave.area * 100:.1f}" for step in shown
+                )
+            rows.append((engine_name, time.time() - started, layout, trajectory))
+
+        for i, (label, elapsed, layout, trajectory) in enumerate(rows):
+            efficiency = layout.efficiency * 100 if layout else 0.0
+            print(f"   {name if i == 0 else '':<24}{len(items) if i == 0 else '':>6}  "
+                  f"{label:<8}{elapsed:>9.2f}{efficiency:>8.1f}  {trajectory}")
+
+
+def benchmark_bounds(args) -> None:
+    """Batch creati contro lower bound L1/L2 e gap di ottimalità sull'area, per ciclo"""
+    print_header("BOUND: BATCH MINIMI E GAP DI OTTIMALITÀ")
+
+    print(f"   {'istanza':<26}{'batch':>6}{'LB batch':>10}{'gap area %':>12}{'stop upper_bound':>18}{'tempo s':>9}")
+    for utilization, _ in UTILIZATION_SCENARIOS:
+        odls, autoclaves = generate_realistic_odls(utilization, args.seed)
+        for cycle_code, cycle_odls in sorted(group_by_cycle(odls).items()):
+            optimizer = MultiAutoclaveOptimizer(NestingConstraints(timeout_seconds=args.timeout))
+            started = time.time()
+            batches = optimizer._create_multiple_batches_per_autoclave(cycle_odls, autoclaves[0], {})
+            elapsed = time.time() - started
+
+            bounds = optimizer._bounds_metrics(
+                batches, [(cycle_odls, autoclaves[0])], build_items(cycle_odls), {}
+            )
+            stops = optimizer.nesting_engine.solver_totals['stop_reasons'].get('upper_bound', 0)
+            name = f"{int(utilization * 100)}% {cycle_code}"
+            print(f"   {name:<26}{bounds['batches_created']:>6}{bounds['batches_lower_bound']:>10}"
+                  f"{bounds['optimality_gap'] * 100:>12.1f}{stops:>18}{elapsed:>9.2f}")
+
+
+def benchmark_item_types(args) -> None:
+    """Backlog ripetitivo aggregato per tipo contro le stesse misure rese tutte distinte"""
+    print_header("AGGREGAZIONE PER TIPO DI TOOL")
+
+    autoclave = realistic_autoclaves()[0]
+    constraints = NestingConstraints()
+    engine = NestingEngine(constraints)
+    packer = RectanglePacker(constraints)
+    print(f"   {'items':>6}  {'misure':<9}{'tipi':>6}{'bound ms':>10}{'skyline ms':>12}{'greedy ms':>11}{'eff %':>8}")
+    for count in (200, 800):
+        repeated = repetitive_items(count)
+        # Stesse misure a meno di 1/1000 mm: nessun tool identico a un altro
+        distinct = [
+            dict(item, tool=Tool(id=item['tool_id'], width=item['tool'].width + i / 1000,
+                                 height=item['tool'].height, weight=item['tool'].weight))
+            for i, item in enumerate(repeated)
+        ]
+        big_autoclave = Autoclave(id=autoclave.id, code=autoclave.code, width=autoclave.width,
+                                  height=autoclave.height, vacuum_lines=count // 2)
+        for label, items in (("ripetute", repeated), ("distinte", distinct)):
+            started = time.perf_counter()
+            max_batch_area(items, big_autoclave, constraints)
+            batch_count_lower_bound(items, big_autoclave, constraints)
+            bound_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            layout = packer.pack_items(items, big_autoclave)
+            skyline_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            engine._solve_with_greedy(items, big_autoclave)
+            greedy_ms = (time.perf_counter() - started) * 1000
+
+            print(f"   {count:>6}  {label:<9}{len(aggregate_items(items)):>6}{bound_ms:>10.1f}"
+                  f"{skyline_ms:>12.1f}{greedy_ms:>11.1f}{layout.efficiency * 100:>8.1f}")
+
+
+def benchmark_assignment(args) -> None:
+    """Assegnazione cicli -> autoclavi per rango contro modello CP-SAT globale"""
+    print_header("ASSEGNAZIONE CICLI: RANGO vs CP-SAT")
+
+    scenarios = []
+    for utilization, scenario_name in UTILIZATION_SCENARIOS:
+        odls, autoclaves = generate_realistic_odls(utilization, args.seed)
+        scenarios.append((scenario_name, odls, autoclaves))
+    # Più cicli che autoclavi: con il rango i cicli in eccesso finiscono tutti sulla più grande
+    odls = [odl for c in range(5) for odl in single_cycle_odls(12, args.seed + c, f"CICLO_{c}", f"C{c}")]
+    scenarios.append(("5 cicli x 12 ODL", odls, realistic_autoclaves()))
+
+    print(f"   {'scenario':<32}{'modo':<7}{'piano s':>9}{'batch':>7}{'makespan':>10}{'tool':>9}  batch per autoclave")
+    for name, odls, autoclaves in scenarios:
+        for mode in ("rank", "cpsat"):
+            constraints = NestingConstraints(assignment_mode=mode, engine="skyline", timeout_seconds=args.timeout)
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            started = time.time()
+            cycle_jobs, _ = optimizer._assign_autoclaves(optimizer._analyze_cycle_areas(odls), autoclaves)
+            plan_time = time.time() - started
+            results, _ = optimizer._optimize_cycles(cycle_jobs, {}, started + 3600)
+
+            loads = {a.code: 0 for a in autoclaves}
+            placed = 0
+            for (_, autoclave), batches in zip(cycle_jobs, results):
+                loads[autoclave.code] += len(batches)
+                placed += sum(len(batch.placements) for batch in batches)
+            tools = f"{placed}/{sum(len(odl.tools) for odl in odls)}"
+            per_autoclave = " ".join(f"{code.split('-')[-1]}:{count}" for code, count in loads.items())
+            print(f"   {name:<32}{mode:<7}{plan_time:>9.2f}{sum(loads.values()):>7}"
+                  f"{max(loads.values()):>10}{tools:>9}  {per_autoclave}")
+
+
+def benchmark_multi_bin(args) -> None:
+    """Batch sequenziali contro modello multi-bin congiunto sugli stessi ODL"""
+    print_header("MULTI-BIN: SEQUENZIALE vs MODELLO CONGIUNTO")
+
+    # Linee del vuoto abbondanti: il collo di bottiglia è l'area, dove conta il packing congiunto
+    autoclaves = [
+        Autoclave(id=a.id, code=a.code, width=a.width, height=a.height, vacuum_lines=20)
+        for a in realistic_autoclaves()
+    ]
+    instances = [
+        (f"{count} ODL su {autoclave.code}", single_cycle_odls(count, args.seed + count, prefix=f"MB{count}"), autoclave)
+        for count, autoclave in ((8, autoclaves[2]), (10, autoclaves[1]), (14, autoclaves[1]), (20, autoclaves[0]))
+    ]
+
+    print(f"   {'istanza':<30}{'modo':<13}{'tempo s':>9}{'batch':>7}{'tool':>7}  riempimento batch")
+    for name, odls, autoclave in instances:
+        for mode in ("sequenziale", "multi-bin"):
+            constraints = NestingConstraints(
+                engine="skyline", multi_bin=mode == "multi-bin", timeout_seconds=args.timeout
+            )
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            started = time.time()
+            batches = optimizer._create_multiple_batches_per_autoclave(odls, autoclave, {})
+            elapsed = time.time() - started
+
+            fills = " ".join(f"{batch.efficiency:.0%}" for batch in batches)
+            tools = sum(len(batch.placements) for batch in batches)
+            print(f"   {name:<30}{mode:<13}{elapsed:>9.2f}{len(batches):>7}{tools:>7}  {fills}")
+        summary = optimizer.nesting_engine.last_multi_bin
+        if summary:
+            print(f"   {'':<30}{'':<13}status {summary['status']}, accettato: {summary['accepted']}")
+
+
+def benchmark_polish(args) -> None:
+    """Batch sequenziali prima e dopo la rifinitura local search (move/swap/ejection)"""
+    print_header("POLISH: BATCH SEQUENZIALI PRIMA/DOPO LA LOCAL SEARCH")
+
+    autoclaves = [
+        Autoclave(id=a.id, code=a.code, width=a.width, height=a.height, vacuum_lines=20)
+        for a in realistic_autoclaves()
+    ]
+    # Un ciclo su una sola autoclave o diviso a metà su due autoclavi diverse
+    instances = [
+        (f"{count} ODL su {' + '.join(a.code for a in targets)}",
+         single_cycle_odls(count, args.seed + count, prefix=f"PL{count}"), targets)
+        for count, targets in (
+            (10, [autoclaves[1]]),
+            (14, [autoclaves[1]]),
+            (16, [autoclaves[1], autoclaves[2]]),
+            (24, [autoclaves[0], autoclaves[1]])
+        )
+    ]
+
+    print(f"   {'istanza':<44}{'fase':<8}{'tempo s':>9}{'batch':>7}{'tool':>7}  riempimento batch")
+    for name, odls, targets in instances:
+        constraints = NestingConstraints(engine="skyline", polish=True, timeout_seconds=args.timeout)
+        optimizer = MultiAutoclaveOptimizer(constraints)
+        started = time.time()
+        batches = []
+        for i, autoclave in enumerate(targets):
+            share = odls[i::len(targets)]
+            batches.extend(optimizer._create_multiple_batches_per_autoclave(share, autoclave, {}))
+        elapsed = time.time() - started
+
+        polished, summary = optimizer._optimize_inter_autoclave(batches, odls, targets, {})
+        for phase, layouts, seconds in (("prima", batches, elapsed), ("dopo", polished, summary['time'])):
+            fills = " ".join(f"{batch.efficiency:.0%}" for batch in layouts)
+            tools = sum(len(batch.placements) for batch in layouts)
+            print(f"   {name:<44}{phase:<8}{seconds:>9.2f}{len(layouts):>7}{tools:>7}  {fills}")
+
+        accepted = ", ".join(f"{move} {counts['accepted']}/{counts['tried']}" for move, counts in summary['moves'].items())
+        print(f"   {'':<44}{'':<8}mosse {accepted}; valutazioni {summary['evaluations']} "
+              f"(memo {summary['memo_hits']}, bound {summary['bound_rejections']}, "
+              f"incrementali {summary['incremental']}, re-pack {summary['repacks']}), stop {summary['stop_reason']}")
+
+
+def benchmark_layout_cache(args) -> None:
+    """Istanze rilanciate con nuovi ID e ordine diverso: solve CP-SAT contro hit della cache"""
+    print_header("LAYOUT CACHE: ISTANZE RILANCIATE")
+
+    # Più tool di quanti ne entrino: il solver non chiude sul bound e usa il budget
+    base = realistic_autoclaves()[0]
+    autoclave = Autoclave(id=base.id, code=base.code, width=base.width, height=base.height, vacuum_lines=20)
+    constraints = NestingConstraints(engine="cpsat", timeout_seconds=args.timeout, layout_cache=True)
+    engine = NestingEngine(constraints)
+    engine.layout_cache.clear()
+
+    print(f"   {'ODL':<6}{'corsa':<10}{'tempo s':>9}{'tool':>7}{'efficienza':>12}  esito")
+    for count in (12, 20, 30):
+        for run in ("prima", "rilancio"):
+            # Stesso seed, prefisso diverso e ordine inverso: stessa istanza canonica
+            odls = single_cycle_odls(count, args.seed + count, prefix=f"LC{run}")
+            if run == "rilancio":
+                odls.reverse()
+            engine.start_request()
+            started = time.time()
+            layout = engine.optimize_single_autoclave(odls, autoclave)
+            elapsed = time.time() - started
+
+            summary = engine.solver_summary()
+            outcome = "hit" if summary['layout_cache_hits'] else "miss (solve)"
+            print(f"   {count:<6}{run:<10}{elapsed:>9.2f}{len(layout.placements):>7}"
+                  f"{layout.efficiency:>12.1%}  {outcome}")
+
+
+def benchmark_right_sizing(args) -> None:
+    """Batch prima e dopo il right-sizing sull'autoclave più piccola in cui entrano"""
+    print_header("RIGHT-SIZING: BATCH SULLE AUTOCLAVI PIÙ PICCOLE")
+
+    scenarios = []
+    for utilization, scenario_name in UTILIZATION_SCENARIOS:
+        odls, autoclaves = generate_realistic_odls(utilization, args.seed)
+        scenarios.append((scenario_name, odls, autoclaves))
+    odls = [odl for c in range(5) for odl in single_cycle_odls(12, args.seed + c, f"CICLO_{c}", f"C{c}")]
+    scenarios.append(("5 cicli x 12 ODL", odls, realistic_autoclaves()))
+
+    print(f"   {'scenario':<32}{'assegnazione':<14}{'fase':<7}{'makespan':>10}{'fill':>7}  batch per autoclave")
+    for name, odls, autoclaves in scenarios:
+        for mode in ("rank", "cpsat"):
+            constraints = NestingConstraints(
+                assignment_mode=mode, engine="skyline", right_size=True, timeout_seconds=args.timeout
+            )
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            started = time.time()
+            cycle_jobs, _ = optimizer._assign_autoclaves(optimizer._analyze_cycle_areas(odls), autoclaves)
+            results, _ = optimizer._optimize_cycles(cycle_jobs, {}, started + 3600)
+            batches = [batch for cycle_batches in results for batch in cycle_batches]
+
+            resized, summary = optimizer._right_size_batches(batches, odls, autoclaves, {})
+            codes = {a.id: a.code.split('-')[-1] for a in autoclaves}
+            for phase, loads, fill in (
+                ("prima", summary['loads_before'], summary['average_efficiency_before']),
+                ("dopo", summary['loads_after'], summary['average_efficiency_after'])
+            ):
+                per_autoclave = " ".join(f"{codes[a_id]}:{count}" for a_id, count in loads.items())
+                print(f"   {name:<32}{mode:<14}{phase:<7}{max(loads.values()):>10}{fill:>7.0%}  {per_autoclave}")
+            print(f"   {'':<32}{'':<14}{'':<7}spostati {summary['batches_moved']}, liberati "
+                  f"{summary['freed_area_m2']} m², bound {summary['bound_rejections']}, "
+                  f"layout invariati {summary['kept_layouts']}, re-pack {summary['repacks']}, {summary['time']:.3f}s")
+
+
+SUITES: Dict[str, Callable] = {
+    "cpsat-models": benchmark_cpsat_models,
+    "symmetry": benchmark_symmetry,
+    "conflicts": benchmark_conflicts,
+    "warm-start": benchmark_warm_start,
+    "budget": benchmark_budget,
+    "grid": benchmark_grid,
+    "batch-growth": benchmark_batch_growth,
+    "parallel-cycles": benchmark_parallel_cycles,
+    "portfolio": benchmark_portfolio,
+    "greedy": benchmark_greedy,
+    "spatial-index": benchmark_spatial_index,
+    "skyline": benchmark_skyline_scaling,
+    "multistart": benchmark_multistart,
+    "guillotine": benchmark_guillotine,
+    "shelf": benchmark_shelf,
+    "genetic": benchmark_genetic,
+    "lns": benchmark_lns,
+    "bounds": benchmark_bounds,
+    "item-types": benchmark_item_types,
+    "assignment": benchmark_assignment,
+    "multi-bin": benchmark_multi_bin,
+    "polish": benchmark_polish,
+    "layout-cache": benchmark_layout_cache,
+    "right-sizing": benchmark_right_sizing,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark motori di nesting")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="cpsat-models")
+    parser.add_argument("--timeout", type=int, default=10, help="Timeout solver per chiamata (s)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed generatore scenari")
+    parser.add_argument("--cycles", type=int, default=5, help="Cicli per la suite parallel-cycles")
+    parser.add_argument("--cycle-odls", type=int, default=30, help="ODL per ciclo nella suite parallel-cycles")
+    parser.add_argument("--workers", type=int, default=0, help="Processi per le suite parallel-cycles e genetic (0 = core)")
+    parser.add_argument("--resolve", action="store_true", help="parallel-cycles con re-solve completo per ODL")
+    args = parser.parse_args()
+
+    started = time.time()
+    SUITES[args.suite](args)
+    print(f"\n⏱️  Benchmark completato in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
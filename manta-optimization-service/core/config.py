@@ -24,6 +24,12 @@ class Settings(BaseSettings):
     solver_threads: int = 4
     solver_time_limit_ms: int = 60000  # 1 minuto per solver
     
+    # Cache dei layout tra richieste, opzionale come il vincolo layout_cache
+    # (path None = solo memoria del processo)
+    layout_cache_enabled: bool = False
+    layout_cache_size: int = 512
+    layout_cache_path: Optional[str] = None
+    
     # Visualization
     dpi: int = 150
     default_color_scheme: str = "aerospace"
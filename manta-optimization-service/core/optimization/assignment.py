@@ -0,0 +1,289 @@
+"""
+Assegnazione Cicli di Cura alle Autoclavi
+=========================================
+
+Decide su quali autoclavi eseguire ogni ciclo con un piccolo modello CP-SAT a
+scelta di opzioni. Le cure di ogni opzione non sono stimate dall'area: vengono
+contate simulando la crescita dei batch del flusso reale (ODL per area
+decrescente, Skyline incrementale, ODL mai divisi), quindi il modello ottimizza
+gli stessi conteggi che il packing raggiungerà. Per ogni ciclo le opzioni sono:
+
+- il ciclo intero su una sola autoclave;
+- il ciclo diviso su due autoclavi: gli ODL dei primi k batch simulati sulla
+  prima, il resto simulato sulla seconda (al più ASSIGNMENT_SPLIT_POINTS
+  valori di k per coppia).
+
+Obiettivo lessicografico: prima i tool che non trovano posto, poi il makespan
+(cure sull'autoclave più carica), poi il numero totale di cure. Con un piano di
+riferimento (l'assegnazione per rango: un ciclo intero per autoclave, sempre
+tra le opzioni) tool senza posto, makespan e cure totali sono vincolati a non
+superare i suoi: il piano non peggiora il rango su nessuna delle tre metriche.
+
+Le cure hanno durata uniforme: il makespan è misurato in numero di cure.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+from domain.entities import ODL, Autoclave
+from core.optimization.constraints import NestingConstraints
+from core.optimization.rectangle_packer import RectanglePacker
+
+# Budget del modello di assegnazione (s): una variabile booleana per opzione
+ASSIGNMENT_TIME_LIMIT = 2.0
+
+# Punti di divisione provati per ciclo e coppia di autoclavi
+ASSIGNMENT_SPLIT_POINTS = 6
+
+
+@dataclass
+class CycleAllocation:
+    """Quota di un ciclo su un'autoclave: cure stimate e ODL assegnati"""
+    cycle_code: str
+    autoclave_id: str
+    estimated_batches: int
+    odls: List[ODL] = field(default_factory=list)
+
+
+@dataclass
+class _Packing:
+    """Batch simulati di un insieme di ODL su un'autoclave"""
+    batches: List[List[ODL]]
+    unplaced_tools: int
+
+
+@dataclass
+class _CycleOption:
+    """Un modo di eseguire un ciclo: quote (autoclave, ODL, cure) e tool senza posto"""
+    parts: List[Tuple[Autoclave, List[ODL], int]]
+    unplaced_tools: int
+
+    @property
+    def runs(self) -> int:
+        return sum(count for _, _, count in self.parts)
+
+
+class CycleAssignmentSolver:
+    """Assegnazione globale ciclo -> autoclavi minimizzando makespan e cure totali"""
+
+    def __init__(self, constraints: NestingConstraints):
+        self.constraints = constraints
+        self.packer = RectanglePacker(constraints)
+        self.last_plan: Dict = {}
+
+    def solve(
+        self,
+        cycles: Dict[str, List[ODL]],
+        autoclaves: List[Autoclave],
+        baseline: Optional[Dict[str, str]] = None
+    ) -> List[CycleAllocation]:
+        """
+        Restituisce le quote ciclo-autoclave, per ogni ciclo dalla più carica.
+        baseline (ciclo -> autoclave_id, es. l'assegnazione per rango) è il piano
+        da non peggiorare. Un ciclo i cui tool non entrano in nessuna autoclave
+        resta comunque assegnato (il nesting non ne posizionerà i tool).
+        """
+        started = time.time()
+        if not cycles or not autoclaves:
+            return []
+
+        options = {code: self._cycle_options(odls, autoclaves) for code, odls in cycles.items()}
+        reference = self._baseline_choice(baseline, autoclaves, cycles) if baseline else None
+        chosen, status = self._solve_model(options, autoclaves, reference)
+
+        allocations = []
+        loads = {a.id: 0 for a in autoclaves}
+        for code, index in chosen.items():
+            parts = sorted(options[code][index].parts, key=lambda part: part[2], reverse=True)
+            for autoclave, odls, count in parts:
+                allocations.append(CycleAllocation(code, autoclave.id, count, odls))
+                loads[autoclave.id] += count
+
+        self.last_plan = {
+            'status': status,
+            'makespan': max(loads.values()),
+            'total_runs': sum(loads.values()),
+            'loads': loads,
+            'unplaced_tools': sum(options[code][index].unplaced_tools for code, index in chosen.items()),
+            'split_cycles': sum(1 for code, index in chosen.items() if len(options[code][index].parts) > 1),
+            'options': sum(len(cycle_options) for cycle_options in options.values()),
+            'baseline': self._metrics(options, reference, autoclaves) if reference else None,
+            'time': round(time.time() - started, 3)
+        }
+        return allocations
+
+    def _cycle_options(self, odls: List[ODL], autoclaves: List[Autoclave]) -> List[_CycleOption]:
+        """Ciclo intero su ogni autoclave e divisioni su coppie di autoclavi"""
+        whole = {a.id: self._simulate(odls, a) for a in autoclaves}
+        options = [
+            _CycleOption([(a, list(odls), len(whole[a.id].batches))], whole[a.id].unplaced_tools)
+            for a in autoclaves
+        ]
+
+        for first in autoclaves:
+            batches = whole[first.id].batches
+            for k in self._split_points(len(batches)):
+                head_ids = {odl.id for batch in batches[:k] for odl in batch}
+                head = [odl for odl in odls if odl.id in head_ids]
+                rest = [odl for odl in odls if odl.id not in head_ids]
+                head_packing = self._simulate(head, first)
+
+                for second in autoclaves:
+                    if second.id == first.id:
+                        continue
+                    rest_packing = self._simulate(rest, second)
+                    options.append(_CycleOption(
+                        [(first, head, len(head_packing.batches)), (second, rest, len(rest_packing.batches))],
+                        head_packing.unplaced_tools + rest_packing.unplaced_tools
+                    ))
+
+        return options
+
+    @staticmethod
+    def _baseline_choice(
+        baseline: Dict[str, str],
+        autoclaves: List[Autoclave],
+        cycles: Dict[str, List[ODL]]
+    ) -> Optional[Dict[str, int]]:
+        """Opzione "ciclo intero" del piano di riferimento; None se non copre ogni ciclo"""
+        index = {a.id: i for i, a in enumerate(autoclaves)}
+        if any(baseline.get(code) not in index for code in cycles):
+            return None
+        return {code: index[baseline[code]] for code in cycles}
+
+    @staticmethod
+    def _metrics(
+        options: Dict[str, List[_CycleOption]],
+        chosen: Dict[str, int],
+        autoclaves: List[Autoclave]
+    ) -> Dict:
+        """Tool senza posto, makespan e cure totali di una scelta di opzioni"""
+        loads = {a.id: 0 for a in autoclaves}
+        for code, index in chosen.items():
+            for autoclave, _, count in options[code][index].parts:
+                loads[autoclave.id] += count
+        return {
+            'unplaced_tools': sum(options[code][index].unplaced_tools for code, index in chosen.items()),
+            'makespan': max(loads.values()),
+            'total_runs': sum(loads.values())
+        }
+
+    @staticmethod
+    def _split_points(batch_count: int) -> List[int]:
+        """Numero di batch lasciati alla prima autoclave: 1..n-1, al più ASSIGNMENT_SPLIT_POINTS"""
+        if batch_count - 1 <= ASSIGNMENT_SPLIT_POINTS:
+            return list(range(1, batch_count))
+        step = (batch_count - 2) / (ASSIGNMENT_SPLIT_POINTS - 1)
+        return sorted({1 + round(i * step) for i in range(ASSIGNMENT_SPLIT_POINTS)})
+
+    def _simulate(self, odls: List[ODL], autoclave: Autoclave) -> _Packing:
+        """
+        Batch della crescita incrementale del flusso reale: ODL per area
+        decrescente inseriti interi nella Skyline finché entrano. Un ODL che non
+        entra da solo occupa un batch con i tool che la Skyline riesce a posizionare.
+        """
+        remaining = sorted(odls, key=lambda odl: odl.total_area, reverse=True)
+        batches: List[List[ODL]] = []
+        unplaced = 0
+
+        while remaining:
+            growing = self.packer.start_layout(autoclave)
+            for odl in remaining[:]:
+                if growing.try_add(odl):
+                    remaining.remove(odl)
+
+            if growing.odls:
+                batches.append(growing.odls)
+                continue
+
+            odl = remaining.pop(0)
+            layout = self.packer.pack_items(RectanglePacker.odl_items(odl), autoclave)
+            placed = len(layout.placements) if layout else 0
+            if placed:
+                batches.append([odl])
+            unplaced += len(odl.tools) - placed
+
+        return _Packing(batches, unplaced)
+
+    def _solve_model(
+        self,
+        options: Dict[str, List[_CycleOption]],
+        autoclaves: List[Autoclave],
+        reference: Optional[Dict[str, int]] = None
+    ) -> Tuple[Dict[str, int], str]:
+        """
+        Un'opzione per ciclo, senza peggiorare la scelta reference (che è anche
+        l'hint). Se il solver non trova soluzione si usa reference o, senza
+        riferimento, per ogni ciclo l'opzione su una sola autoclave con meno
+        tool senza posto e meno cure.
+        """
+        model = cp_model.CpModel()
+        picks = {
+            code: [model.NewBoolVar(f'pick_{code}_{i}') for i in range(len(cycle_options))]
+            for code, cycle_options in options.items()
+        }
+        for cycle_picks in picks.values():
+            model.AddExactlyOne(cycle_picks)
+
+        horizon = sum(max(option.runs for option in cycle_options) for cycle_options in options.values())
+        makespan = model.NewIntVar(0, horizon, 'makespan')
+        for a in autoclaves:
+            model.Add(sum(
+                count * pick
+                for code, cycle_options in options.items()
+                for option, pick in zip(cycle_options, picks[code])
+                for autoclave, _, count in option.parts if autoclave.id == a.id
+            ) <= makespan)
+
+        total_runs = sum(
+            option.runs * pick
+            for code, cycle_options in options.items()
+            for option, pick in zip(cycle_options, picks[code])
+        )
+        unplaced = sum(
+            option.unplaced_tools * pick
+            for code, cycle_options in options.items()
+            for option, pick in zip(cycle_options, picks[code])
+        )
+
+        if reference:
+            limits = self._metrics(options, reference, autoclaves)
+            model.Add(unplaced <= limits['unplaced_tools'])
+            model.Add(makespan <= limits['makespan'])
+            model.Add(total_runs <= limits['total_runs'])
+            for code, index in reference.items():
+                for i, pick in enumerate(picks[code]):
+                    model.AddHint(pick, int(i == index))
+
+        # Lessicografico: tool senza posto, poi makespan, poi cure totali
+        weight = horizon + 1
+        model.Minimize(unplaced * weight * weight + makespan * weight + total_runs)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = ASSIGNMENT_TIME_LIMIT
+        # Un worker e seed fisso: a parità di ottimo il piano è riproducibile
+        solver.parameters.num_search_workers = 1
+        solver.parameters.random_seed = self.constraints.random_seed
+        status = solver.Solve(model)
+
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            chosen = {
+                code: next(i for i, pick in enumerate(cycle_picks) if solver.Value(pick))
+                for code, cycle_picks in picks.items()
+            }
+            return chosen, solver.StatusName(status)
+
+        if reference:
+            return dict(reference), 'FALLBACK'
+        chosen = {
+            code: min(
+                (i for i, option in enumerate(cycle_options) if len(option.parts) == 1),
+                key=lambda i: (cycle_options[i].unplaced_tools, cycle_options[i].runs,
+                               -cycle_options[i].parts[0][0].area)
+            )
+            for code, cycle_options in options.items()
+        }
+        return chosen, 'FALLBACK'
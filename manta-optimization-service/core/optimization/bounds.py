@@ -0,0 +1,226 @@
+"""
+Bound per il Nesting
+====================
+
+Limiti superiori sull'area posizionabile in un batch e limiti inferiori sul
+numero di batch necessari per un insieme di ODL. Servono a fermare le ricerche
+appena un layout raggiunge l'ottimo dimostrabile e a riportare il gap di
+ottimalità dei layout prodotti.
+
+Tutti i bound usano le convenzioni dei packer: area utile interna ai margini e
+footprint allargati di min_tool_distance, contenuti in un'area utile allargata
+dello stesso gap. Le aree sono in mm² interi per tool, come l'obiettivo CP-SAT.
+I calcoli lavorano sui tipi di item (tool identici aggregati con molteplicità).
+"""
+
+import math
+from typing import List, Dict, Optional, Tuple
+
+from domain.entities import Autoclave, BatchLayout, Tool
+from core.optimization.constraints import NestingConstraints
+from core.optimization.item_types import ItemType, aggregate_items
+
+# Oltre questa capacità (linee vuoto) il knapsack esatto costa troppo: bound frazionario
+KNAPSACK_MAX_CAPACITY = 2000
+
+# Valori candidati per lato dei parametri (p, q) del bound L2
+L2_MAX_CANDIDATES = 24
+
+
+def usable_area(autoclave: Autoclave, constraints: NestingConstraints) -> float:
+    """Area utile dell'autoclave al netto dei margini dal bordo"""
+    width, height = _usable_size(autoclave, constraints)
+    return max(width, 0) * max(height, 0)
+
+
+def fits(tool: Tool, autoclave: Autoclave, constraints: NestingConstraints) -> bool:
+    """True se il tool entra nell'area utile in almeno un'orientazione permessa"""
+    width, height = _usable_size(autoclave, constraints)
+    if tool.width <= width and tool.height <= height:
+        return True
+    return constraints.allow_rotation and tool.height <= width and tool.width <= height
+
+
+def placed_area(layout: Optional[BatchLayout], items: List[Dict]) -> int:
+    """Area posizionata di un layout nell'unità dei bound (mm² interi per tool)"""
+    if not layout:
+        return 0
+    areas = {(item['odl_id'], item['tool_id']): int(item['tool'].area) for item in items}
+    return sum(areas.get((p.odl_id, p.tool_id), 0) for p in layout.placements)
+
+
+def max_batch_area(items: List[Dict], autoclave: Autoclave, constraints: NestingConstraints) -> int:
+    """
+    Upper bound sull'area posizionabile in un batch: minimo tra area utile,
+    knapsack esatto (0/1) dell'area sulle linee del vuoto e knapsack frazionario
+    delle aree allargate di gap sull'area utile allargata.
+    Gli item che non entrano in nessuna orientazione sono esclusi.
+    """
+    types = _fitting_types(items, autoclave, constraints)
+    if not types:
+        return 0
+
+    gap = constraints.min_tool_distance
+    width, height = _usable_size(autoclave, constraints)
+
+    # Knapsack limitato: ogni tipo spezzato in blocchi 1, 2, 4, ... della sua molteplicità
+    vacuum_bound = _vacuum_knapsack(
+        [
+            (int(t.area) * size, t.vacuum_lines * size)
+            for t in types for size in _binary_split(t.count)
+        ],
+        autoclave.vacuum_lines
+    )
+
+    # Footprint allargati disgiunti dentro (W + gap) x (H + gap)
+    capacity = (width + gap) * (height + gap)
+    footprint_bound = _fractional_knapsack(
+        [(int(t.area) * t.count, (t.width + gap) * (t.height + gap) * t.count) for t in types],
+        capacity
+    )
+
+    return int(min(width * height, vacuum_bound, footprint_bound))
+
+
+def batch_count_lower_bound(
+    items: List[Dict],
+    autoclave: Autoclave,
+    constraints: NestingConstraints
+) -> int:
+    """
+    Lower bound sul numero di batch per posizionare tutti gli item che entrano:
+    massimo tra L1 sull'area allargata, L1 sulle linee del vuoto e L2 di
+    Martello-Vigo. Con rotazione ammessa L2 usa il quadrato di lato minore di
+    ogni tool, che entra in qualunque orientazione del tool.
+    """
+    types = _fitting_types(items, autoclave, constraints)
+    if not types:
+        return 0
+
+    gap = constraints.min_tool_distance
+    width, height = _usable_size(autoclave, constraints)
+    bin_width, bin_height = width + gap, height + gap
+
+    # Footprint per tipo: (larghezza, altezza, molteplicità)
+    footprints = [(t.width + gap, t.height + gap, t.count) for t in types]
+    l1_area = _ceil(sum(w * h * n for w, h, n in footprints) / (bin_width * bin_height))
+
+    vacuum = sum(t.vacuum_lines * t.count for t in types)
+    l1_vacuum = _ceil(vacuum / autoclave.vacuum_lines) if autoclave.vacuum_lines > 0 else 0
+
+    if constraints.allow_rotation:
+        footprints = [
+            (min(t.width, t.height) + gap, min(t.width, t.height) + gap, t.count) for t in types
+        ]
+    l2 = _martello_vigo_l2(footprints, bin_width, bin_height)
+
+    return max(l1_area, l1_vacuum, l2)
+
+
+def optimality_gap(achieved: float, bound: float) -> float:
+    """Gap relativo dal bound: 0 = ottimo dimostrato"""
+    if bound <= 0:
+        return 0.0
+    return round(max(0.0, (bound - achieved) / bound), 4)
+
+
+def _usable_size(autoclave: Autoclave, constraints: NestingConstraints) -> Tuple[float, float]:
+    border = constraints.min_border_distance
+    return autoclave.width - 2 * border, autoclave.height - 2 * border
+
+
+def _fitting_types(items: List[Dict], autoclave: Autoclave, constraints: NestingConstraints) -> List[ItemType]:
+    """Tipi di item che entrano nell'area utile in almeno un'orientazione"""
+    width, height = _usable_size(autoclave, constraints)
+    return [
+        t for t in aggregate_items(items)
+        if t.fitting_orientations(width, height, constraints.allow_rotation)
+    ]
+
+
+def _binary_split(count: int) -> List[int]:
+    """Blocchi 1, 2, 4, ..., resto: ogni quantità 0..count è somma di un sottoinsieme"""
+    sizes = []
+    size = 1
+    while count > 0:
+        sizes.append(min(size, count))
+        count -= size
+        size *= 2
+    return sizes
+
+
+def _vacuum_knapsack(items: List[Tuple[int, int]], capacity: int) -> float:
+    """Massima area (valore) con linee del vuoto (peso) entro capacity"""
+    if sum(lines for _, lines in items) <= capacity:
+        return sum(area for area, _ in items)
+    if capacity > KNAPSACK_MAX_CAPACITY:
+        return _fractional_knapsack(items, capacity)
+
+    free = sum(area for area, lines in items if lines <= 0)
+    best = [0] * (capacity + 1)
+    for area, lines in items:
+        if lines <= 0 or lines > capacity:
+            continue
+        for c in range(capacity, lines - 1, -1):
+            candidate = best[c - lines] + area
+            if candidate > best[c]:
+                best[c] = candidate
+    return free + best[capacity]
+
+
+def _fractional_knapsack(items: List[Tuple[float, float]], capacity: float) -> float:
+    """Rilassamento continuo del knapsack: upper bound del valore massimo"""
+    bound = 0.0
+    for value, weight in sorted(items, key=lambda i: i[0] / max(i[1], 1e-9), reverse=True):
+        if weight <= capacity:
+            bound += value
+            capacity -= weight
+        else:
+            bound += value * max(capacity, 0) / weight
+            break
+    return bound
+
+
+def _martello_vigo_l2(dims: List[Tuple[float, float, int]], width: float, height: float) -> int:
+    """
+    Bound L2 per il bin packing 2D a orientazione fissa, su tipi
+    (larghezza, altezza, molteplicità). Per ogni (p, q):
+    I1 = item con w > W - p e h > H - q (nessun item di I3 entra nel loro bin),
+    I2 = altri item con w > W/2 e h > H/2 (due non stanno nello stesso bin),
+    I3 = item con p <= w <= W/2 e q <= h <= H/2;
+    L(p, q) = |I1| + |I2| + max(0, ceil(area(I2 ∪ I3) / WH - |I2|)).
+    """
+    half_w, half_h = width / 2, height / 2
+    ps = _candidates(sorted({0.0} | {w for w, _, _ in dims if w <= half_w}))
+    qs = _candidates(sorted({0.0} | {h for _, h, _ in dims if h <= half_h}))
+    bin_area = width * height
+
+    best = 0
+    for p in ps:
+        for q in qs:
+            large = 0
+            medium = 0
+            area = 0.0
+            for w, h, n in dims:
+                if w > width - p and h > height - q:
+                    large += n
+                elif w > half_w and h > half_h:
+                    medium += n
+                    area += w * h * n
+                elif p <= w <= half_w and q <= h <= half_h:
+                    area += w * h * n
+            best = max(best, large + medium + max(0, _ceil(area / bin_area - medium)))
+    return best
+
+
+def _candidates(values: List[float]) -> List[float]:
+    """Sottoinsieme equispaziato dei valori candidati (estremi inclusi)"""
+    if len(values) <= L2_MAX_CANDIDATES:
+        return values
+    step = (len(values) - 1) / (L2_MAX_CANDIDATES - 1)
+    return [values[round(i * step)] for i in range(L2_MAX_CANDIDATES)]
+
+
+def _ceil(value: float) -> int:
+    """ceil tollerante agli errori di arrotondamento in virgola mobile"""
+    return math.ceil(value - 1e-9)
@@ -0,0 +1,116 @@
+"""
+Grafo dei Conflitti tra Tool
+============================
+
+Pre-processing del modello CP-SAT: per ogni coppia di item stabilisce, con
+controlli vettoriali NumPy su tutte le orientazioni ammesse, quali relazioni
+di non-sovrapposizione sono geometricamente possibili nell'area utile.
+
+Due item possono stare affiancati (uno a sinistra dell'altro) solo se la somma
+delle larghezze minime più il gap entra nella larghezza utile, e impilati solo
+se lo stesso vale per le altezze. Le disgiunzioni impossibili non vengono
+create; le coppie che non ammettono né l'una né l'altra sono in conflitto e
+finiscono in vincoli AddAtMostOne su clique del grafo. Gli item che non entrano
+nemmeno da soli sono scartati prima di costruire il modello.
+
+Tutte le dimensioni sono nella griglia del modello (già arrotondate per eccesso).
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ConflictGraph:
+    """Relazioni possibili tra coppie di item (matrici simmetriche n x n)"""
+    fits: np.ndarray        # item che entrano da soli in almeno un'orientazione
+    horizontal: np.ndarray  # coppie che possono stare affiancate lungo x
+    vertical: np.ndarray    # coppie che possono stare impilate lungo y
+
+    @property
+    def conflicts(self) -> np.ndarray:
+        """Coppie di item distinti, entrambi posizionabili, che non possono coesistere"""
+        conflicts = ~(self.horizontal | self.vertical) & np.outer(self.fits, self.fits)
+        np.fill_diagonal(conflicts, False)
+        return conflicts
+
+    def expand(self, index: List[int]) -> 'ConflictGraph':
+        """Grafo sugli item a partire da quello sui tipi (index: tipo di ogni item)"""
+        index = np.asarray(index, dtype=np.int64)
+        pairs = np.ix_(index, index)
+        return ConflictGraph(
+            fits=self.fits[index],
+            horizontal=self.horizontal[pairs],
+            vertical=self.vertical[pairs]
+        )
+
+    def conflict_count(self) -> int:
+        return int(np.triu(self.conflicts, 1).sum())
+
+    def cliques(self) -> List[List[int]]:
+        """
+        Copertura greedy degli archi di conflitto con clique massimali:
+        ogni clique diventa un AddAtMostOne sulle variabili di selezione.
+        """
+        conflicts = self.conflicts
+        degree = conflicts.sum(axis=1)
+        uncovered = conflicts.copy()
+        cliques = []
+
+        for i in np.argsort(-degree, kind="stable"):
+            while uncovered[i].any():
+                # Parte dal vicino non coperto di grado massimo, poi estende la clique
+                neighbours = np.flatnonzero(uncovered[i])
+                j = neighbours[np.argmax(degree[neighbours])]
+                clique = [int(i), int(j)]
+                candidates = conflicts[i] & conflicts[j]
+                while candidates.any():
+                    options = np.flatnonzero(candidates)
+                    k = options[np.argmax(degree[options])]
+                    clique.append(int(k))
+                    candidates &= conflicts[k]
+
+                members = np.array(clique)
+                uncovered[np.ix_(members, members)] = False
+                cliques.append(sorted(clique))
+
+        return cliques
+
+
+def build_conflict_graph(
+    dims: List[Tuple[int, int]],
+    gap: int,
+    max_x: int,
+    max_y: int,
+    allow_rotation: bool
+) -> ConflictGraph:
+    """
+    Costruisce il grafo su tutte le orientazioni ammesse. La relazione lungo un
+    asse dipende solo dai lati di ciascun item su quell'asse, quindi basta il
+    lato minimo tra le orientazioni in cui l'item entra da solo.
+    """
+    sizes = np.array(dims, dtype=np.int64).reshape(-1, 2)
+    widths, heights = sizes[:, 0], sizes[:, 1]
+
+    # Orientazioni (n x k): normale ed eventualmente ruotata
+    if allow_rotation:
+        orient_w = np.stack([widths, heights], axis=1)
+        orient_h = np.stack([heights, widths], axis=1)
+    else:
+        orient_w = widths[:, None]
+        orient_h = heights[:, None]
+
+    valid = (orient_w <= max_x) & (orient_h <= max_y)
+    fits = valid.any(axis=1)
+
+    # Lato minimo per asse tra le orientazioni valide (infinito se nessuna)
+    unreachable = np.iinfo(np.int64).max // 4
+    min_w = np.where(valid, orient_w, unreachable).min(axis=1)
+    min_h = np.where(valid, orient_h, unreachable).min(axis=1)
+
+    horizontal = np.add.outer(min_w, min_w) + gap <= max_x
+    vertical = np.add.outer(min_h, min_h) + gap <= max_y
+
+    return ConflictGraph(fits=fits, horizontal=horizontal, vertical=vertical)
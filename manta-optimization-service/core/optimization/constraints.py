@@ -1,6 +1,25 @@
 from dataclasses import dataclass
 from typing import Optional
 
+# Formulazioni disponibili per il modello CP-SAT
+CPSAT_MODELS = ("pairwise", "no_overlap_2d")
+
+# Motori di nesting selezionabili: "auto" mette in gara i motori del portfolio
+ENGINES = ("cpsat", "skyline", "greedy", "guillotine", "shelf", "genetic", "lns", "auto")
+
+# Regole di scelta del rettangolo libero per il greedy MaxRects
+MAXRECTS_RULES = ("bssf", "baf", "bl")
+
+# Packer a ghigliottina: scelta del rettangolo libero e regola di taglio
+GUILLOTINE_CHOICES = ("baf", "bssf")
+GUILLOTINE_SPLITS = ("shorter_leftover_axis", "longer_leftover_axis", "min_area", "max_area")
+
+# Regole di scelta del ripiano per l'anteprima shelf packing
+SHELF_RULES = ("ffdh", "bfdh", "nfdh")
+
+# Assegnazione cicli -> autoclavi: modello CP-SAT globale o abbinamento per rango
+ASSIGNMENT_MODES = ("cpsat", "rank")
+
 @dataclass
 class NestingConstraints:
     """Vincoli per l'algoritmo di nesting"""
@@ -26,6 +45,113 @@ class NestingConstraints:
     timeout_seconds: int = 60  # Ridotto da 300 a 60s per test più rapidi
     solver_threads: int = 6    # Aumentato da 4 a 6 per migliori prestazioni
     
+    # Motore di nesting: "cpsat" (con warm start Skyline e fallback), "skyline",
+    # "greedy" (MaxRects), "guillotine", "shelf" (anteprima in millisecondi per
+    # UI e what-if), "genetic" (GA con decoder Skyline), "lns" (intorni del layout
+    # riottimizzati con piccoli modelli CP-SAT) o "auto" (portfolio: CP-SAT e le
+    # euristiche principali in gara in processi separati sotto un'unica deadline,
+    # vince il layout migliore)
+    engine: str = "cpsat"
+    
+    # Skyline multi-start (GRASP): restart randomizzati (<= 1 = passaggio singolo),
+    # processi (0 = core disponibili) e seed condiviso dai motori randomizzati
+    multistart_runs: int = 1
+    multistart_workers: int = 0
+    random_seed: int = 42
+    
+    # Algoritmo genetico su ordine e rotazioni (decoder Skyline): dimensione della
+    # popolazione, generazioni massime, budget (s), probabilità di mutazione,
+    # individui élite e processi per la fitness (0 = core disponibili)
+    genetic_population: int = 40
+    genetic_generations: int = 100
+    genetic_time_budget: float = 10.0
+    genetic_mutation_rate: float = 0.3
+    genetic_elite: int = 2
+    genetic_workers: int = 0
+    
+    # Large Neighborhood Search: tool liberati per iterazione, time slice (s) di
+    # ogni sotto-modello CP-SAT e numero di item da cui il motore cpsat passa
+    # dal modello completo all'LNS (0 = mai)
+    lns_neighborhood_size: int = 4
+    lns_slice_seconds: float = 0.1
+    lns_min_items: int = 80
+    
+    # Modello CP-SAT: "pairwise" (disgiunzioni a coppie) o "no_overlap_2d" (intervalli opzionali)
+    cpsat_model: str = "pairwise"
+    
+    # Rompe le simmetrie tra tool geometricamente identici nel modello CP-SAT
+    symmetry_breaking: bool = True
+    
+    # Grafo dei conflitti prima del modello CP-SAT: scarta i tool che non entrano,
+    # omette le disgiunzioni impossibili e vincola le coppie incompatibili con AtMostOne
+    conflict_pruning: bool = True
+    
+    # Avvia CP-SAT dalla soluzione euristica Skyline (hint + lower bound sull'obiettivo)
+    warm_start: bool = True
+    
+    # Budget adattivo: tempo e worker scalati sull'istanza, stop anticipato su
+    # upper bound raggiunto o obiettivo fermo da stall_seconds
+    adaptive_budget: bool = True
+    stall_seconds: float = 5.0
+    
+    # Risoluzione griglia CP-SAT (mm): >1 riduce i domini di x/y arrotondando per
+    # eccesso tool e gap; grid_refinement ripassa a 1 mm partendo dalla soluzione
+    grid_resolution: int = 1
+    grid_refinement: bool = True
+    
+    # Greedy MaxRects: "bssf" (best short side fit), "baf" (best area fit), "bl" (bottom-left)
+    maxrects_rule: str = "bssf"
+    
+    # Packer a ghigliottina: "baf"/"bssf" per la scelta del rettangolo libero,
+    # regola di taglio sull'asse/area dei ritagli
+    guillotine_choice: str = "baf"
+    guillotine_split: str = "shorter_leftover_axis"
+    
+    # Anteprima shelf packing: first/best/next fit decreasing height
+    shelf_rule: str = "ffdh"
+    
+    # Crescita incrementale dei batch: gli ODL vengono inseriti nello spazio libero
+    # del layout corrente e il solve completo avviene solo alla chiusura del batch
+    incremental_batches: bool = True
+    
+    # Modello CP-SAT congiunto sui batch di un ciclo: riparte dai batch sequenziali
+    # e li reimpacca in un solo solve (NoOverlap2D per bin, ODL interi), per usare
+    # meno batch e riempire di più i primi. Oltre multi_bin_max_pairs coppie
+    # item x bin il modello è troppo grande e resta il packing sequenziale
+    multi_bin: bool = False
+    multi_bin_max_pairs: int = 240
+    
+    # Rifinitura (polish) dopo la creazione dei batch: local search move/swap/
+    # ejection chain tra i batch dello stesso ciclo, anche su autoclavi diverse,
+    # sotto un budget rigido (s)
+    polish: bool = False
+    polish_time_budget: float = 5.0
+    
+    # Right-sizing dopo il packing: ogni batch passa all'autoclave più piccola in
+    # cui entra (bound, poi re-pack veloce) se il makespan non aumenta
+    right_size: bool = False
+    
+    # Cache dei layout per impronta canonica dell'istanza (geometrie, linee del
+    # vuoto, rialzati, autoclave e vincoli): LRU in memoria di layout_cache_size
+    # voci e, se layout_cache_path è impostato, livello su SQLite tra richieste
+    layout_cache: bool = False
+    layout_cache_size: int = 512
+    layout_cache_path: Optional[str] = None
+    
+    # Assegnazione automatica dei cicli alle autoclavi: "cpsat" sceglie per ogni
+    # ciclo una o due autoclavi su cure contate con la Skyline, minimizzando tool
+    # senza posto, makespan e cure totali senza peggiorare "rank" (abbinamento
+    # per dimensione) su nessuna delle tre
+    assignment_mode: str = "cpsat"
+    
+    # Processi per l'ottimizzazione parallela dei cicli di cura (0 = automatico:
+    # un processo per ciclo fino ai core disponibili, con solver_threads ridotti
+    # a core / processi per non sovraccaricare la CPU)
+    cycle_workers: int = 0
+    
+    # Deadline globale condivisa da tutte le chiamate al solver di una richiesta
+    request_timeout_seconds: int = 300
+    
     def validate(self) -> bool:
         """Valida i vincoli"""
         return all([
@@ -34,5 +160,29 @@ class NestingConstraints:
             self.rotation_step in [90, 180],
             0 <= self.max_elevated_percentage <= 1,
             self.timeout_seconds > 0,
-            self.solver_threads > 0
-        ])
\ No newline at end of file
+            self.solver_threads > 0,
+            self.stall_seconds > 0,
+            self.grid_resolution >= 1,
+            self.cycle_workers >= 0,
+            self.multistart_workers >= 0,
+            self.genetic_population >= 2,
+            self.genetic_generations >= 0,
+            self.genetic_time_budget > 0,
+            0 <= self.genetic_mutation_rate <= 1,
+            0 <= self.genetic_elite < self.genetic_population,
+            self.genetic_workers >= 0,
+            self.lns_neighborhood_size >= 1,
+            self.lns_slice_seconds > 0,
+            self.lns_min_items >= 0,
+            self.multi_bin_max_pairs >= 0,
+            self.polish_time_budget > 0,
+            self.layout_cache_size >= 1,
+            self.request_timeout_seconds > 0,
+            self.engine in ENGINES,
+            self.cpsat_model in CPSAT_MODELS,
+            self.maxrects_rule in MAXRECTS_RULES,
+            self.guillotine_choice in GUILLOTINE_CHOICES,
+            self.guillotine_split in GUILLOTINE_SPLITS,
+            self.shelf_rule in SHELF_RULES,
+            self.assignment_mode in ASSIGNMENT_MODES
+        ])
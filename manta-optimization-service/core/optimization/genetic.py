@@ -0,0 +1,295 @@
+"""
+Ottimizzatore Genetico di Sequenza e Rotazione
+==============================================
+
+Evolve cromosomi (ordine degli item, bit di rotazione per item) e decodifica
+ciascuno con la Skyline di rectangle_packer: la geometria resta tutta nel
+packer, il GA cerca solo l'ordine di inserimento e le orientazioni.
+Crossover OX sull'ordine e uniforme sulle rotazioni, mutazione swap/rotate,
+selezione a torneo ed elitismo. La fitness di ogni generazione è valutata a
+blocchi su un pool di processi, sotto un budget di tempo.
+
+Il pool è condiviso dal processo (uno per numero di worker) e sopravvive alle
+chiamate: il ciclo dei batch risolve un batch alla volta e ricreare i processi
+a ogni solve costerebbe più della fitness. L'istanza (vincoli, item, autoclave)
+è serializzata una volta per solve e ogni worker ricostruisce il decoder solo
+quando cambia.
+"""
+
+import math
+import uuid
+import pickle
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Tuple
+
+from domain.entities import Autoclave, BatchLayout
+from core.optimization.constraints import NestingConstraints
+from core.optimization.rectangle_packer import RectanglePacker
+from core.optimization.parallel import process_context, worker_count
+from core.optimization.bounds import max_batch_area
+
+# Cromosoma: ordine degli item (indici) e bit di rotazione indicizzati per item
+Chromosome = Tuple[Tuple[int, ...], Tuple[bool, ...]]
+
+# Fitness: area posizionata, poi altezza occupata minore (layout più compatto)
+Fitness = Tuple[float, float]
+
+# Partecipanti a ogni torneo di selezione
+TOURNAMENT_SIZE = 3
+
+# Rumore moltiplicativo sull'area per gli ordinamenti della popolazione iniziale
+INITIAL_NOISE = 0.3
+
+# Cromosomi minimi per processo: sotto questa soglia il pool costa più della valutazione
+GENETIC_MIN_CHROMOSOMES_PER_WORKER = 8
+
+# Decoder del processo worker per l'ultima istanza vista: (chiave, decoder)
+_worker_decoder: Optional[Tuple[str, 'SkylineDecoder']] = None
+
+# Pool condivisi dal processo, uno per numero di worker
+_shared_pools: Dict[int, ProcessPoolExecutor] = {}
+_shared_lock = threading.Lock()
+
+
+def _evaluate_worker(key: str, instance: bytes, chromosomes: List[Chromosome]) -> List[Fitness]:
+    """
+    Entry point dei processi del GA: fitness di un blocco di cromosomi.
+    Il decoder è ricostruito da instance solo quando cambia la chiave del solve.
+    """
+    global _worker_decoder
+    if _worker_decoder is None or _worker_decoder[0] != key:
+        _worker_decoder = (key, SkylineDecoder(*pickle.loads(instance)))
+    decoder = _worker_decoder[1]
+    return [decoder.fitness(chromosome) for chromosome in chromosomes]
+
+
+def shared_genetic_pool(workers: int) -> Tuple[ProcessPoolExecutor, bool]:
+    """Pool del processo con workers processi e se è stato appena creato"""
+    with _shared_lock:
+        pool = _shared_pools.get(workers)
+        if pool is not None:
+            return pool, False
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+        _shared_pools[workers] = pool
+        return pool, True
+
+
+def _discard_genetic_pool(workers: int, pool: ProcessPoolExecutor):
+    """Scarta un pool rotto: la prossima chiamata ne crea uno nuovo"""
+    with _shared_lock:
+        if _shared_pools.get(workers) is pool:
+            del _shared_pools[workers]
+    pool.shutdown(wait=False)
+
+
+class SkylineDecoder:
+    """Trasforma un cromosoma in layout con la Skyline del RectanglePacker"""
+
+    def __init__(self, constraints: NestingConstraints, items: List[Dict], autoclave: Autoclave):
+        self.packer = RectanglePacker(constraints)
+        self.items = items
+        self.autoclave = autoclave
+
+        # Orientazioni per item: [normale] o [normale, ruotato]
+        self.orientations = [self.packer.orientations(item) for item in items]
+
+    def decode(self, chromosome: Chromosome) -> Optional[BatchLayout]:
+        """Packa gli item nell'ordine del cromosoma, ciascuno nell'orientazione del suo bit"""
+        order, rotations = chromosome
+        sequence = []
+        for index in order:
+            options = self.orientations[index]
+            rect = options[1] if rotations[index] and len(options) > 1 else options[0]
+            sequence.append((self.items[index], [rect]))
+        return self.packer.pack_sequence(sequence, self.autoclave)
+
+    def fitness(self, chromosome: Chromosome) -> Fitness:
+        return self.evaluate(self.decode(chromosome))
+
+    @staticmethod
+    def evaluate(layout: Optional[BatchLayout]) -> Fitness:
+        if not layout:
+            return (0.0, 0.0)
+        area = sum(p.width * p.height for p in layout.placements)
+        top = max(p.y + p.height for p in layout.placements)
+        return (area, -top)
+
+
+class GeneticSolver:
+    """
+    Algoritmo genetico con la Skyline come decoder.
+    L'individuo 0 riproduce il passaggio Skyline per area decrescente e
+    l'elitismo lo conserva: il risultato non è mai peggiore di pack_items.
+    """
+
+    def __init__(self, constraints: NestingConstraints, deadline: Optional[float] = None):
+        self.constraints = constraints
+        self.deadline = deadline
+        self.last_run: Dict = {}
+
+    def solve(self, items: List[Dict], autoclave: Autoclave) -> Optional[BatchLayout]:
+        """Evolve la popolazione fino a generazioni esaurite, budget o deadline"""
+        if not items:
+            return None
+
+        started = time.time()
+        budget = self.constraints.genetic_time_budget
+        if self.deadline is not None:
+            budget = min(budget, self.deadline - started)
+
+        rng = random.Random(self.constraints.random_seed)
+        decoder = SkylineDecoder(self.constraints, items, autoclave)
+        size = self.constraints.genetic_population
+        elite_count = self.constraints.genetic_elite
+
+        population = self._initial_population(decoder, size, rng)
+        workers = worker_count(
+            self.constraints.genetic_workers, size // GENETIC_MIN_CHROMOSOMES_PER_WORKER
+        )
+        pool, pool_started = None, False
+        if workers > 1:
+            pool, pool_started = shared_genetic_pool(workers)
+        # Istanza serializzata una volta per solve, chiave unica per i decoder dei worker
+        instance = (uuid.uuid4().hex, pickle.dumps((self.constraints, items, autoclave)))
+
+        # Fitness all'upper bound: ottimo dimostrato, inutile evolvere oltre
+        upper_bound = max_batch_area(items, autoclave, self.constraints)
+
+        generations = 0
+        fitness = self._evaluate(population, decoder, pool, workers, instance)
+        evaluations = len(population)
+
+        while generations < self.constraints.genetic_generations and time.time() - started < budget:
+            if max(fitness)[0] >= upper_bound:
+                break
+            ranked = sorted(range(size), key=lambda i: (fitness[i], -i), reverse=True)
+            elite = [population[i] for i in ranked[:elite_count]]
+            elite_fitness = [fitness[i] for i in ranked[:elite_count]]
+
+            offspring = []
+            while len(offspring) < size - elite_count:
+                first = self._tournament(population, fitness, rng)
+                second = self._tournament(population, fitness, rng)
+                offspring.append(self._mutate(self._crossover(first, second, rng), rng))
+
+            population = elite + offspring
+            fitness = elite_fitness + self._evaluate(offspring, decoder, pool, workers, instance)
+            evaluations += len(offspring)
+            generations += 1
+
+        # Miglior fitness; a parità l'individuo con indice minore (élite per prime)
+        best = max(range(size), key=lambda i: (fitness[i], -i))
+        self.last_run = {
+            'generations': generations,
+            'evaluations': evaluations,
+            'workers': workers,
+            'pool_started': pool_started,
+            'time': round(time.time() - started, 3)
+        }
+        return decoder.decode(population[best])
+
+    def _initial_population(
+        self,
+        decoder: SkylineDecoder,
+        size: int,
+        rng: random.Random
+    ) -> List[Chromosome]:
+        """
+        Individuo 0 dal passaggio Skyline deterministico (ordine per area e
+        orientazioni scelte dal packer), gli altri da ordinamenti per area
+        perturbati con rotazioni casuali.
+        """
+        items = decoder.items
+        by_area = sorted(range(len(items)), key=lambda i: items[i]['tool'].area, reverse=True)
+
+        # Le rotazioni del layout di riferimento rendono il decoding identico a pack_items
+        baseline = decoder.packer.pack_items(items, decoder.autoclave)
+        rotated = {
+            (p.odl_id, p.tool_id) for p in (baseline.placements if baseline else []) if p.rotated
+        }
+        seed_rotations = tuple((item['odl_id'], item['tool_id']) in rotated for item in items)
+        population = [(tuple(by_area), seed_rotations)]
+
+        while len(population) < size:
+            keyed = sorted(
+                range(len(items)),
+                key=lambda i: items[i]['tool'].area * rng.uniform(1 - INITIAL_NOISE, 1 + INITIAL_NOISE),
+                reverse=True
+            )
+            rotations = tuple(rng.random() < 0.5 for _ in items)
+            population.append((tuple(keyed), rotations))
+
+        return population
+
+    def _evaluate(
+        self,
+        chromosomes: List[Chromosome],
+        decoder: SkylineDecoder,
+        pool: Optional[ProcessPoolExecutor],
+        workers: int,
+        instance: Tuple[str, bytes]
+    ) -> List[Fitness]:
+        """
+        Fitness a blocchi contigui sul pool; nel processo chiamante senza pool o
+        se il pool si è rotto (scartato, il prossimo solve ne crea uno nuovo).
+        """
+        if pool is not None:
+            chunk = math.ceil(len(chromosomes) / workers)
+            blocks = [chromosomes[i:i + chunk] for i in range(0, len(chromosomes), chunk)]
+            key, payload = instance
+            try:
+                results = pool.map(_evaluate_worker, [key] * len(blocks), [payload] * len(blocks), blocks)
+                return [fitness for block in results for fitness in block]
+            except BrokenProcessPool:
+                _discard_genetic_pool(workers, pool)
+        return [decoder.fitness(chromosome) for chromosome in chromosomes]
+
+    def _tournament(
+        self,
+        population: List[Chromosome],
+        fitness: List[Fitness],
+        rng: random.Random
+    ) -> Chromosome:
+        """Selezione a torneo: il migliore di TOURNAMENT_SIZE individui a caso"""
+        contenders = [rng.randrange(len(population)) for _ in range(TOURNAMENT_SIZE)]
+        return population[max(contenders, key=lambda i: fitness[i])]
+
+    def _crossover(self, first: Chromosome, second: Chromosome, rng: random.Random) -> Chromosome:
+        """Order crossover (OX) sull'ordine, crossover uniforme sui bit di rotazione"""
+        order_a, rotations_a = first
+        order_b, rotations_b = second
+        length = len(order_a)
+
+        start, stop = sorted(rng.sample(range(length + 1), 2)) if length > 1 else (0, length)
+        segment = order_a[start:stop]
+        taken = set(segment)
+        rest = [index for index in order_b if index not in taken]
+        order = tuple(rest[:start]) + segment + tuple(rest[start:])
+
+        rotations = tuple(
+            a if rng.random() < 0.5 else b for a, b in zip(rotations_a, rotations_b)
+        )
+        return order, rotations
+
+    def _mutate(self, chromosome: Chromosome, rng: random.Random) -> Chromosome:
+        """Mutazione swap (due posizioni dell'ordine) e rotate (un bit di rotazione)"""
+        order, rotations = chromosome
+        rate = self.constraints.genetic_mutation_rate
+
+        if len(order) > 1 and rng.random() < rate:
+            order = list(order)
+            i, j = rng.sample(range(len(order)), 2)
+            order[i], order[j] = order[j], order[i]
+            order = tuple(order)
+
+        if rotations and rng.random() < rate:
+            rotations = list(rotations)
+            index = rng.randrange(len(rotations))
+            rotations[index] = not rotations[index]
+            rotations = tuple(rotations)
+
+        return order, rotations
@@ -0,0 +1,82 @@
+"""
+Aggregazione degli Item per Tipo
+================================
+
+I backlog contengono spesso decine di tool con le stesse dimensioni su ODL
+diversi. Questo modulo li raggruppa in tipi (larghezza, altezza, linee vuoto)
+con la loro molteplicità, così i calcoli che non dipendono dal singolo tool
+(orientazioni ammesse, ingresso nell'area utile, bound, grafo dei conflitti)
+si fanno una volta per tipo. Ogni tipo conserva gli indici dei propri item:
+i risultati calcolati sui tipi si riportano sui singoli odl_id/tool_id.
+
+I tipi alimentano solo i precalcoli, il bound sulle linee del vuoto
+(knapsack limitato sulle molteplicità) e il symmetry breaking tra item
+identici. Il modello CP-SAT e il posizionamento restano per tool fisico: ogni
+copia ha bisogno delle proprie coordinate, quindi una variabile di conteggio
+per tipo non toglierebbe variabili al modello geometrico.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+# Chiave di un tipo: (larghezza, altezza, linee vuoto)
+TypeKey = Tuple[float, float, int]
+
+# Orientazione di un tipo: (larghezza, altezza, ruotato)
+Orientation = Tuple[float, float, bool]
+
+
+@dataclass
+class ItemType:
+    """Tool geometricamente intercambiabili e indici dei relativi item"""
+    width: float
+    height: float
+    vacuum_lines: int
+    indices: List[int] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.indices)
+
+    @property
+    def area(self) -> float:
+        return self.width * self.height
+
+    def orientations(self, allow_rotation: bool) -> List[Orientation]:
+        """Normale e, se permessa e diversa, ruotata"""
+        options = [(self.width, self.height, False)]
+        if allow_rotation and self.width != self.height:
+            options.append((self.height, self.width, True))
+        return options
+
+    def fitting_orientations(self, width: float, height: float, allow_rotation: bool) -> List[Orientation]:
+        """Orientazioni che entrano da sole in un'area width x height"""
+        return [
+            (w, h, rotated) for w, h, rotated in self.orientations(allow_rotation)
+            if w <= width and h <= height
+        ]
+
+
+def type_key(item: Dict) -> TypeKey:
+    tool = item['tool']
+    return tool.width, tool.height, item['vacuum_lines']
+
+
+def aggregate_items(items: List[Dict]) -> List[ItemType]:
+    """Tipi nell'ordine di prima comparsa, indici degli item in ordine di input"""
+    types: Dict[TypeKey, ItemType] = {}
+    for index, item in enumerate(items):
+        key = type_key(item)
+        if key not in types:
+            types[key] = ItemType(width=key[0], height=key[1], vacuum_lines=key[2])
+        types[key].indices.append(index)
+    return list(types.values())
+
+
+def type_of_items(types: List[ItemType], item_count: int) -> List[int]:
+    """Per ogni item l'indice del suo tipo"""
+    index = [0] * item_count
+    for t, item_type in enumerate(types):
+        for i in item_type.indices:
+            index[i] = t
+    return index
@@ -0,0 +1,209 @@
+"""
+Cache dei Layout per Insieme di ODL
+===================================
+
+La crescita dei batch e i re-solve chiamano optimize_single_autoclave più
+volte sugli stessi sottoinsiemi di ODL, e i pianificatori rilanciano backlog
+quasi identici più volte al giorno. La cache mette davanti al NestingEngine un
+memo dei layout indicizzato da un'impronta canonica dell'istanza:
+
+- ODL ordinati per firma (linee del vuoto, tool ordinati per larghezza,
+  altezza e flag rialzato): gli ID non contano e due ODL con la stessa firma
+  sono intercambiabili;
+- dimensioni, linee del vuoto e peso massimo dell'autoclave;
+- i NestingConstraints, tranne quelli che non influiscono sul layout di un
+  singolo batch (LAYOUT_CACHE_IGNORED_FIELDS).
+
+Il layout è salvato per posizione canonica (ODL, tool) e rimappato sugli ID
+della richiesta che lo legge; il peso totale è ricalcolato dai suoi tool.
+Primo livello LRU in memoria (per processo), secondo livello opzionale su
+SQLite, condiviso tra processi worker e richieste.
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+import dataclasses
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+from domain.entities import ODL, Autoclave, BatchLayout, Placement, Tool
+from core.optimization.constraints import NestingConstraints
+
+# Vincoli che non cambiano il layout di un singolo batch: fuori dall'impronta
+LAYOUT_CACHE_IGNORED_FIELDS = (
+    "layout_cache", "layout_cache_size", "layout_cache_path",
+    "multi_bin", "multi_bin_max_pairs", "polish", "polish_time_budget",
+    "assignment_mode", "cycle_workers", "incremental_batches", "request_timeout_seconds",
+    "solver_threads"  # i worker dei cicli paralleli ne usano meno: stessa istanza, stessa chiave
+)
+
+
+@dataclass
+class LayoutFingerprint:
+    """Chiave canonica di un'istanza e corrispondenza posizione canonica -> item della richiesta"""
+    key: str
+    slots: List[List[Tuple[str, Tool]]]  # per ODL canonico: (odl_id, tool) nell'ordine della firma
+
+    def encode(self, layout: BatchLayout, engine_name: str) -> Optional[Dict]:
+        """
+        Layout in forma canonica: ogni posizionamento riferito a (indice ODL,
+        indice tool). None se il layout contiene tool estranei all'istanza.
+        """
+        index = {
+            (odl_id, tool.id): (i, j)
+            for i, slot in enumerate(self.slots)
+            for j, (odl_id, tool) in enumerate(slot)
+        }
+        if any((p.odl_id, p.tool_id) not in index for p in layout.placements):
+            return None
+        return {
+            'engine': engine_name,
+            'vacuum_lines_used': layout.vacuum_lines_used,
+            'placements': [
+                [*index[p.odl_id, p.tool_id], p.x, p.y, p.width, p.height, p.rotated, p.level]
+                for p in layout.placements
+            ]
+        }
+
+    def decode(self, payload: Dict, autoclave: Autoclave) -> BatchLayout:
+        """Layout canonico sugli ID della richiesta corrente"""
+        placements = []
+        total_weight = 0.0
+        for i, j, x, y, width, height, rotated, level in payload['placements']:
+            odl_id, tool = self.slots[i][j]
+            placements.append(Placement(
+                odl_id=odl_id,
+                tool_id=tool.id,
+                x=x,
+                y=y,
+                width=width,
+                height=height,
+                rotated=rotated,
+                level=level
+            ))
+            total_weight += tool.weight
+
+        return BatchLayout(
+            autoclave_id=autoclave.id,
+            placements=placements,
+            efficiency=round(sum(p.width * p.height for p in placements) / autoclave.area, 3),
+            total_weight=round(total_weight, 2),
+            vacuum_lines_used=payload['vacuum_lines_used']
+        )
+
+
+def layout_fingerprint(
+    odls: List[ODL],
+    autoclave: Autoclave,
+    constraints: NestingConstraints,
+    elevated_tools: Optional[Dict[str, List[str]]] = None
+) -> LayoutFingerprint:
+    """Impronta canonica (SHA-256) di ODL, autoclave e vincoli rilevanti"""
+    elevated_tools = elevated_tools or {}
+
+    def tool_signature(odl: ODL, tool: Tool) -> Tuple:
+        return (tool.width, tool.height, tool.id in elevated_tools.get(odl.id, []))
+
+    signed = []
+    for odl in odls:
+        tools = sorted(odl.tools, key=lambda tool: tool_signature(odl, tool))
+        signature = (odl.vacuum_lines, tuple(tool_signature(odl, tool) for tool in tools))
+        signed.append((signature, odl.id, tools))
+    signed.sort(key=lambda entry: entry[0])
+
+    relevant = {
+        name: value for name, value in dataclasses.asdict(constraints).items()
+        if name not in LAYOUT_CACHE_IGNORED_FIELDS
+    }
+    canonical = {
+        'odls': [signature for signature, _, _ in signed],
+        'autoclave': [autoclave.width, autoclave.height, autoclave.vacuum_lines, autoclave.max_weight],
+        'constraints': relevant
+    }
+    key = hashlib.sha256(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()
+
+    return LayoutFingerprint(
+        key=key,
+        slots=[[(odl_id, tool) for tool in tools] for _, odl_id, tools in signed]
+    )
+
+
+class LayoutCache:
+    """
+    LRU in memoria con livello opzionale su SQLite. I valori sono layout in
+    forma canonica (LayoutFingerprint.encode), serializzabili in JSON.
+    """
+
+    def __init__(self, max_entries: int = 512, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self._query("CREATE TABLE IF NOT EXISTS layouts (key TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+
+    def get(self, key: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Restituisce (layout canonico, livello "memory"/"disk") o (None, None)"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                return payload, "memory"
+
+        if not self.path:
+            return None, None
+        row = self._query("SELECT payload FROM layouts WHERE key = ?", (key,))
+        if row is None:
+            return None, None
+
+        payload = json.loads(row[0])
+        self._remember(key, payload)
+        return payload, "disk"
+
+    def put(self, key: str, payload: Dict):
+        self._remember(key, payload)
+        if self.path:
+            self._query("INSERT OR REPLACE INTO layouts (key, payload) VALUES (?, ?)", (key, json.dumps(payload)))
+
+    def clear(self):
+        """Svuota il livello in memoria (il file SQLite resta)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, payload: Dict):
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _query(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        """Una connessione per operazione: il file è condiviso tra thread e processi"""
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with connection:
+                return connection.execute(sql, params).fetchone()
+        finally:
+            connection.close()
+
+
+# Cache condivise dal processo, una per file SQLite (None = solo memoria)
+_shared_caches: Dict[Optional[str], LayoutCache] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_layout_cache(constraints: NestingConstraints) -> LayoutCache:
+    """Cache del processo per constraints.layout_cache_path, dimensionata su layout_cache_size"""
+    with _shared_lock:
+        cache = _shared_caches.get(constraints.layout_cache_path)
+        if cache is None:
+            cache = LayoutCache(constraints.layout_cache_size, constraints.layout_cache_path)
+            _shared_caches[constraints.layout_cache_path] = cache
+        cache.max_entries = constraints.layout_cache_size
+        return cache
@@ -0,0 +1,384 @@
+"""
+Large Neighborhood Search su Layout Esistente
+=============================================
+
+Per batch grandi il modello CP-SAT completo non converge nel budget. L'LNS
+parte da un layout euristico e, finché c'è tempo, libera un intorno (una
+finestra spaziale, i tool di un ODL o la zona con più spreco), fissa tutti gli
+altri posizionamenti come costanti e riottimizza solo gli item liberati con
+un piccolo modello CP-SAT sotto un time slice breve. Si accettano le soluzioni
+che non peggiorano l'area posizionata: il layout migliora in modo monotono ed
+è disponibile in ogni istante (anytime). Ogni sotto-modello cerca solo nella
+finestra occupata dai tool liberati, dove lo spazio recuperabile è noto.
+"""
+
+import math
+import random
+import time
+from typing import List, Dict, Optional, Set, Tuple, TYPE_CHECKING
+
+from ortools.sat.python import cp_model
+
+from domain.entities import Autoclave, BatchLayout, Placement
+from core.optimization.rectangle_packer import RectanglePacker
+
+if TYPE_CHECKING:
+    from core.optimization.nesting_engine import NestingEngine
+
+# Intorni disponibili, usati a rotazione
+LNS_NEIGHBORHOODS = ("window", "odl", "waste")
+
+# Celle per lato della griglia su cui si misura lo spreco dell'intorno "waste"
+WASTE_GRID = 4
+
+# Chiave di un item: (odl_id, tool_id)
+ItemKey = Tuple[str, str]
+
+
+class LNSSolver:
+    """
+    LNS con sotto-problemi CP-SAT per un singolo autoclave.
+    Usa budget, upper bound e metriche del NestingEngine chiamante.
+    """
+
+    def __init__(self, engine: 'NestingEngine'):
+        self.engine = engine
+        self.constraints = engine.constraints
+
+    def solve(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        hint: Optional[BatchLayout] = None
+    ) -> Optional[BatchLayout]:
+        """Migliora hint (o il layout Skyline) fino a budget, stallo o upper bound"""
+        if not items:
+            return None
+
+        started = time.time()
+        border = self.constraints.min_border_distance
+        max_x = int(autoclave.width - 2 * border)
+        max_y = int(autoclave.height - 2 * border)
+
+        time_limit, workers = self.engine._solver_budget(items, max_x, max_y)
+        upper_bound = self.engine._area_upper_bound(items, autoclave, max_x, max_y)
+        deadline = started + max(time_limit, 0.0)
+
+        layout = hint or RectanglePacker(self.constraints).pack_best(items, autoclave)
+        by_key = {(item['odl_id'], item['tool_id']): item for item in items}
+        placed: Dict[ItemKey, Placement] = {
+            (p.odl_id, p.tool_id): p for p in (layout.placements if layout else [])
+            if (p.odl_id, p.tool_id) in by_key
+        }
+
+        rng = random.Random(self.constraints.random_seed)
+        area = self._area(placed, by_key)
+        trajectory = [{'time': 0.0, 'area': area, 'neighborhood': 'start'}]
+        neighborhoods = {name: {'tried': 0, 'improved': 0} for name in LNS_NEIGHBORHOODS}
+        iterations = 0
+        last_improvement = started
+        stop_reason = 'time_limit'
+
+        while True:
+            now = time.time()
+            if area >= upper_bound:
+                stop_reason = 'upper_bound'
+                break
+            if now >= deadline:
+                if self.engine.deadline is not None and now >= self.engine.deadline:
+                    stop_reason = 'deadline'
+                break
+            if self.constraints.adaptive_budget and now - last_improvement >= self.constraints.stall_seconds:
+                stop_reason = 'stalled'
+                break
+
+            name = LNS_NEIGHBORHOODS[iterations % len(LNS_NEIGHBORHOODS)]
+            freed = self._neighborhood(name, items, placed, max_x, max_y, rng)
+            iterations += 1
+            neighborhoods[name]['tried'] += 1
+            if not freed:
+                continue
+
+            slice_seconds = min(self.constraints.lns_slice_seconds, deadline - time.time())
+            vacuum_left = autoclave.vacuum_lines - sum(
+                by_key[key]['vacuum_lines'] for key in placed if key not in freed
+            )
+            result = self._solve_neighborhood(
+                [by_key[key] for key in sorted(freed)], placed, vacuum_left, max_x, max_y,
+                slice_seconds, workers
+            )
+            if result is None:
+                continue
+
+            candidate = {key: p for key, p in placed.items() if key not in freed}
+            candidate.update(result)
+            candidate_area = self._area(candidate, by_key)
+            if candidate_area < area:
+                continue
+
+            # Parità accettata: sposta il layout e diversifica gli intorni successivi
+            placed = candidate
+            if candidate_area > area:
+                area = candidate_area
+                last_improvement = time.time()
+                neighborhoods[name]['improved'] += 1
+                trajectory.append({
+                    'time': round(last_improvement - started, 3),
+                    'area': area,
+                    'neighborhood': name
+                })
+
+        elapsed = time.time() - started
+        self.engine._record_solve({
+            'cpsat_model': 'lns',
+            'grid_resolution': 1,
+            'items': len(items),
+            'build_time': 0.0,
+            'solve_time': round(elapsed, 4),
+            'time_limit': round(time_limit, 2),
+            'workers': workers,
+            'status': 'FEASIBLE' if placed else 'UNKNOWN',
+            'stop_reason': stop_reason,
+            'upper_bound': upper_bound,
+            'warm_start_efficiency': layout.efficiency if layout else None,
+            'warm_start_bound': layout is not None
+        })
+        self.engine.record_lns({
+            'iterations': iterations,
+            'improvements': len(trajectory) - 1,
+            'neighborhoods': neighborhoods,
+            'trajectory': trajectory,
+            'stop_reason': stop_reason,
+            'time': round(elapsed, 3)
+        })
+
+        return self._build_layout(placed, by_key, autoclave)
+
+    def _neighborhood(
+        self,
+        name: str,
+        items: List[Dict],
+        placed: Dict[ItemKey, Placement],
+        max_x: int,
+        max_y: int,
+        rng: random.Random
+    ) -> Set[ItemKey]:
+        """
+        Item da liberare: i posizionati più vicini al centro dell'intorno (più gli
+        eventuali item imposti, es. i tool dell'ODL scelto) e, fino alla stessa
+        dimensione, item non posizionati candidati all'inserimento.
+        """
+        size = self.constraints.lns_neighborhood_size
+        border = self.constraints.min_border_distance
+        by_area = {(item['odl_id'], item['tool_id']): item['tool'].area for item in items}
+        forced: List[ItemKey] = []
+
+        if name == "odl":
+            odl_id = rng.choice(sorted({item['odl_id'] for item in items}))
+            forced = [
+                (item['odl_id'], item['tool_id']) for item in items if item['odl_id'] == odl_id
+            ]
+            mine = [placed[key] for key in forced if key in placed]
+            if mine:
+                center = (
+                    sum(p.x - border + p.width / 2 for p in mine) / len(mine),
+                    sum(p.y - border + p.height / 2 for p in mine) / len(mine)
+                )
+            else:
+                center = (rng.uniform(0, max_x), rng.uniform(0, max_y))
+        elif name == "waste":
+            center = self._most_wasted_cell(placed, max_x, max_y, rng)
+        else:
+            center = (rng.uniform(0, max_x), rng.uniform(0, max_y))
+
+        def distance(key: ItemKey) -> float:
+            p = placed[key]
+            return math.hypot(p.x - border + p.width / 2 - center[0], p.y - border + p.height / 2 - center[1])
+
+        freed = set(forced[:size])
+        for key in sorted((key for key in placed if key not in freed), key=distance):
+            if len(freed) >= size:
+                break
+            freed.add(key)
+
+        unplaced = [
+            (item['odl_id'], item['tool_id']) for item in items
+            if (item['odl_id'], item['tool_id']) not in placed
+            and (item['odl_id'], item['tool_id']) not in freed
+        ]
+        # Candidati all'inserimento tra i tool più piccoli: sono quelli che entrano negli spazi liberati
+        unplaced.sort(key=lambda key: by_area[key])
+        candidates = unplaced[:2 * size]
+        freed.update(rng.sample(candidates, min(size, len(candidates))))
+        return freed
+
+    def _most_wasted_cell(
+        self,
+        placed: Dict[ItemKey, Placement],
+        max_x: int,
+        max_y: int,
+        rng: random.Random
+    ) -> Tuple[float, float]:
+        """Centro di una delle celle con più area libera (scelta casuale tra le prime tre)"""
+        border = self.constraints.min_border_distance
+        cell_w, cell_h = max_x / WASTE_GRID, max_y / WASTE_GRID
+        cells = []
+        for cx in range(WASTE_GRID):
+            for cy in range(WASTE_GRID):
+                x1, y1 = cx * cell_w, cy * cell_h
+                covered = 0.0
+                for p in placed.values():
+                    px, py = p.x - border, p.y - border
+                    dx = min(x1 + cell_w, px + p.width) - max(x1, px)
+                    dy = min(y1 + cell_h, py + p.height) - max(y1, py)
+                    if dx > 0 and dy > 0:
+                        covered += dx * dy
+                cells.append((cell_w * cell_h - covered, x1 + cell_w / 2, y1 + cell_h / 2))
+
+        cells.sort(reverse=True)
+        _, x, y = rng.choice(cells[:3])
+        return x, y
+
+    def _solve_neighborhood(
+        self,
+        freed_items: List[Dict],
+        placed: Dict[ItemKey, Placement],
+        vacuum_left: int,
+        max_x: int,
+        max_y: int,
+        time_limit: float,
+        workers: int
+    ) -> Optional[Dict[ItemKey, Placement]]:
+        """
+        Sotto-modello CP-SAT: item liberati come intervalli opzionali, tutti gli
+        altri posizionamenti come intervalli fissi arrotondati verso l'esterno.
+        Restituisce i nuovi posizionamenti degli item liberati.
+        """
+        if time_limit <= 0:
+            return None
+
+        border = self.constraints.min_border_distance
+        gap_exact = self.constraints.min_tool_distance
+        gap = math.ceil(gap_exact)
+        freed_keys = {(item['odl_id'], item['tool_id']) for item in freed_items}
+
+        # Finestra di ricerca: ingombro dei tool liberati (tutta l'area se nessuno era posizionato)
+        window = [
+            (p.x - border, p.y - border, p.x - border + p.width + gap_exact, p.y - border + p.height + gap_exact)
+            for key, p in placed.items() if key in freed_keys
+        ]
+        if window:
+            wx1 = max(0, math.floor(min(w[0] for w in window)))
+            wy1 = max(0, math.floor(min(w[1] for w in window)))
+            wx2 = min(max_x, math.ceil(max(w[2] for w in window)))
+            wy2 = min(max_y, math.ceil(max(w[3] for w in window)))
+        else:
+            wx1, wy1, wx2, wy2 = 0, 0, max_x, max_y
+
+        model = cp_model.CpModel()
+        x_intervals = []
+        y_intervals = []
+
+        # Posizionamenti fissi che toccano la finestra: costanti con il gap a destra e in alto
+        for key, p in placed.items():
+            if key in freed_keys:
+                continue
+            x1, y1 = math.floor(p.x - border), math.floor(p.y - border)
+            x2 = math.ceil(p.x - border + p.width + gap_exact)
+            y2 = math.ceil(p.y - border + p.height + gap_exact)
+            if x2 <= wx1 or x1 >= wx2 + gap or y2 <= wy1 or y1 >= wy2 + gap:
+                continue
+            x_intervals.append(model.NewFixedSizeIntervalVar(x1, x2 - x1, f'fx_{key}'))
+            y_intervals.append(model.NewFixedSizeIntervalVar(y1, y2 - y1, f'fy_{key}'))
+
+        variables = []
+        for i, item in enumerate(freed_items):
+            width, height = math.ceil(item['tool'].width), math.ceil(item['tool'].height)
+            x_var = model.NewIntVar(wx1, wx2, f'x_{i}')
+            y_var = model.NewIntVar(wy1, wy2, f'y_{i}')
+            sel = model.NewBoolVar(f'sel_{i}')
+
+            if self.constraints.allow_rotation and width != height:
+                normal = model.NewBoolVar(f'normal_{i}')
+                rotated = model.NewBoolVar(f'rotated_{i}')
+                model.Add(normal + rotated == sel)
+                orientations = [(width, height, normal), (height, width, rotated)]
+            else:
+                normal, rotated = None, None
+                orientations = [(width, height, sel)]
+
+            for k, (w, h, present) in enumerate(orientations):
+                model.Add(x_var + w <= wx2).OnlyEnforceIf(present)
+                model.Add(y_var + h <= wy2).OnlyEnforceIf(present)
+                x_intervals.append(model.NewOptionalFixedSizeIntervalVar(x_var, w + gap, present, f'x_{i}_{k}'))
+                y_intervals.append(model.NewOptionalFixedSizeIntervalVar(y_var, h + gap, present, f'y_{i}_{k}'))
+
+            # Hint completo: posizione corrente se l'item era posizionato, altrimenti escluso
+            current = placed.get((item['odl_id'], item['tool_id']))
+            model.AddHint(sel, int(current is not None))
+            model.AddHint(x_var, int(round(current.x - border)) if current else 0)
+            model.AddHint(y_var, int(round(current.y - border)) if current else 0)
+            if rotated is not None:
+                is_rotated = current is not None and current.rotated
+                model.AddHint(rotated, int(is_rotated))
+                model.AddHint(normal, int(current is not None and not is_rotated))
+
+            variables.append((x_var, y_var, sel, rotated))
+
+        model.AddNoOverlap2D(x_intervals, y_intervals)
+        model.Add(
+            sum(item['vacuum_lines'] * var[2] for item, var in zip(freed_items, variables))
+            <= vacuum_left
+        )
+        model.Maximize(sum(
+            int(item['tool'].area) * var[2] for item, var in zip(freed_items, variables)
+        ))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_search_workers = workers
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+
+        result = {}
+        for item, (x_var, y_var, sel, rotated) in zip(freed_items, variables):
+            if not solver.Value(sel):
+                continue
+            tool = item['tool']
+            is_rotated = rotated is not None and bool(solver.Value(rotated))
+            width, height = (tool.height, tool.width) if is_rotated else (tool.width, tool.height)
+            result[(item['odl_id'], item['tool_id'])] = Placement(
+                odl_id=item['odl_id'],
+                tool_id=item['tool_id'],
+                x=solver.Value(x_var) + border,
+                y=solver.Value(y_var) + border,
+                width=width,
+                height=height,
+                rotated=is_rotated,
+                level=1 if item['is_elevated'] else 0
+            )
+        return result
+
+    def _area(self, placed: Dict[ItemKey, Placement], by_key: Dict[ItemKey, Dict]) -> int:
+        """Area posizionata nella stessa unità dell'upper bound (mm² interi per tool)"""
+        return sum(int(by_key[key]['tool'].area) for key in placed)
+
+    def _build_layout(
+        self,
+        placed: Dict[ItemKey, Placement],
+        by_key: Dict[ItemKey, Dict],
+        autoclave: Autoclave
+    ) -> Optional[BatchLayout]:
+        if not placed:
+            return None
+
+        placements = list(placed.values())
+        used_area = sum(p.width * p.height for p in placements)
+        return BatchLayout(
+            autoclave_id=autoclave.id,
+            placements=placements,
+            efficiency=round(used_area / autoclave.area, 3),
+            total_weight=round(sum(by_key[key]['tool'].weight for key in placed), 2),
+            vacuum_lines_used=sum(by_key[key]['vacuum_lines'] for key in placed)
+        )
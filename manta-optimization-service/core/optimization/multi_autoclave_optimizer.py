@@ -1,13 +1,25 @@
+import os
 import time
 import uuid
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
-import random
 from dataclasses import dataclass
 
 from domain.entities import ODL, Autoclave, BatchLayout
 from core.optimization.nesting_engine import NestingEngine
+from core.optimization.rectangle_packer import RectanglePacker, IncrementalLayout
 from core.optimization.constraints import NestingConstraints
+from core.optimization.parallel import process_context, worker_count
+from core.optimization.bounds import (
+    max_batch_area, batch_count_lower_bound, placed_area, optimality_gap
+)
+from core.optimization.assignment import CycleAssignmentSolver
+from core.optimization.multi_bin import MultiBinSolver
+from core.optimization.polish import BatchPolisher
+from core.optimization.right_sizing import BatchRightSizer
 from core.validators.odl_state_validator import odl_validator, ODLStateValidationError
 
 @dataclass
@@ -32,6 +44,7 @@ class AutoclaveAssignment:
     reason: str
     odl_count: int
     total_area: float
+    estimated_batches: Optional[int] = None
 
 class MultiAutoclaveOptimizer:
     """Ottimizzatore per distribuzione ODL su multiple autoclavi"""
@@ -39,6 +52,7 @@ class MultiAutoclaveOptimizer:
     def __init__(self, constraints: NestingConstraints):
         self.constraints = constraints
         self.nesting_engine = NestingEngine(constraints)
+        self.assignment_solver = CycleAssignmentSolver(constraints)
     
     def optimize(
         self,
@@ -67,6 +81,11 @@ class MultiAutoclaveOptimizer:
         elevated_tools = elevated_tools or {}
         autoclave_assignments = autoclave_assignments or {}
         
+        # Deadline globale condivisa da tutte le chiamate annidate al solver
+        self.nesting_engine.start_request(
+            deadline=start_time + self.constraints.request_timeout_seconds
+        )
+        
         # VALIDAZIONE STATI ODL - Prevenzione duplicazioni cross-batch
         validation_result = odl_validator.validate_odls_for_optimization(odls)
         
@@ -95,11 +114,13 @@ class MultiAutoclaveOptimizer:
         cycle_stats = self._analyze_cycle_areas(valid_odls)
         
         # Genera assegnazioni autoclavi (automatiche o manuali)
+        assignment_plan = None
         if not autoclave_assignments:
-            autoclave_assignments, suggestions = self._assign_autoclaves_by_area_and_count(
-                cycle_stats, autoclaves
-            )
+            cycle_jobs, suggestions = self._assign_autoclaves(cycle_stats, autoclaves)
+            if self.constraints.assignment_mode == "cpsat":
+                assignment_plan = self.assignment_solver.last_plan
         else:
+            cycle_jobs = self._manual_cycle_jobs(cycle_stats, autoclaves, autoclave_assignments)
             suggestions = []
         
         all_batches = []
@@ -112,31 +133,37 @@ class MultiAutoclaveOptimizer:
             'autoclave_suggestions': suggestions,
             'batches_by_efficiency': [],
             'validation_warnings': len(validation_result.warnings),
-            'validation_errors': len(validation_result.errors)
+            'validation_errors': len(validation_result.errors),
+            'assignment': assignment_plan,
+            'polish': None,
+            'right_sizing': None
         }
         
-        # Processa ogni ciclo con la sua autoclave assegnata
-        for cycle_code, stats in cycle_stats.items():
-            autoclave_id = autoclave_assignments.get(cycle_code)
-            if not autoclave_id:
-                continue
-                
-            autoclave = next((a for a in autoclaves if a.id == autoclave_id), None)
-            if not autoclave:
-                continue
-            
-            # Crea batch multipli per questa combinazione ciclo-autoclave
-            cycle_batches = self._create_multiple_batches_per_autoclave(
-                stats.odls, autoclave, elevated_tools
-            )
-            
+        # Crea batch multipli per ogni combinazione ciclo-autoclave
+        cycle_results, metrics['parallelism'] = self._optimize_cycles(
+            cycle_jobs, elevated_tools, start_time + self.constraints.request_timeout_seconds
+        )
+        
+        for cycle_batches in cycle_results:
             # Aggiungi solo batch validi
-            for batch in cycle_batches:
-                if batch and batch.is_valid:
-                    all_batches.append(batch)
-                    metrics['total_odls_placed'] += len(set(
-                        p.odl_id for p in batch.placements
-                    ))
+            all_batches.extend(batch for batch in cycle_batches if batch and batch.is_valid)
+        
+        # Rifinitura opzionale: ODL spostati tra i batch dello stesso ciclo
+        if self.constraints.polish and len(all_batches) > 1:
+            all_batches, metrics['polish'] = self._optimize_inter_autoclave(
+                all_batches, valid_odls, autoclaves, elevated_tools
+            )
+        
+        # Right-sizing: batch piccoli sulle autoclavi piccole (non con assegnazioni manuali)
+        if self.constraints.right_size and not autoclave_assignments:
+            all_batches, metrics['right_sizing'] = self._right_size_batches(
+                all_batches, valid_odls, autoclaves, elevated_tools
+            )
+        
+        for batch in all_batches:
+            metrics['total_odls_placed'] += len(set(
+                p.odl_id for p in batch.placements
+            ))
         
         # Ordina batch per efficienza decrescente
         all_batches = self._rank_batches_by_efficiency(all_batches)
@@ -158,20 +185,28 @@ class MultiAutoclaveOptimizer:
             )
         
         # Popola metriche di efficienza
+        all_items = self.nesting_engine.build_items(valid_odls, elevated_tools)
         metrics['batches_by_efficiency'] = [
             {
                 'batch_id': batch.batch_id,
                 'efficiency': batch.efficiency,
                 'odl_count': len(set(p.odl_id for p in batch.placements)),
-                'is_recommended': batch.efficiency >= 0.7  # Soglia 70%
+                'is_recommended': batch.efficiency >= 0.7,  # Soglia 70%
+                'area_upper_bound': batch.area_upper_bound,
+                'optimality_gap': optimality_gap(
+                    placed_area(batch, all_items), batch.area_upper_bound
+                ) if batch.area_upper_bound is not None else None
             }
             for batch in all_batches
         ]
+        metrics['bounds'] = self._bounds_metrics(all_batches, cycle_jobs, all_items, elevated_tools)
         
         # Aggiungi info sui batch registrati
         metrics['registered_batch_ids'] = batch_ids
         
         metrics['batches_created'] = len(all_batches)
+        metrics['engine'] = self.constraints.engine
+        metrics['solver'] = self.nesting_engine.solver_summary()
         metrics['execution_time'] = round(time.time() - start_time, 2)
         metrics['success_rate'] = round(
             metrics['total_odls_placed'] / metrics['total_odls_input'], 3
@@ -179,6 +214,101 @@ class MultiAutoclaveOptimizer:
         
         return all_batches, metrics
     
+    def _bounds_metrics(
+        self,
+        batches: List[BatchLayout],
+        cycle_jobs: List[Tuple[List[ODL], Autoclave]],
+        all_items: List[Dict],
+        elevated_tools: Dict[str, List[str]]
+    ) -> Dict:
+        """
+        Confronto con i bound: batch minimi necessari (somma per ciclo dei lower
+        bound L1/L2) e gap tra area posizionata e area massima ottenibile.
+        """
+        batches_lower_bound = sum(
+            batch_count_lower_bound(
+                self.nesting_engine.build_items(odls, elevated_tools), autoclave, self.constraints
+            )
+            for odls, autoclave in cycle_jobs
+        )
+        bounded = [batch for batch in batches if batch.area_upper_bound is not None]
+        area_bound = sum(batch.area_upper_bound for batch in bounded)
+        area_placed = sum(placed_area(batch, all_items) for batch in bounded)
+        
+        return {
+            'batches_lower_bound': batches_lower_bound,
+            'batches_created': len(batches),
+            'area_upper_bound': area_bound,
+            'area_placed': area_placed,
+            'optimality_gap': optimality_gap(area_placed, area_bound)
+        }
+    
+    def _batch_area_bound(
+        self,
+        odls: List[ODL],
+        autoclave: Autoclave,
+        elevated_tools: Dict[str, List[str]]
+    ) -> int:
+        """Area massima di un batch che può attingere a tutti gli ODL ancora da posizionare"""
+        items = self.nesting_engine.build_items(odls, elevated_tools)
+        return max_batch_area(items, autoclave, self.constraints)
+    
+    def _cycle_pool_size(self, job_count: int) -> Tuple[int, int]:
+        """
+        Dimensiona il pool per cicli: (processi, thread CP-SAT per processo).
+        Processi da worker_count (un processo per ciclo fino ai core disponibili
+        in automatico); i thread per processo scendono a core / processi, così
+        processi x num_search_workers non supera i core.
+        """
+        cpus = os.cpu_count() or 1
+        processes = worker_count(self.constraints.cycle_workers, job_count)
+        return processes, max(1, min(self.constraints.solver_threads, cpus // processes))
+    
+    def _optimize_cycles(
+        self,
+        cycle_jobs: List[Tuple[List[ODL], Autoclave]],
+        elevated_tools: Dict[str, List[str]],
+        deadline: float
+    ) -> Tuple[List[List[BatchLayout]], Dict]:
+        """
+        Crea i batch di ogni combinazione ciclo-autoclave, in parallelo su un
+        pool di processi quando c'è più di un ciclo e più di un core.
+        I risultati tornano nell'ordine dei cicli, indipendentemente dall'ordine
+        di completamento, così il ranking successivo è deterministico.
+        """
+        processes, threads = self._cycle_pool_size(len(cycle_jobs))
+        
+        if processes > 1:
+            worker_constraints = dataclasses.replace(self.constraints, solver_threads=threads)
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=process_context()
+                ) as pool:
+                    futures = [
+                        pool.submit(
+                            _optimize_cycle_worker, worker_constraints, deadline,
+                            odls, autoclave, elevated_tools
+                        )
+                        for odls, autoclave in cycle_jobs
+                    ]
+                    results = [future.result() for future in futures]
+                
+                for _, solver_totals in results:
+                    self.nesting_engine.merge_solver_totals(solver_totals)
+                parallelism = {'processes': processes, 'solver_threads': threads}
+                return [batches for batches, _ in results], parallelism
+            
+            except (OSError, BrokenProcessPool) as e:
+                print(f"Pool di processi non disponibile ({e}), ottimizzazione sequenziale dei cicli")
+        
+        parallelism = {'processes': 1, 'solver_threads': self.constraints.solver_threads}
+        results = [
+            self._create_multiple_batches_per_autoclave(odls, autoclave, elevated_tools)
+            for odls, autoclave in cycle_jobs
+        ]
+        return results, parallelism
+    
     def _group_by_cycle(self, odls: List[ODL]) -> Dict[str, List[ODL]]:
         """Raggruppa ODL per ciclo di cura"""
         groups = defaultdict(list)
@@ -202,13 +332,82 @@ class MultiAutoclaveOptimizer:
         
         return cycle_stats
     
+    def _assign_autoclaves(
+        self,
+        cycle_stats: Dict[str, CycleStats],
+        autoclaves: List[Autoclave]
+    ) -> Tuple[List[Tuple[List[ODL], Autoclave]], List[AutoclaveAssignment]]:
+        """
+        Assegnazione automatica secondo constraints.assignment_mode. Con "cpsat"
+        l'assegnazione per rango è il piano di riferimento da non peggiorare.
+        
+        Returns:
+            - Combinazioni (ODL, autoclave) da processare, indipendenti tra loro
+            - Lista suggerimenti con motivazioni (per ciclo prima l'autoclave principale)
+        """
+        assignments, suggestions = self._assign_autoclaves_by_area_and_count(
+            cycle_stats, autoclaves
+        )
+        if self.constraints.assignment_mode == "rank":
+            return self._manual_cycle_jobs(cycle_stats, autoclaves, assignments), suggestions
+        
+        allocations = self.assignment_solver.solve(
+            {code: stats.odls for code, stats in cycle_stats.items()}, autoclaves, baseline=assignments
+        )
+        autoclave_map = {a.id: a for a in autoclaves}
+        
+        cycle_jobs = []
+        suggestions = []
+        for allocation in allocations:
+            autoclave = autoclave_map[allocation.autoclave_id]
+            cycle_jobs.append((allocation.odls, autoclave))
+            
+            shared = sum(1 for a in allocations if a.cycle_code == allocation.cycle_code) > 1
+            reason = (
+                f"{len(allocation.odls)} ODL, {sum(o.total_area for o in allocation.odls):.0f}mm² - "
+                f"autoclave {autoclave.code} ({autoclave.width}x{autoclave.height}mm), "
+                f"{allocation.estimated_batches} batch stimati"
+                + (" (ciclo ripartito su più autoclavi)" if shared else "")
+            )
+            suggestions.append(AutoclaveAssignment(
+                cycle_code=allocation.cycle_code,
+                autoclave_id=autoclave.id,
+                reason=reason,
+                odl_count=len(allocation.odls),
+                total_area=sum(o.total_area for o in allocation.odls),
+                estimated_batches=allocation.estimated_batches
+            ))
+        
+        return cycle_jobs, suggestions
+    
+    def _manual_cycle_jobs(
+        self,
+        cycle_stats: Dict[str, CycleStats],
+        autoclaves: List[Autoclave],
+        autoclave_assignments: Dict[str, str]
+    ) -> List[Tuple[List[ODL], Autoclave]]:
+        """Combinazioni ciclo-autoclave da un mapping ciclo -> autoclave_id"""
+        cycle_jobs = []
+        for cycle_code, stats in cycle_stats.items():
+            autoclave_id = autoclave_assignments.get(cycle_code)
+            if not autoclave_id:
+                continue
+                
+            autoclave = next((a for a in autoclaves if a.id == autoclave_id), None)
+            if not autoclave:
+                continue
+            
+            cycle_jobs.append((stats.odls, autoclave))
+        return cycle_jobs
+    
     def _assign_autoclaves_by_area_and_count(
         self, 
         cycle_stats: Dict[str, CycleStats],
         autoclaves: List[Autoclave]
     ) -> Tuple[Dict[str, str], List[AutoclaveAssignment]]:
         """
-        Assegna autoclavi ai cicli basandosi su area totale e numero ODL.
+        Assegna autoclavi ai cicli per rango: ciclo con score maggiore
+        all'autoclave più grande (assignment_mode="rank").
         
         Returns:
             - Mapping ciclo -> autoclave_id
@@ -337,6 +536,123 @@ class MultiAutoclaveOptimizer:
         
         # Ordina ODL per area decrescente per ottimizzare il packing
         sorted_odls = sorted(odls, key=lambda x: x.total_area, reverse=True)
+        
+        if self.constraints.incremental_batches:
+            batches = self._grow_batches_incrementally(sorted_odls, autoclave, elevated_tools)
+        else:
+            batches = self._grow_batches_by_resolving(sorted_odls, autoclave, elevated_tools)
+        
+        if self.constraints.multi_bin and len(batches) > 1:
+            batches = self._repack_jointly(sorted_odls, autoclave, elevated_tools, batches)
+        return batches
+    
+    def _repack_jointly(
+        self,
+        odls: List[ODL],
+        autoclave: Autoclave,
+        elevated_tools: Dict[str, List[str]],
+        batches: List[BatchLayout]
+    ) -> List[BatchLayout]:
+        """
+        Reimpacca gli ODL del ciclo su tanti bin quanti i batch sequenziali con il
+        modello multi-bin, partendo dai batch stessi. Il risultato congiunto
+        sostituisce quello sequenziale solo se non perde area e usa meno batch o
+        riempie di più i primi; oltre multi_bin_max_pairs resta il sequenziale.
+        """
+        solver = MultiBinSolver(self.nesting_engine)
+        if not solver.within_cap(sum(len(odl.tools) for odl in odls), len(batches)):
+            return batches
+        
+        joint = solver.solve(odls, [autoclave] * len(batches), elevated_tools, hint=batches)
+        accepted = bool(joint) and self._batches_score(joint) > self._batches_score(batches)
+        self.nesting_engine.record_multi_bin({
+            **solver.last_run,
+            'accepted': accepted,
+            'batches_saved': len(batches) - len(joint) if accepted else 0
+        })
+        if not accepted:
+            return batches
+        
+        # Ogni bin può attingere a tutti gli ODL del ciclo: stesso bound per tutti
+        area_bound = self._batch_area_bound(odls, autoclave, elevated_tools)
+        for batch in joint:
+            batch.area_upper_bound = area_bound
+        return joint
+    
+    def _batches_score(self, batches: List[BatchLayout]) -> Tuple:
+        """Area posizionata, poi meno batch, poi riempimento dei batch più pieni"""
+        areas = sorted((round(sum(p.width * p.height for p in b.placements)) for b in batches), reverse=True)
+        return sum(areas), -len(batches), areas
+    
+    def _grow_batches_incrementally(
+        self,
+        sorted_odls: List[ODL],
+        autoclave: Autoclave,
+        elevated_tools: Dict[str, List[str]]
+    ) -> List[BatchLayout]:
+        """
+        Riempie i batch inserendo ogni ODL nello spazio libero del layout corrente
+        (stato Skyline mantenuto tra un inserimento e l'altro). Il solve completo
+        avviene una sola volta per batch, alla chiusura.
+        """
+        packer = RectanglePacker(self.constraints)
+        remaining_odls = sorted_odls.copy()
+        batches = []
+        
+        while remaining_odls:
+            area_bound = self._batch_area_bound(remaining_odls, autoclave, elevated_tools)
+            growing = packer.start_layout(autoclave)
+            
+            for odl in remaining_odls[:]:
+                if growing.try_add(odl, elevated_tools.get(odl.id)):
+                    remaining_odls.remove(odl)
+            
+            if growing.odls:
+                batch = self._close_batch(growing, autoclave)
+                if batch and batch.is_valid:
+                    batch.area_upper_bound = area_bound
+                    batches.append(batch)
+            else:
+                # L'ODL più grande non entra per intero: solve completo come ultima
+                # risorsa (può posizionarne solo una parte dei tool)
+                single_odl = [remaining_odls.pop(0)]
+                single_elevated = {}
+                if single_odl[0].id in elevated_tools:
+                    single_elevated[single_odl[0].id] = elevated_tools[single_odl[0].id]
+                
+                single_batch = self.nesting_engine.optimize_single_autoclave(
+                    single_odl, autoclave, single_elevated
+                )
+                if single_batch and single_batch.is_valid:
+                    single_batch.area_upper_bound = area_bound
+                    batches.append(single_batch)
+        
+        return batches
+    
+    def _close_batch(self, growing: IncrementalLayout, autoclave: Autoclave) -> Optional[BatchLayout]:
+        """
+        Chiude un batch: solve completo sugli ODL accettati partendo dal layout
+        incrementale. Se il solve perde dei tool si tiene il layout incrementale.
+        """
+        incremental = growing.to_layout()
+        final_batch = self.nesting_engine.optimize_single_autoclave(
+            growing.odls, autoclave, growing.elevated_tools, hint=incremental
+        )
+        
+        if not final_batch or len(final_batch.placements) < len(incremental.placements):
+            return incremental
+        return final_batch
+    
+    def _grow_batches_by_resolving(
+        self,
+        sorted_odls: List[ODL],
+        autoclave: Autoclave,
+        elevated_tools: Dict[str, List[str]]
+    ) -> List[BatchLayout]:
+        """
+        Riempie i batch ri-ottimizzando da zero l'intero batch a ogni ODL provato.
+        Un solve completo per tentativo: usato solo con incremental_batches=False.
+        """
         remaining_odls = sorted_odls.copy()
         batches = []
         
@@ -345,6 +661,8 @@ class MultiAutoclaveOptimizer:
         min_acceptable_efficiency = 0.5
         
         while remaining_odls:
+            area_bound = self._batch_area_bound(remaining_odls, autoclave, elevated_tools)
+            
             # Prova a creare un batch con gli ODL rimanenti
             current_batch_odls = []
             batch_elevated_tools = {}
@@ -380,6 +698,7 @@ class MultiAutoclaveOptimizer:
                     current_batch_odls, autoclave, batch_elevated_tools
                 )
                 if final_batch and final_batch.is_valid:
+                    final_batch.area_upper_bound = area_bound
                     batches.append(final_batch)
             else:
                 # Se non riusciamo a creare batch efficiente, prova con meno ODL
@@ -394,6 +713,7 @@ class MultiAutoclaveOptimizer:
                         single_odl, autoclave, single_elevated
                     )
                     if single_batch and single_batch.is_valid:
+                        single_batch.area_upper_bound = area_bound
                         batches.append(single_batch)
         
         return batches
@@ -408,91 +728,67 @@ class MultiAutoclaveOptimizer:
         all_odls: List[ODL],
         autoclaves: List[Autoclave],
         elevated_tools: Dict[str, List[str]]
-    ) -> List[BatchLayout]:
+    ) -> Tuple[List[BatchLayout], Dict]:
         """
-        Ottimizzazione post-processing: prova swap tra autoclavi
-        per migliorare l'efficienza globale.
+        Ottimizzazione post-processing (polish): local search move/swap/ejection
+        chain tra batch dello stesso ciclo, anche su autoclavi diverse, entro
+        polish_time_budget e la deadline della richiesta.
+        Restituisce i batch rifiniti e le metriche prima/dopo.
         """
-        # Mappa autoclave_id -> batch
-        batch_by_autoclave = {b.autoclave_id: b for b in batches}
-        
-        # Mappa autoclave_id -> autoclave
+        polisher = BatchPolisher(self.constraints, deadline=self.nesting_engine.deadline)
+        polished = polisher.polish(batches, all_odls, autoclaves, elevated_tools)
+        self._fill_area_bounds(polished, all_odls, autoclaves, elevated_tools)
+        return polished, polisher.last_run
+    
+    def _right_size_batches(
+        self,
+        batches: List[BatchLayout],
+        all_odls: List[ODL],
+        autoclaves: List[Autoclave],
+        elevated_tools: Dict[str, List[str]]
+    ) -> Tuple[List[BatchLayout], Dict]:
+        """
+        Sposta i batch sull'autoclave più piccola in cui entrano (bound, poi
+        re-pack veloce) senza aumentare il makespan, lasciando libere le grandi.
+        Restituisce i batch e le metriche sulla capacità liberata.
+        """
+        sizer = BatchRightSizer(self.constraints, deadline=self.nesting_engine.deadline)
+        resized = sizer.right_size(batches, all_odls, autoclaves, elevated_tools)
+        self._fill_area_bounds(resized, all_odls, autoclaves, elevated_tools)
+        return resized, sizer.last_run
+    
+    def _fill_area_bounds(
+        self,
+        batches: List[BatchLayout],
+        all_odls: List[ODL],
+        autoclaves: List[Autoclave],
+        elevated_tools: Dict[str, List[str]]
+    ):
+        """Bound d'area dei layout nuovi: tutti gli ODL del ciclo sull'autoclave del batch"""
+        odl_by_id = {odl.id: odl for odl in all_odls}
         autoclave_by_id = {a.id: a for a in autoclaves}
-        
-        improved = True
-        iterations = 0
-        max_iterations = 10
-        
-        while improved and iterations < max_iterations:
-            improved = False
-            iterations += 1
-            
-            # Prova swap casuali
-            for _ in range(20):
-                # Scegli due batch casuali
-                if len(batches) < 2:
-                    break
-                
-                batch1, batch2 = random.sample(batches, 2)
-                
-                # Scegli ODL casuali da ogni batch
-                if not batch1.placements or not batch2.placements:
-                    continue
-                
-                odl1_id = random.choice(batch1.placements).odl_id
-                odl2_id = random.choice(batch2.placements).odl_id
-                
-                # Trova ODL objects
-                odl1 = next((o for o in all_odls if o.id == odl1_id), None)
-                odl2 = next((o for o in all_odls if o.id == odl2_id), None)
-                
-                if not odl1 or not odl2:
-                    continue
-                
-                # Calcola efficienza attuale
-                current_efficiency = batch1.efficiency + batch2.efficiency
-                
-                # Simula swap
-                # Rimuovi ODL dai batch attuali
-                odls1_without = [
-                    o for o in all_odls 
-                    if any(p.odl_id == o.id for p in batch1.placements) 
-                    and o.id != odl1_id
-                ]
-                odls2_without = [
-                    o for o in all_odls 
-                    if any(p.odl_id == o.id for p in batch2.placements) 
-                    and o.id != odl2_id
-                ]
-                
-                # Aggiungi ODL scambiati
-                odls1_new = odls1_without + [odl2]
-                odls2_new = odls2_without + [odl1]
-                
-                # Ri-ottimizza
-                autoclave1 = autoclave_by_id[batch1.autoclave_id]
-                autoclave2 = autoclave_by_id[batch2.autoclave_id]
-                
-                new_batch1 = self.nesting_engine.optimize_single_autoclave(
-                    odls1_new, autoclave1, elevated_tools
-                )
-                new_batch2 = self.nesting_engine.optimize_single_autoclave(
-                    odls2_new, autoclave2, elevated_tools
+        bounds: Dict[Tuple[str, str], int] = {}
+        for batch in batches:
+            if batch.area_upper_bound is not None or batch.autoclave_id not in autoclave_by_id:
+                continue
+            cycle = odl_by_id[batch.placements[0].odl_id].curing_cycle
+            key = (cycle, batch.autoclave_id)
+            if key not in bounds:
+                cycle_odls = [odl for odl in all_odls if odl.curing_cycle == cycle]
+                bounds[key] = self._batch_area_bound(
+                    cycle_odls, autoclave_by_id[batch.autoclave_id], elevated_tools
                 )
-                
-                if new_batch1 and new_batch2:
-                    new_efficiency = new_batch1.efficiency + new_batch2.efficiency
-                    
-                    # Se migliora, accetta lo swap
-                    if new_efficiency > current_efficiency + 0.01:
-                        # Aggiorna batches
-                        for i, b in enumerate(batches):
-                            if b.autoclave_id == batch1.autoclave_id:
-                                batches[i] = new_batch1
-                            elif b.autoclave_id == batch2.autoclave_id:
-                                batches[i] = new_batch2
-                        
-                        improved = True
-                        break
-        
-        return batches
\ No newline at end of file
+            batch.area_upper_bound = bounds[key]
+
+def _optimize_cycle_worker(
+    constraints: NestingConstraints,
+    deadline: float,
+    odls: List[ODL],
+    autoclave: Autoclave,
+    elevated_tools: Dict[str, List[str]]
+) -> Tuple[List[BatchLayout], Dict]:
+    """Entry point dei processi worker: batch di un ciclo e totali del solver"""
+    optimizer = MultiAutoclaveOptimizer(constraints)
+    optimizer.nesting_engine.start_request(deadline=deadline)
+    batches = optimizer._create_multiple_batches_per_autoclave(odls, autoclave, elevated_tools)
+    return batches, optimizer.nesting_engine.solver_totals
@@ -0,0 +1,349 @@
+"""
+Modello CP-SAT Multi-Bin per un Ciclo
+=====================================
+
+Il riempimento sequenziale chiude un batch alla volta: i primi prendono gli
+ODL facili e gli ultimi restano mezzi vuoti. Questo modello impacca gli ODL di
+un ciclo su K bin (autoclavi uguali o diverse) in un solo solve:
+
+- ogni ODL va per intero in al più un bin (una variabile di assegnazione per
+  coppia ODL-bin, presenza di tutti gli intervalli dei suoi tool);
+- ogni bin ha il proprio NoOverlap2D con intervalli opzionali per
+  orientazione, gonfiati del gap come nel modello no_overlap_2d dell'engine,
+  e il proprio vincolo sulle linee del vuoto;
+- bin identici consecutivi sono ordinati per area decrescente (symmetry
+  breaking sulle permutazioni dei bin).
+
+Obiettivo lessicografico: area posizionata, poi meno bin usati, poi
+riempimento dei primi bin (pesi decrescenti), così i bin finali si svuotano.
+Il modello cresce con item x bin: il chiamante verifica within_cap e sopra il
+limite resta sul packing sequenziale.
+"""
+
+import math
+import time
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+
+from ortools.sat.python import cp_model
+
+from domain.entities import ODL, Autoclave, BatchLayout, Placement
+
+if TYPE_CHECKING:
+    from core.optimization.nesting_engine import NestingEngine
+
+# Unità di area dell'obiettivo (mm²): in cm² i pesi lessicografici restano in int64
+MULTI_BIN_AREA_UNIT = 100
+
+# Orientazione sulla griglia del modello: (larghezza, altezza, ruotato)
+Orientation = Tuple[int, int, bool]
+
+# Motivo di arresto per stato CP-SAT (FEASIBLE e UNKNOWN: budget esaurito)
+MULTI_BIN_STOP_REASONS = {
+    cp_model.OPTIMAL: 'optimal',
+    cp_model.FEASIBLE: 'time_limit',
+    cp_model.INFEASIBLE: 'infeasible',
+    cp_model.MODEL_INVALID: 'model_invalid',
+    cp_model.UNKNOWN: 'no_solution'
+}
+
+
+class MultiBinSolver:
+    """
+    Packing congiunto degli ODL di un ciclo su più bin con un solo modello CP-SAT.
+    Usa budget, griglia e metriche del NestingEngine chiamante.
+    """
+
+    def __init__(self, engine: 'NestingEngine'):
+        self.engine = engine
+        self.constraints = engine.constraints
+        self.last_run: Dict = {}
+
+    def within_cap(self, item_count: int, bin_count: int) -> bool:
+        """Il modello ha al più multi_bin_max_pairs coppie item x bin"""
+        return item_count * bin_count <= self.constraints.multi_bin_max_pairs
+
+    def solve(
+        self,
+        odls: List[ODL],
+        bins: List[Autoclave],
+        elevated_tools: Optional[Dict[str, List[str]]] = None,
+        hint: Optional[List[BatchLayout]] = None
+    ) -> Optional[List[BatchLayout]]:
+        """
+        Restituisce i layout dei bin usati, nell'ordine dei bin, o None se il
+        solver non trova soluzione. hint[b] (es. il batch sequenziale b) è la
+        soluzione di partenza del bin b, riordinata tra bin identici.
+        """
+        if not odls or not bins:
+            return None
+
+        started = time.time()
+        resolution = self.constraints.grid_resolution
+        border = self.constraints.min_border_distance
+        gap = math.ceil(self.constraints.min_tool_distance / resolution)
+
+        items = self.engine.build_items(odls, elevated_tools)
+        dims = [self.engine._grid_dims(item['tool'], resolution) for item in items]
+        members: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            members.setdefault(item['odl_id'], []).append(i)
+        odl_area = {
+            odl_id: sum(math.ceil(items[i]['tool'].area / MULTI_BIN_AREA_UNIT) for i in indices)
+            for odl_id, indices in members.items()
+        }
+
+        model = cp_model.CpModel()
+        assign: Dict[Tuple[str, int], cp_model.IntVar] = {}
+        # Per (item, bin): x, y e orientazioni con il proprio letterale di presenza
+        variables: Dict[Tuple[int, int], Tuple] = {}
+        bin_areas = []
+        used = []
+
+        for b, autoclave in enumerate(bins):
+            max_x = int(autoclave.width - 2 * border) // resolution
+            max_y = int(autoclave.height - 2 * border) // resolution
+            x_intervals, y_intervals, vacuum = [], [], []
+
+            for odl_id, indices in members.items():
+                options = [self._orientations(dims[i], max_x, max_y) for i in indices]
+                if not all(options):
+                    continue  # Un tool dell'ODL non entra nel bin: ODL escluso
+
+                assigned = model.NewBoolVar(f'assign_{odl_id}_{b}')
+                assign[odl_id, b] = assigned
+                vacuum.append(assigned * sum(items[i]['vacuum_lines'] for i in indices))
+
+                for i, orientations in zip(indices, options):
+                    x_var = model.NewIntVar(0, max_x, f'x_{i}_{b}')
+                    y_var = model.NewIntVar(0, max_y, f'y_{i}_{b}')
+                    model.Add(x_var == 0).OnlyEnforceIf(assigned.Not())
+                    model.Add(y_var == 0).OnlyEnforceIf(assigned.Not())
+
+                    if len(orientations) == 1:
+                        presences = [assigned]
+                    else:
+                        presences = [model.NewBoolVar(f'orient_{i}_{b}_{k}') for k in range(len(orientations))]
+                        model.Add(sum(presences) == assigned)
+
+                    for (w, h, _), present in zip(orientations, presences):
+                        model.Add(x_var + w <= max_x).OnlyEnforceIf(present)
+                        model.Add(y_var + h <= max_y).OnlyEnforceIf(present)
+                        x_intervals.append(model.NewOptionalFixedSizeIntervalVar(
+                            x_var, w + gap, present, f'x_int_{i}_{b}'
+                        ))
+                        y_intervals.append(model.NewOptionalFixedSizeIntervalVar(
+                            y_var, h + gap, present, f'y_int_{i}_{b}'
+                        ))
+                    variables[i, b] = (x_var, y_var, list(zip(orientations, presences)))
+
+            model.AddNoOverlap2D(x_intervals, y_intervals)
+            if vacuum:
+                model.Add(sum(vacuum) <= autoclave.vacuum_lines)
+
+            in_bin = [assign[odl_id, b] for odl_id in members if (odl_id, b) in assign]
+            bin_used = model.NewBoolVar(f'used_{b}')
+            for assigned in in_bin:
+                model.AddImplication(assigned, bin_used)
+            model.Add(bin_used <= sum(in_bin))
+            used.append(bin_used)
+            bin_areas.append(sum(
+                odl_area[odl_id] * assign[odl_id, b] for odl_id in members if (odl_id, b) in assign
+            ))
+
+        # Ogni ODL per intero in al più un bin
+        for odl_id in members:
+            model.AddAtMostOne(assign[odl_id, b] for b in range(len(bins)) if (odl_id, b) in assign)
+
+        # Bin identici consecutivi: area decrescente (l'hint è riordinato di conseguenza)
+        for b in range(len(bins) - 1):
+            if self._same_bin(bins[b], bins[b + 1]):
+                model.Add(bin_areas[b] >= bin_areas[b + 1])
+
+        # Lessicografico: area posizionata >> bin usati >> riempimento dei primi bin
+        count = len(bins)
+        total = sum(odl_area.values())
+        fill_weight = count * total + 1
+        placed_weight = (count + 1) * fill_weight
+        model.Maximize(
+            placed_weight * sum(bin_areas)
+            - fill_weight * sum(used)
+            + sum((count - b) * area for b, area in enumerate(bin_areas))
+        )
+
+        if hint:
+            hint = self._order_hint(hint, bins, odl_area)
+            self._add_hint(model, items, members, assign, variables, bins, hint, resolution)
+
+        max_x = int(bins[0].width - 2 * border)
+        max_y = int(bins[0].height - 2 * border)
+        time_limit, workers = self.engine._solver_budget(items, max_x, max_y)
+
+        build_time = time.time() - started
+        solve_start = time.time()
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(time_limit, 0.01)
+        solver.parameters.num_search_workers = workers
+        status = solver.Solve(model)
+
+        layouts = None
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            layouts = self._extract(solver, items, members, assign, variables, bins, resolution)
+
+        self.engine._record_solve({
+            'cpsat_model': 'multi_bin',
+            'grid_resolution': resolution,
+            'items': len(items),
+            'build_time': round(build_time, 4),
+            'solve_time': round(time.time() - solve_start, 4),
+            'time_limit': round(time_limit, 2),
+            'workers': workers,
+            'status': solver.StatusName(status),
+            'stop_reason': self._stop_reason(status),
+            'warm_start_efficiency': None,
+            'warm_start_bound': False
+        })
+        self.last_run = {
+            'items': len(items),
+            'bins': len(bins),
+            'bins_used': len(layouts) if layouts else 0,
+            'status': solver.StatusName(status),
+            'time': round(time.time() - started, 3)
+        }
+        return layouts
+
+    def _orientations(self, dims: Tuple[int, int], max_x: int, max_y: int) -> List[Orientation]:
+        """Orientazioni ammesse del tool che entrano da sole nel bin"""
+        width, height = dims
+        options = [(width, height, False)]
+        if self.constraints.allow_rotation and width != height:
+            options.append((height, width, True))
+        return [(w, h, rotated) for w, h, rotated in options if w <= max_x and h <= max_y]
+
+    @staticmethod
+    def _same_bin(first: Autoclave, second: Autoclave) -> bool:
+        return (first.width, first.height, first.vacuum_lines) == (second.width, second.height, second.vacuum_lines)
+
+    def _stop_reason(self, status: int) -> str:
+        """Motivo di arresto dallo stato CP-SAT; budget esaurito oltre la deadline = 'deadline'"""
+        reason = MULTI_BIN_STOP_REASONS.get(status, 'no_solution')
+        if (status in (cp_model.FEASIBLE, cp_model.UNKNOWN) and
+                self.engine.deadline is not None and time.time() >= self.engine.deadline):
+            return 'deadline'
+        return reason
+
+    def _order_hint(
+        self,
+        hint: List[BatchLayout],
+        bins: List[Autoclave],
+        odl_area: Dict[str, int]
+    ) -> List[BatchLayout]:
+        """
+        Layout di partenza riordinati per area decrescente dentro ogni sequenza
+        di bin identici consecutivi, così l'hint rispetta il symmetry breaking.
+        """
+        def area(layout: BatchLayout) -> int:
+            return sum(odl_area.get(odl_id, 0) for odl_id in {p.odl_id for p in layout.placements})
+
+        ordered = list(hint[:len(bins)])
+        start = 0
+        while start < len(ordered):
+            end = start + 1
+            while end < len(ordered) and self._same_bin(bins[end - 1], bins[end]):
+                end += 1
+            ordered[start:end] = sorted(ordered[start:end], key=area, reverse=True)
+            start = end
+        return ordered
+
+    def _add_hint(
+        self,
+        model: cp_model.CpModel,
+        items: List[Dict],
+        members: Dict[str, List[int]],
+        assign: Dict,
+        variables: Dict,
+        bins: List[Autoclave],
+        hint: List[BatchLayout],
+        resolution: int
+    ):
+        """Hint completo: layout hint[b] nel bin b, tutto il resto non assegnato"""
+        border = self.constraints.min_border_distance
+        placed = {}
+        for b, layout in enumerate(hint[:len(bins)]):
+            for p in layout.placements:
+                placed[p.odl_id, p.tool_id] = (b, p)
+
+        # ODL nel bin dove il layout di partenza ne ha posizionato il primo tool
+        home = {}
+        for odl_id, indices in members.items():
+            for i in indices:
+                found = placed.get((odl_id, items[i]['tool_id']))
+                if found and (odl_id, found[0]) in assign:
+                    home[odl_id] = found[0]
+                    break
+
+        for (odl_id, b), assigned in assign.items():
+            model.AddHint(assigned, int(home.get(odl_id) == b))
+
+        for (i, b), (x_var, y_var, orientations) in variables.items():
+            item = items[i]
+            found = placed.get((item['odl_id'], item['tool_id']))
+            current = found[1] if found and found[0] == b and home.get(item['odl_id']) == b else None
+            model.AddHint(x_var, int(round((current.x - border) / resolution)) if current else 0)
+            model.AddHint(y_var, int(round((current.y - border) / resolution)) if current else 0)
+            if len(orientations) > 1:
+                for (_, _, rotated), present in orientations:
+                    model.AddHint(present, int(current is not None and current.rotated == rotated))
+
+    def _extract(
+        self,
+        solver: cp_model.CpSolver,
+        items: List[Dict],
+        members: Dict[str, List[int]],
+        assign: Dict,
+        variables: Dict,
+        bins: List[Autoclave],
+        resolution: int
+    ) -> List[BatchLayout]:
+        """Layout dei bin con almeno un ODL, coordinate in mm dell'autoclave"""
+        border = self.constraints.min_border_distance
+        layouts = []
+
+        for b, autoclave in enumerate(bins):
+            placements = []
+            total_weight = 0.0
+            vacuum_used = 0
+            for odl_id, indices in members.items():
+                if (odl_id, b) not in assign or not solver.Value(assign[odl_id, b]):
+                    continue
+                for i in indices:
+                    item = items[i]
+                    x_var, y_var, orientations = variables[i, b]
+                    rotated = next(
+                        rotated for (_, _, rotated), present in orientations if solver.Value(present)
+                    )
+                    tool = item['tool']
+                    width, height = (tool.height, tool.width) if rotated else (tool.width, tool.height)
+                    placements.append(Placement(
+                        odl_id=item['odl_id'],
+                        tool_id=item['tool_id'],
+                        x=solver.Value(x_var) * resolution + border,
+                        y=solver.Value(y_var) * resolution + border,
+                        width=width,
+                        height=height,
+                        rotated=rotated,
+                        level=1 if item['is_elevated'] else 0
+                    ))
+                    total_weight += tool.weight
+                    vacuum_used += item['vacuum_lines']
+
+            if placements:
+                used_area = sum(p.width * p.height for p in placements)
+                layouts.append(BatchLayout(
+                    autoclave_id=autoclave.id,
+                    placements=placements,
+                    efficiency=round(used_area / autoclave.area, 3),
+                    total_weight=round(total_weight, 2),
+                    vacuum_lines_used=vacuum_used
+                ))
+
+        return layouts
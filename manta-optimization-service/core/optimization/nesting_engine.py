@@ -1,26 +1,202 @@
 import time
+import threading
 from typing import List, Dict, Tuple, Optional
 from ortools.sat.python import cp_model
 import math
 
 from domain.entities import Tool, ODL, Autoclave, Placement, BatchLayout
 from core.optimization.constraints import NestingConstraints
+from core.optimization.rectangle_packer import RectanglePacker, MaxRects
+from core.optimization.portfolio import PortfolioSolver
+from core.optimization.genetic import GeneticSolver
+from core.optimization.lns import LNSSolver
+from core.optimization.bounds import max_batch_area, placed_area
+from core.optimization.conflict_graph import ConflictGraph, build_conflict_graph
+from core.optimization.item_types import aggregate_items, type_of_items
+from core.optimization.layout_cache import LayoutCache, LayoutFingerprint, layout_fingerprint, shared_layout_cache
+
+class _SolveMonitor(cp_model.CpSolverSolutionCallback):
+    """
+    Callback CP-SAT per lo stop anticipato: interrompe la ricerca quando
+    l'obiettivo raggiunge l'upper bound o non migliora per stall_seconds.
+    """
+    
+    def __init__(self, solver: cp_model.CpSolver, upper_bound: int, stall_seconds: Optional[float]):
+        super().__init__()
+        self._solver = solver
+        self._upper_bound = upper_bound
+        self._stall_seconds = stall_seconds
+        self._done = threading.Event()
+        self.best_objective: Optional[float] = None
+        self.last_improvement = time.time()
+        self.stop_reason: Optional[str] = None
+    
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        if self.best_objective is None or objective > self.best_objective:
+            self.best_objective = objective
+            self.last_improvement = time.time()
+        
+        if objective >= self._upper_bound:
+            self.stop_reason = 'upper_bound'
+            self.StopSearch()
+    
+    def start(self):
+        """Avvia il watchdog per lo stallo (il callback scatta solo su nuove soluzioni)"""
+        if self._stall_seconds:
+            threading.Thread(target=self._watch_stall, daemon=True).start()
+    
+    def stop(self):
+        self._done.set()
+    
+    def _watch_stall(self):
+        while not self._done.wait(0.1):
+            if (self.best_objective is not None and
+                    time.time() - self.last_improvement >= self._stall_seconds):
+                self.stop_reason = 'stalled'
+                self._solver.StopSearch()
+                return
 
 class NestingEngine:
     """Motore di ottimizzazione per nesting 2D con OR-Tools"""
     
     def __init__(self, constraints: NestingConstraints):
         self.constraints = constraints
+        self.last_solve_stats: Dict = {}
+        self.last_portfolio: Dict = {}
+        self.last_lns: Dict = {}
+        self.last_multi_bin: Dict = {}
+        
+        # Cache dei layout condivisa dal processo (None se disattivata)
+        self.layout_cache: Optional[LayoutCache] = (
+            shared_layout_cache(constraints) if constraints.layout_cache else None
+        )
+        
+        # Deadline globale della richiesta corrente e totali per le metriche
+        self.deadline: Optional[float] = None
+        self.solver_totals: Dict = {}
+        self.start_request()
+    
+    def start_request(self, deadline: Optional[float] = None):
+        """Inizia una nuova richiesta: imposta la deadline condivisa e azzera i totali"""
+        self.deadline = deadline
+        self.solver_totals = {
+            'calls': 0,
+            'time_spent': 0.0,
+            'stop_reasons': {},
+            'portfolio_wins': {},
+            'engines_used': {},
+            'engine_errors': {},
+            'engine_error_messages': {},
+            'warm_start_wins': 0,
+            'lns_iterations': 0,
+            'lns_improvements': 0,
+            'multi_bin_runs': 0,
+            'multi_bin_accepted': 0,
+            'multi_bin_batches_saved': 0,
+            'layout_cache_hits': 0,
+            'layout_cache_disk_hits': 0,
+            'layout_cache_misses': 0
+        }
+    
+    def solver_summary(self) -> Dict:
+        """Metriche aggregate delle chiamate CP-SAT della richiesta corrente"""
+        return {
+            'calls': self.solver_totals['calls'],
+            'time_spent': round(self.solver_totals['time_spent'], 3),
+            'stop_reasons': dict(self.solver_totals['stop_reasons']),
+            'last_stop_reason': self.last_solve_stats.get('stop_reason'),
+            'portfolio_wins': dict(self.solver_totals['portfolio_wins']),
+            'engines_used': dict(self.solver_totals['engines_used']),
+            'engine_errors': dict(self.solver_totals['engine_errors']),
+            'engine_error_messages': dict(self.solver_totals['engine_error_messages']),
+            'warm_start_wins': self.solver_totals['warm_start_wins'],
+            'lns_iterations': self.solver_totals['lns_iterations'],
+            'lns_improvements': self.solver_totals['lns_improvements'],
+            'multi_bin_runs': self.solver_totals['multi_bin_runs'],
+            'multi_bin_accepted': self.solver_totals['multi_bin_accepted'],
+            'multi_bin_batches_saved': self.solver_totals['multi_bin_batches_saved'],
+            'layout_cache_hits': self.solver_totals['layout_cache_hits'],
+            'layout_cache_disk_hits': self.solver_totals['layout_cache_disk_hits'],
+            'layout_cache_misses': self.solver_totals['layout_cache_misses'],
+            'layout_cache_hit_rate': self._cache_hit_rate(),
+            'deadline_reached': self.deadline is not None and time.time() >= self.deadline
+        }
+    
+    def merge_solver_totals(self, totals: Dict):
+        """Somma ai totali della richiesta quelli raccolti da un altro engine (es. processo worker)"""
+        self.solver_totals['calls'] += totals['calls']
+        self.solver_totals['time_spent'] += totals['time_spent']
+        reasons = self.solver_totals['stop_reasons']
+        for reason, count in totals['stop_reasons'].items():
+            reasons[reason] = reasons.get(reason, 0) + count
+        for key in ('warm_start_wins', 'lns_iterations', 'lns_improvements', 'multi_bin_runs',
+                    'multi_bin_accepted', 'multi_bin_batches_saved', 'layout_cache_hits',
+                    'layout_cache_disk_hits', 'layout_cache_misses'):
+            self.solver_totals[key] += totals.get(key, 0)
+        self.solver_totals['engine_error_messages'].update(totals.get('engine_error_messages', {}))
+        for key in ('portfolio_wins', 'engines_used', 'engine_errors'):
+            counts = self.solver_totals[key]
+            for engine_name, count in totals.get(key, {}).items():
+                counts[engine_name] = counts.get(engine_name, 0) + count
+    
+    def record_engine(self, engine_name: str):
+        """Conta il motore che ha prodotto il layout restituito"""
+        used = self.solver_totals['engines_used']
+        used[engine_name] = used.get(engine_name, 0) + 1
+    
+    def record_engine_error(self, engine_name: str, error: str):
+        """Conta un motore andato in errore e ne conserva l'ultimo messaggio"""
+        errors = self.solver_totals['engine_errors']
+        errors[engine_name] = errors.get(engine_name, 0) + 1
+        self.solver_totals['engine_error_messages'][engine_name] = error
+    
+    def record_warm_start(self, won: bool):
+        """Segna sull'ultima chiamata CP-SAT se il layout di partenza è rimasto migliore"""
+        self.last_solve_stats['warm_start_won'] = won
+        if won:
+            self.solver_totals['warm_start_wins'] += 1
+    
+    def record_lns(self, summary: Dict):
+        """Registra l'esito dell'ultima LNS (traiettoria dei miglioramenti inclusa)"""
+        self.last_lns = summary
+        self.solver_totals['lns_iterations'] += summary['iterations']
+        self.solver_totals['lns_improvements'] += summary['improvements']
+    
+    def record_multi_bin(self, summary: Dict):
+        """Registra l'esito dell'ultimo modello multi-bin e se ha sostituito i batch sequenziali"""
+        self.last_multi_bin = summary
+        self.solver_totals['multi_bin_runs'] += 1
+        if summary['accepted']:
+            self.solver_totals['multi_bin_accepted'] += 1
+            self.solver_totals['multi_bin_batches_saved'] += summary['batches_saved']
+    
+    def _cache_hit_rate(self) -> Optional[float]:
+        """Frazione delle chiamate servite dalla cache dei layout (None senza chiamate)"""
+        hits = self.solver_totals['layout_cache_hits']
+        lookups = hits + self.solver_totals['layout_cache_misses']
+        return round(hits / lookups, 3) if lookups else None
+    
+    def record_portfolio(self, summary: Dict):
+        """Registra l'esito dell'ultima corsa del portfolio e il motore vincitore"""
+        self.last_portfolio = summary
+        if summary['winner']:
+            wins = self.solver_totals['portfolio_wins']
+            wins[summary['winner']] = wins.get(summary['winner'], 0) + 1
     
     def optimize_single_autoclave(
         self,
         odls: List[ODL],
         autoclave: Autoclave,
-        elevated_tools: Dict[str, List[str]] = None
+        elevated_tools: Dict[str, List[str]] = None,
+        hint: Optional[BatchLayout] = None
     ) -> Optional[BatchLayout]:
         """
-        Ottimizza il posizionamento di ODL in un singolo autoclave.
-        Usa CP-SAT di Google OR-Tools per risolvere il problema.
+        Ottimizza il posizionamento di ODL in un singolo autoclave con il motore
+        scelto in constraints.engine (default CP-SAT di Google OR-Tools).
+        Un layout già noto (hint) sostituisce l'euristica Skyline di partenza.
+        Con constraints.layout_cache un'istanza equivalente già risolta restituisce
+        il layout in cache, rimappato sugli ID degli ODL richiesti.
         """
         if not odls:
             return None
@@ -33,9 +209,51 @@ class NestingEngine:
                 f"Tutti gli ODL in un batch devono avere lo stesso ciclo."
             )
         
-        elevated_tools = elevated_tools or {}
+        fingerprint = None
+        if self.layout_cache is not None:
+            fingerprint = layout_fingerprint(odls, autoclave, self.constraints, elevated_tools)
+            cached = self._cached_layout(fingerprint, autoclave, hint)
+            if cached:
+                return cached
+        
+        items = self.build_items(odls, elevated_tools)
+        
+        layout, engine_name = self._solve_with_engine(items, autoclave, hint)
+        if layout:
+            self.record_engine(engine_name)
+            # Un layout troncato dalla deadline non va riusato da altre richieste
+            if fingerprint and not (self.deadline is not None and time.time() >= self.deadline):
+                payload = fingerprint.encode(layout, engine_name)
+                if payload:
+                    self.layout_cache.put(fingerprint.key, payload)
+        return layout
+    
+    def _cached_layout(
+        self,
+        fingerprint: LayoutFingerprint,
+        autoclave: Autoclave,
+        hint: Optional[BatchLayout]
+    ) -> Optional[BatchLayout]:
+        """Layout in cache per l'impronta, se c'è e non è peggiore dell'hint"""
+        payload, tier = self.layout_cache.get(fingerprint.key)
+        layout = fingerprint.decode(payload, autoclave) if payload else None
+        if layout is None or (hint and hint.efficiency > layout.efficiency):
+            self.solver_totals['layout_cache_misses'] += 1
+            return None
         
-        # Prepara items da posizionare
+        self.solver_totals['layout_cache_hits'] += 1
+        if tier == "disk":
+            self.solver_totals['layout_cache_disk_hits'] += 1
+        self.record_engine(payload['engine'])
+        return layout
+    
+    def build_items(
+        self,
+        odls: List[ODL],
+        elevated_tools: Optional[Dict[str, List[str]]] = None
+    ) -> List[Dict]:
+        """Prepara gli items da posizionare: un item per tool di ogni ODL"""
+        elevated_tools = elevated_tools or {}
         items = []
         for odl in odls:
             elevated_for_odl = elevated_tools.get(odl.id, [])
@@ -48,40 +266,187 @@ class NestingEngine:
                     'is_elevated': is_elevated,
                     'vacuum_lines': odl.vacuum_lines
                 })
+        return items
+    
+    def _solve_with_engine(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        hint: Optional[BatchLayout] = None
+    ) -> Tuple[Optional[BatchLayout], str]:
+        """Risolve con il motore configurato; restituisce layout e motore che l'ha prodotto"""
+        engine = self.constraints.engine
+        
+        if engine == "skyline":
+            layout = RectanglePacker(self.constraints).pack_best(items, autoclave)
+            if hint and (layout is None or hint.efficiency > layout.efficiency):
+                return hint, "skyline"
+            return layout, "skyline"
+        
+        if engine == "greedy":
+            return self._solve_with_greedy(items, autoclave), "greedy"
+        
+        if engine == "guillotine":
+            return RectanglePacker(self.constraints).pack_guillotine(items, autoclave), "guillotine"
+        
+        if engine == "genetic":
+            layout = GeneticSolver(self.constraints, deadline=self.deadline).solve(items, autoclave)
+            if hint and (layout is None or hint.efficiency > layout.efficiency):
+                return hint, "genetic"
+            return layout, "genetic"
+        
+        # Anteprima: nessun hint né solver, latenza di pochi millisecondi
+        if engine == "shelf":
+            return RectanglePacker(self.constraints).pack_shelf(items, autoclave), "shelf"
+        
+        # Portfolio: CP-SAT e motori euristici in gara in processi separati
+        if engine == "auto":
+            layout = PortfolioSolver(self).solve(items, autoclave, hint=hint)
+            return layout, self.last_portfolio.get('winner') or "auto"
+        
+        # Euristica rapida per partire da una soluzione già buona
+        heuristic = hint
+        if heuristic is None and self.constraints.warm_start:
+            heuristic = RectanglePacker(self.constraints).pack_best(items, autoclave)
+        
+        # Oltre lns_min_items il modello completo non converge: LNS sul layout euristico
+        lns_min_items = self.constraints.lns_min_items
+        if engine == "lns" or (lns_min_items and len(items) >= lns_min_items):
+            return LNSSolver(self).solve(items, autoclave, hint=heuristic), "lns"
         
         # Risolvi con CP-SAT
-        solution = self._solve_with_cpsat(items, autoclave)
+        solution = self._solve_with_cpsat(items, autoclave, hint=heuristic)
         
+        # Se CP-SAT non migliora il warm start (o lo restituisce già all'upper bound)
+        # il layout resta quello di partenza, riportato come "cpsat" con
+        # warm_start_won nelle metriche
         if solution and solution.placements:
-            return solution
+            won = heuristic is not None and (
+                solution is heuristic or heuristic.efficiency > solution.efficiency
+            )
+            self.record_warm_start(won)
+            return (heuristic if won else solution), "cpsat"
+        
+        if heuristic:
+            self.record_warm_start(True)
+            return heuristic, "cpsat"
         
         # Fallback: algoritmo greedy se CP-SAT fallisce
-        return self._solve_with_greedy(items, autoclave)
+        return self._solve_with_greedy(items, autoclave), "greedy"
     
     def _solve_with_cpsat(
         self,
         items: List[Dict],
-        autoclave: Autoclave
+        autoclave: Autoclave,
+        hint: Optional[BatchLayout] = None
     ) -> Optional[BatchLayout]:
-        """Risolve il problema di bin packing 2D con Constraint Programming"""
+        """
+        Risolve il problema di bin packing 2D con Constraint Programming.
+        Se è fornito un layout euristico (hint) lo usa come soluzione di partenza.
+        Con grid_resolution > 1 risolve prima su griglia grossolana e, se
+        richiesto, raffina a 1 mm partendo dalla soluzione trovata.
+        """
+        resolution = self.constraints.grid_resolution
+        if resolution <= 1:
+            return self._solve_cpsat_on_grid(items, autoclave, hint, 1)
         
-        model = cp_model.CpModel()
+        refine = self.constraints.grid_refinement
+        coarse = self._solve_cpsat_on_grid(
+            items, autoclave, hint, resolution, budget_share=0.7 if refine else 1.0
+        )
+        if not refine:
+            return coarse
+        
+        # La soluzione grossolana è ammissibile anche a 1 mm: diventa l'hint del raffinamento
+        start = coarse if coarse and (hint is None or coarse.efficiency >= hint.efficiency) else hint
+        refined = self._solve_cpsat_on_grid(items, autoclave, start, 1, budget_share=0.3)
+        
+        candidates = [layout for layout in (coarse, refined) if layout]
+        return max(candidates, key=lambda layout: layout.efficiency) if candidates else None
+    
+    def _solve_cpsat_on_grid(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        hint: Optional[BatchLayout],
+        resolution: int,
+        budget_share: float = 1.0
+    ) -> Optional[BatchLayout]:
+        """
+        Costruisce e risolve il modello CP-SAT su una griglia di passo resolution (mm).
+        Dimensioni tool e gap sono arrotondate per eccesso e l'area utile per difetto,
+        quindi ogni soluzione resta senza collisioni a piena risoluzione.
+        """
+        
+        build_start = time.time()
         
         # Dimensioni autoclave con margini
         max_x = int(autoclave.width - 2 * self.constraints.min_border_distance)
         max_y = int(autoclave.height - 2 * self.constraints.min_border_distance)
         
+        time_limit, workers = self._solver_budget(items, max_x, max_y)
+        time_limit *= budget_share
+        if time_limit <= 0:
+            # Deadline della richiesta già superata: niente CP-SAT
+            self._record_solve({
+                'cpsat_model': self.constraints.cpsat_model,
+                'grid_resolution': resolution,
+                'items': len(items),
+                'build_time': 0.0,
+                'solve_time': 0.0,
+                'time_limit': 0.0,
+                'workers': 0,
+                'status': 'SKIPPED',
+                'stop_reason': 'deadline'
+            })
+            return None
+        
+        # Hint già all'upper bound sull'area: ottimo dimostrato, il modello non serve
+        upper_bound = self._area_upper_bound(items, autoclave, max_x, max_y)
+        if hint is not None and placed_area(hint, items) >= upper_bound:
+            self._record_solve({
+                'cpsat_model': self.constraints.cpsat_model,
+                'grid_resolution': resolution,
+                'items': len(items),
+                'build_time': round(time.time() - build_start, 4),
+                'solve_time': 0.0,
+                'time_limit': round(time_limit, 2),
+                'workers': 0,
+                'status': 'SKIPPED',
+                'stop_reason': 'upper_bound',
+                'upper_bound': upper_bound,
+                'warm_start_efficiency': hint.efficiency,
+                'warm_start_bound': True
+            })
+            return hint
+        
+        # Dimensioni sulla griglia del modello
+        grid_max_x = max_x // resolution
+        grid_max_y = max_y // resolution
+        gap = math.ceil(self.constraints.min_tool_distance / resolution)
+        dims = [self._grid_dims(item['tool'], resolution) for item in items]
+        
+        # Grafo dei conflitti: scarta gli item che non entrano nemmeno da soli
+        input_count = len(items)
+        graph = None
+        if self.constraints.conflict_pruning:
+            graph = self._conflict_graph(items, resolution, gap, grid_max_x, grid_max_y)
+            if not graph.fits.all():
+                items = [item for item, fits in zip(items, graph.fits) if fits]
+                dims = [d for d, fits in zip(dims, graph.fits) if fits]
+                graph = self._conflict_graph(items, resolution, gap, grid_max_x, grid_max_y)
+        
+        model = cp_model.CpModel()
+        
         # Variabili per ogni item
         positions = []
         rotations = []
         selected = []
         
         for i, item in enumerate(items):
-            tool = item['tool']
-            
             # Posizione (x, y)
-            x_var = model.NewIntVar(0, max_x, f'x_{i}')
-            y_var = model.NewIntVar(0, max_y, f'y_{i}')
+            x_var = model.NewIntVar(0, grid_max_x, f'x_{i}')
+            y_var = model.NewIntVar(0, grid_max_y, f'y_{i}')
             
             # Rotazione (0 = no, 1 = 90°)
             if self.constraints.allow_rotation:
@@ -96,73 +461,23 @@ class NestingEngine:
             rotations.append(rot_var)
             selected.append(sel_var)
         
-        # Vincoli di non-sovrapposizione
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                tool_i = items[i]['tool']
-                tool_j = items[j]['tool']
-                
-                # Calcola dimensioni effettive considerando rotazione
-                w_i = model.NewIntVar(0, max(int(tool_i.width), int(tool_i.height)), f'w_{i}')
-                h_i = model.NewIntVar(0, max(int(tool_i.width), int(tool_i.height)), f'h_{i}')
-                w_j = model.NewIntVar(0, max(int(tool_j.width), int(tool_j.height)), f'w_{j}')
-                h_j = model.NewIntVar(0, max(int(tool_j.width), int(tool_j.height)), f'h_{j}')
-                
-                # Se non ruotato: w = width, h = height
-                # Se ruotato: w = height, h = width
-                model.Add(w_i == int(tool_i.width)).OnlyEnforceIf(rotations[i].Not())
-                model.Add(h_i == int(tool_i.height)).OnlyEnforceIf(rotations[i].Not())
-                model.Add(w_i == int(tool_i.height)).OnlyEnforceIf(rotations[i])
-                model.Add(h_i == int(tool_i.width)).OnlyEnforceIf(rotations[i])
-                
-                model.Add(w_j == int(tool_j.width)).OnlyEnforceIf(rotations[j].Not())
-                model.Add(h_j == int(tool_j.height)).OnlyEnforceIf(rotations[j].Not())
-                model.Add(w_j == int(tool_j.height)).OnlyEnforceIf(rotations[j])
-                model.Add(h_j == int(tool_j.width)).OnlyEnforceIf(rotations[j])
-                
-                # Non-sovrapposizione se entrambi selezionati
-                # Almeno una delle seguenti deve essere vera:
-                # 1. i è a sinistra di j
-                # 2. j è a sinistra di i  
-                # 3. i è sopra j
-                # 4. j è sopra i
-                # 5. Almeno uno non è selezionato
-                
-                gap = int(self.constraints.min_tool_distance)
-                
-                left_of = model.NewBoolVar(f'left_{i}_{j}')
-                right_of = model.NewBoolVar(f'right_{i}_{j}')
-                above_of = model.NewBoolVar(f'above_{i}_{j}')
-                below_of = model.NewBoolVar(f'below_{i}_{j}')
-                
-                model.Add(positions[i][0] + w_i + gap <= positions[j][0]).OnlyEnforceIf(left_of)
-                model.Add(positions[j][0] + w_j + gap <= positions[i][0]).OnlyEnforceIf(right_of)
-                model.Add(positions[i][1] + h_i + gap <= positions[j][1]).OnlyEnforceIf(above_of)
-                model.Add(positions[j][1] + h_j + gap <= positions[i][1]).OnlyEnforceIf(below_of)
-                
-                # Almeno una condizione deve essere vera se entrambi selezionati
-                model.AddBoolOr([
-                    left_of, right_of, above_of, below_of,
-                    selected[i].Not(), selected[j].Not()
-                ])
+        # Vincoli di non-sovrapposizione e contenimento
+        if self.constraints.cpsat_model == 'no_overlap_2d':
+            self._add_no_overlap_2d_constraints(
+                model, dims, gap, positions, rotations, selected, grid_max_x, grid_max_y
+            )
+        else:
+            self._add_pairwise_constraints(
+                model, dims, gap, positions, rotations, selected, grid_max_x, grid_max_y, graph
+            )
         
-        # Vincoli di contenimento nell'autoclave
-        for i, item in enumerate(items):
-            tool = item['tool']
-            x_var, y_var = positions[i]
-            
-            # Dimensioni effettive
-            w_eff = model.NewIntVar(0, max(int(tool.width), int(tool.height)), f'w_eff_{i}')
-            h_eff = model.NewIntVar(0, max(int(tool.width), int(tool.height)), f'h_eff_{i}')
-            
-            model.Add(w_eff == int(tool.width)).OnlyEnforceIf(rotations[i].Not())
-            model.Add(h_eff == int(tool.height)).OnlyEnforceIf(rotations[i].Not())
-            model.Add(w_eff == int(tool.height)).OnlyEnforceIf(rotations[i])
-            model.Add(h_eff == int(tool.width)).OnlyEnforceIf(rotations[i])
-            
-            # Deve stare dentro se selezionato
-            model.Add(x_var + w_eff <= max_x).OnlyEnforceIf(selected[i])
-            model.Add(y_var + h_eff <= max_y).OnlyEnforceIf(selected[i])
+        # Coppie che non possono coesistere: al più un item per clique di conflitti
+        if graph is not None:
+            for clique in graph.cliques():
+                model.AddAtMostOne(selected[i] for i in clique)
+        
+        if self.constraints.symmetry_breaking:
+            self._add_symmetry_breaking(model, items, dims, positions, rotations, selected)
         
         # Vincolo linee del vuoto
         total_vacuum_lines = sum(
@@ -178,12 +493,61 @@ class NestingEngine:
         )
         model.Maximize(total_area)
         
+        hint_area = None
+        if hint is not None:
+            hint_area = self._add_solution_hint(
+                model, items, dims, gap, positions, rotations, selected,
+                hint, grid_max_x, grid_max_y, resolution
+            )
+            if hint_area is not None:
+                # Lower bound: la soluzione euristica è già ammissibile
+                model.Add(total_area >= hint_area)
+        
         # Risolvi
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = min(60, self.constraints.timeout_seconds)
-        solver.parameters.num_search_workers = self.constraints.solver_threads
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_search_workers = workers
         
-        status = solver.Solve(model)
+        monitor = _SolveMonitor(
+            solver,
+            upper_bound,
+            self.constraints.stall_seconds if self.constraints.adaptive_budget else None
+        )
+        
+        build_time = time.time() - build_start
+        solve_start = time.time()
+        monitor.start()
+        status = solver.Solve(model, monitor)
+        monitor.stop()
+        
+        if monitor.stop_reason:
+            stop_reason = monitor.stop_reason
+        elif status == cp_model.OPTIMAL:
+            stop_reason = 'optimal'
+        elif status == cp_model.INFEASIBLE:
+            stop_reason = 'infeasible'
+        elif self.deadline is not None and time.time() >= self.deadline:
+            stop_reason = 'deadline'
+        else:
+            stop_reason = 'time_limit'
+        
+        self._record_solve({
+            'cpsat_model': self.constraints.cpsat_model,
+            'grid_resolution': resolution,
+            'items': input_count,
+            'dropped_items': input_count - len(items),
+            'conflicts': graph.conflict_count() if graph is not None else None,
+            'model_constraints': len(model.Proto().constraints),
+            'build_time': round(build_time, 4),
+            'solve_time': round(time.time() - solve_start, 4),
+            'time_limit': round(time_limit, 2),
+            'workers': workers,
+            'status': solver.StatusName(status),
+            'stop_reason': stop_reason,
+            'upper_bound': upper_bound,
+            'warm_start_efficiency': hint.efficiency if hint else None,
+            'warm_start_bound': hint_area is not None
+        })
         
         if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
             # Estrai soluzione
@@ -194,8 +558,8 @@ class NestingEngine:
             for i, item in enumerate(items):
                 if solver.Value(selected[i]):
                     tool = item['tool']
-                    x = solver.Value(positions[i][0]) + self.constraints.min_border_distance
-                    y = solver.Value(positions[i][1]) + self.constraints.min_border_distance
+                    x = solver.Value(positions[i][0]) * resolution + self.constraints.min_border_distance
+                    y = solver.Value(positions[i][1]) * resolution + self.constraints.min_border_distance
                     rotated = bool(solver.Value(rotations[i]))
                     
                     if rotated:
@@ -231,103 +595,367 @@ class NestingEngine:
         
         return None
     
+    def _conflict_graph(
+        self,
+        items: List[Dict],
+        resolution: int,
+        gap: int,
+        max_x: int,
+        max_y: int
+    ) -> ConflictGraph:
+        """Grafo dei conflitti calcolato sui tipi di item ed espanso sui singoli item"""
+        types = aggregate_items(items)
+        type_dims = [self._grid_dims(items[t.indices[0]]['tool'], resolution) for t in types]
+        graph = build_conflict_graph(type_dims, gap, max_x, max_y, self.constraints.allow_rotation)
+        return graph.expand(type_of_items(types, len(items)))
+    
+    def _grid_dims(self, tool: Tool, resolution: int) -> Tuple[int, int]:
+        """Dimensioni del tool sulla griglia del modello, arrotondate per eccesso"""
+        return math.ceil(tool.width / resolution), math.ceil(tool.height / resolution)
+    
+    def _solver_budget(self, items: List[Dict], max_x: int, max_y: int) -> Tuple[float, int]:
+        """
+        Politica di budget del solver: (secondi, worker).
+        Con adaptive_budget il tempo cresce con il numero di item e con il rapporto
+        tra area richiesta e area utile; i worker crescono con il numero di item.
+        Il tempo è sempre limitato dalla deadline globale della richiesta.
+        """
+        time_limit = float(min(60, self.constraints.timeout_seconds))
+        workers = self.constraints.solver_threads
+        
+        if self.constraints.adaptive_budget:
+            usable_area = max(max_x * max_y, 1)
+            area_ratio = sum(item['tool'].area for item in items) / usable_area
+            
+            # Istanze che entrano comodamente sono facili; oltre 2x l'area utile
+            # la difficoltà non cresce più
+            difficulty = min(max(area_ratio, 0.25), 2.0)
+            time_limit = min(time_limit, 1.0 + 0.25 * len(items) * difficulty)
+            
+            if len(items) <= 8:
+                workers = min(workers, 2)
+            elif len(items) <= 20:
+                workers = min(workers, 4)
+        
+        if self.deadline is not None:
+            time_limit = min(time_limit, self.deadline - time.time())
+        
+        return time_limit, workers
+    
+    def _area_upper_bound(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        max_x: int,
+        max_y: int
+    ) -> int:
+        """
+        Upper bound sull'obiettivo (area selezionata): area della griglia del
+        modello e bound del modulo bounds (knapsack esatto sulle linee del vuoto,
+        knapsack frazionario sui footprint allargati di gap).
+        """
+        return int(min(max_x * max_y, max_batch_area(items, autoclave, self.constraints)))
+    
+    def _record_solve(self, stats: Dict):
+        """Registra le statistiche dell'ultima chiamata e aggiorna i totali della richiesta"""
+        self.last_solve_stats = stats
+        self.solver_totals['calls'] += 1
+        self.solver_totals['time_spent'] += stats['build_time'] + stats['solve_time']
+        reasons = self.solver_totals['stop_reasons']
+        reasons[stats['stop_reason']] = reasons.get(stats['stop_reason'], 0) + 1
+    
+    def _add_solution_hint(
+        self,
+        model: cp_model.CpModel,
+        items: List[Dict],
+        dims: List[Tuple[int, int]],
+        gap: int,
+        positions: List[Tuple],
+        rotations: List,
+        selected: List,
+        hint: BatchLayout,
+        max_x: int,
+        max_y: int,
+        resolution: int = 1
+    ) -> Optional[int]:
+        """
+        Passa a CP-SAT il layout euristico come hint su x, y, rot e sel.
+        Restituisce l'area (nella scala dell'obiettivo) se l'hint è ammissibile
+        anche sulla griglia intera del modello, altrimenti None.
+        """
+        border = self.constraints.min_border_distance
+        placement_by_key = {(p.odl_id, p.tool_id): p for p in hint.placements}
+        
+        # Valori per item: (sel, x, y, rot) in coordinate del modello
+        values = []
+        for item, (width, height) in zip(items, dims):
+            placement = placement_by_key.get((item['odl_id'], item['tool_id']))
+            if placement is None:
+                values.append((0, 0, 0, 0))
+                continue
+            rotated = placement.rotated and width != height
+            values.append((
+                1,
+                int(round((placement.x - border) / resolution)),
+                int(round((placement.y - border) / resolution)),
+                int(rotated)
+            ))
+        
+        # Con symmetry breaking l'hint deve rispettare l'ordine (selected, y, x) nei gruppi
+        if self.constraints.symmetry_breaking:
+            for group in self._find_identical_item_groups(items):
+                ordered = sorted(
+                    (values[i] for i in group),
+                    key=lambda v: (-v[0], v[2], v[1])
+                )
+                for i, value in zip(group, ordered):
+                    values[i] = value
+        
+        for i, (sel, x, y, rot) in enumerate(values):
+            model.AddHint(selected[i], sel)
+            model.AddHint(positions[i][0], x)
+            model.AddHint(positions[i][1], y)
+            if self.constraints.allow_rotation:
+                model.AddHint(rotations[i], rot)
+        
+        # Verifica ammissibilità sulla griglia del modello prima di usarla come bound
+        rects = []
+        for (sel, x, y, rot), (width, height) in zip(values, dims):
+            if not sel:
+                continue
+            w, h = (height, width) if rot else (width, height)
+            if x < 0 or y < 0 or x + w > max_x or y + h > max_y:
+                return None
+            rects.append((x, y, x + w, y + h))
+        
+        for i, (x1, y1, x2, y2) in enumerate(rects):
+            for x3, y3, x4, y4 in rects[i + 1:]:
+                if not (x2 + gap <= x3 or x4 + gap <= x1 or y2 + gap <= y3 or y4 + gap <= y1):
+                    return None
+        
+        return sum(
+            int(item['tool'].area)
+            for (sel, _, _, _), item in zip(values, items)
+            if sel
+        )
+    
+    def _add_pairwise_constraints(
+        self,
+        model: cp_model.CpModel,
+        dims: List[Tuple[int, int]],
+        gap: int,
+        positions: List[Tuple],
+        rotations: List,
+        selected: List,
+        max_x: int,
+        max_y: int,
+        graph: Optional[ConflictGraph] = None
+    ):
+        """
+        Formulazione classica: disgiunzioni reificate per ogni coppia di item.
+        Con il grafo dei conflitti si creano solo le relazioni geometricamente
+        possibili e si saltano le coppie in conflitto (coperte da AddAtMostOne).
+        """
+        
+        # Dimensioni effettive considerando rotazione, una coppia di variabili per item
+        effective = []
+        for i, (width, height) in enumerate(dims):
+            w_eff = model.NewIntVar(0, max(width, height), f'w_eff_{i}')
+            h_eff = model.NewIntVar(0, max(width, height), f'h_eff_{i}')
+            
+            # Se non ruotato: w = width, h = height
+            # Se ruotato: w = height, h = width
+            model.Add(w_eff == width).OnlyEnforceIf(rotations[i].Not())
+            model.Add(h_eff == height).OnlyEnforceIf(rotations[i].Not())
+            model.Add(w_eff == height).OnlyEnforceIf(rotations[i])
+            model.Add(h_eff == width).OnlyEnforceIf(rotations[i])
+            effective.append((w_eff, h_eff))
+        
+        # Vincoli di non-sovrapposizione
+        for i in range(len(dims)):
+            for j in range(i + 1, len(dims)):
+                if graph is not None and not (graph.horizontal[i, j] or graph.vertical[i, j]):
+                    continue
+                
+                w_i, h_i = effective[i]
+                w_j, h_j = effective[j]
+                
+                # Non-sovrapposizione se entrambi selezionati
+                # Almeno una delle seguenti deve essere vera:
+                # 1. i è a sinistra di j
+                # 2. j è a sinistra di i  
+                # 3. i è sopra j
+                # 4. j è sopra i
+                # 5. Almeno uno non è selezionato
+                literals = [selected[i].Not(), selected[j].Not()]
+                
+                if graph is None or graph.horizontal[i, j]:
+                    left_of = model.NewBoolVar(f'left_{i}_{j}')
+                    right_of = model.NewBoolVar(f'right_{i}_{j}')
+                    model.Add(positions[i][0] + w_i + gap <= positions[j][0]).OnlyEnforceIf(left_of)
+                    model.Add(positions[j][0] + w_j + gap <= positions[i][0]).OnlyEnforceIf(right_of)
+                    literals += [left_of, right_of]
+                
+                if graph is None or graph.vertical[i, j]:
+                    above_of = model.NewBoolVar(f'above_{i}_{j}')
+                    below_of = model.NewBoolVar(f'below_{i}_{j}')
+                    model.Add(positions[i][1] + h_i + gap <= positions[j][1]).OnlyEnforceIf(above_of)
+                    model.Add(positions[j][1] + h_j + gap <= positions[i][1]).OnlyEnforceIf(below_of)
+                    literals += [above_of, below_of]
+                
+                # Almeno una condizione deve essere vera se entrambi selezionati
+                model.AddBoolOr(literals)
+        
+        # Vincoli di contenimento nell'autoclave
+        for i, (w_eff, h_eff) in enumerate(effective):
+            x_var, y_var = positions[i]
+            
+            # Deve stare dentro se selezionato
+            model.Add(x_var + w_eff <= max_x).OnlyEnforceIf(selected[i])
+            model.Add(y_var + h_eff <= max_y).OnlyEnforceIf(selected[i])
+    
+    def _add_no_overlap_2d_constraints(
+        self,
+        model: cp_model.CpModel,
+        dims: List[Tuple[int, int]],
+        gap: int,
+        positions: List[Tuple],
+        rotations: List,
+        selected: List,
+        max_x: int,
+        max_y: int
+    ):
+        """
+        Formulazione a intervalli opzionali con AddNoOverlap2D.
+        Ogni orientazione è un intervallo alternativo attivo solo se l'item è
+        selezionato; il gap è ottenuto gonfiando gli intervalli di min_tool_distance.
+        """
+        x_intervals = []
+        y_intervals = []
+        
+        for i, (width, height) in enumerate(dims):
+            x_var, y_var = positions[i]
+            
+            # Orientazioni alternative: (larghezza, altezza, letterale di presenza)
+            if self.constraints.allow_rotation and width != height:
+                normal = model.NewBoolVar(f'normal_{i}')
+                rotated = model.NewBoolVar(f'rotated_{i}')
+                model.Add(normal + rotated == selected[i])
+                model.Add(rotations[i] == rotated)
+                orientations = [(width, height, normal), (height, width, rotated)]
+            else:
+                model.Add(rotations[i] == 0)
+                orientations = [(width, height, selected[i])]
+            
+            for k, (w, h, present) in enumerate(orientations):
+                # Deve stare dentro se selezionato con questa orientazione
+                model.Add(x_var + w <= max_x).OnlyEnforceIf(present)
+                model.Add(y_var + h <= max_y).OnlyEnforceIf(present)
+                
+                x_intervals.append(model.NewOptionalFixedSizeIntervalVar(
+                    x_var, w + gap, present, f'x_int_{i}_{k}'
+                ))
+                y_intervals.append(model.NewOptionalFixedSizeIntervalVar(
+                    y_var, h + gap, present, f'y_int_{i}_{k}'
+                ))
+        
+        model.AddNoOverlap2D(x_intervals, y_intervals)
+    
+    def _find_identical_item_groups(self, items: List[Dict]) -> List[List[int]]:
+        """
+        Raggruppa gli indici degli item intercambiabili nel modello:
+        stesse dimensioni e stesso consumo di linee vuoto.
+        Restituisce solo i gruppi con almeno due elementi.
+        """
+        return [t.indices for t in aggregate_items(items) if t.count > 1]
+    
+    def _add_symmetry_breaking(
+        self,
+        model: cp_model.CpModel,
+        items: List[Dict],
+        dims: List[Tuple[int, int]],
+        positions: List[Tuple],
+        rotations: List,
+        selected: List
+    ):
+        """
+        Elimina soluzioni equivalenti per permutazione di item identici.
+        Entro ogni gruppo impone l'ordine lessicografico su (selected, y, x):
+        un item può essere selezionato solo se lo è il precedente e, se entrambi
+        sono selezionati, il precedente sta più in basso (a parità di y, più a sinistra).
+        """
+        # Item non selezionati e tool quadrati: valori canonici per le variabili libere
+        for i, (width, height) in enumerate(dims):
+            x_var, y_var = positions[i]
+            model.Add(x_var == 0).OnlyEnforceIf(selected[i].Not())
+            model.Add(y_var == 0).OnlyEnforceIf(selected[i].Not())
+            model.Add(rotations[i] == 0).OnlyEnforceIf(selected[i].Not())
+            
+            if width == height:
+                model.Add(rotations[i] == 0)
+        
+        for group in self._find_identical_item_groups(items):
+            for a, b in zip(group, group[1:]):
+                x_a, y_a = positions[a]
+                x_b, y_b = positions[b]
+                
+                # Seleziona prima l'indice più basso
+                model.AddImplication(selected[b], selected[a])
+                
+                # Ordine lessicografico (y, x) tra item selezionati
+                same_row = model.NewBoolVar(f'sym_row_{a}_{b}')
+                model.Add(y_a == y_b).OnlyEnforceIf(same_row)
+                model.Add(y_a < y_b).OnlyEnforceIf([same_row.Not(), selected[b]])
+                model.Add(x_a <= x_b).OnlyEnforceIf([same_row, selected[b]])
+    
     def _solve_with_greedy(
         self,
         items: List[Dict],
         autoclave: Autoclave
     ) -> Optional[BatchLayout]:
-        """Algoritmo greedy di fallback: Bottom-Left-Fill"""
+        """
+        Algoritmo greedy di fallback: MaxRects sui rettangoli liberi massimali,
+        con regola di scelta constraints.maxrects_rule. A differenza della vecchia
+        scansione a griglia da 10 mm non dipende dalle dimensioni dell'autoclave
+        e considera anche posizioni fuori reticolo.
+        """
         
         # Ordina per area decrescente
         sorted_items = sorted(items, key=lambda x: x['tool'].area, reverse=True)
         
-        placements = []
-        occupied_rects = []
+        packer = RectanglePacker(self.constraints)
+        maxrects = MaxRects(
+            autoclave.width, autoclave.height, self.constraints, self.constraints.maxrects_rule
+        )
+        
         total_weight = 0
         vacuum_used = 0
-        
-        border = self.constraints.min_border_distance
-        gap = self.constraints.min_tool_distance
+        rejected = set()
         
         for item in sorted_items:
-            tool = item['tool']
-            
             # Controlla vincolo linee vuoto
             if vacuum_used + item['vacuum_lines'] > autoclave.vacuum_lines:
                 continue
             
-            # Prova a posizionare con e senza rotazione
-            best_position = None
-            best_rotated = False
-            best_y = float('inf')
+            # Tool identici a uno già rifiutato non entrano più
+            orientations = packer.orientations(item)
+            shape = packer.shape(orientations)
+            if shape in rejected:
+                continue
             
-            for rotated in [False, True] if self.constraints.allow_rotation else [False]:
-                if rotated:
-                    width, height = tool.height, tool.width
-                else:
-                    width, height = tool.width, tool.height
-                
-                # Trova posizione bottom-left
-                for y in range(int(border), int(autoclave.height - height - border), 10):
-                    for x in range(int(border), int(autoclave.width - width - border), 10):
-                        # Verifica non-sovrapposizione
-                        rect = (x, y, x + width, y + height)
-                        
-                        if not any(self._rectangles_overlap(rect, occ, gap) for occ in occupied_rects):
-                            if y < best_y:
-                                best_position = (x, y)
-                                best_rotated = rotated
-                                best_y = y
-                            break
+            # Prova con e senza rotazione, tiene il punteggio migliore
+            best = None
+            for rect in orientations:
+                found = maxrects.find_best_position(rect)
+                if found and (best is None or found[0] < best[0]):
+                    best = (found[0], rect, found[1], found[2])
             
-            if best_position:
-                x, y = best_position
-                if best_rotated:
-                    width, height = tool.height, tool.width
-                else:
-                    width, height = tool.width, tool.height
-                
-                placements.append(Placement(
-                    odl_id=item['odl_id'],
-                    tool_id=item['tool_id'],
-                    x=x,
-                    y=y,
-                    width=width,
-                    height=height,
-                    rotated=best_rotated,
-                    level=1 if item['is_elevated'] else 0
-                ))
-                
-                occupied_rects.append((x, y, x + width, y + height))
-                total_weight += tool.weight
+            if best:
+                _, rect, x, y = best
+                maxrects.place_at(rect, x, y)
+                total_weight += item['tool'].weight
                 vacuum_used += item['vacuum_lines']
+            else:
+                rejected.add(shape)
         
-        if placements:
-            used_area = sum(p.width * p.height for p in placements)
-            efficiency = used_area / autoclave.area
-            
-            return BatchLayout(
-                autoclave_id=autoclave.id,
-                placements=placements,
-                efficiency=round(efficiency, 3),
-                total_weight=round(total_weight, 2),
-                vacuum_lines_used=vacuum_used
-            )
-        
-        return None
-    
-    def _rectangles_overlap(self, rect1: Tuple, rect2: Tuple, gap: float) -> bool:
-        """Verifica se due rettangoli si sovrappongono considerando gap"""
-        x1, y1, x2, y2 = rect1
-        x3, y3, x4, y4 = rect2
-        
-        # Calcola distanza minima richiesta tra i rettangoli
-        # Due rettangoli si sovrappongono se la distanza è minore del gap
-        
-        # Distanza orizzontale (negativa se si sovrappongono)
-        dx = max(0, max(x1, x3) - min(x2, x4))
-        # Distanza verticale (negativa se si sovrappongono)  
-        dy = max(0, max(y1, y3) - min(y2, y4))
-        
-        # Si sovrappongono se entrambe le distanze sono < gap
-        return dx < gap and dy < gap
\ No newline at end of file
+        return packer.build_layout(maxrects, autoclave, vacuum_used, total_weight)
@@ -5,6 +5,7 @@ import math
 
 from domain.entities import Tool, ODL, Autoclave, Placement, BatchLayout
 from core.optimization.constraints import NestingConstraints
+from core.optimization.spatial_index import SpatialIndex
 
 class NestingEngine:
     """Motore di ottimizzazione per nesting 2D con OR-Tools"""
@@ -1288,6 +1289,7 @@ class NestingEngine:
         
         placements = []
         placed_rectangles = []  # Lista di (x, y, width, height)
+        placed_index = SpatialIndex()  # Stessi rettangoli, per query O(1) in n
         total_weight = 0
         vacuum_used = 0
         
@@ -1313,7 +1315,7 @@ class NestingEngine:
             for width, height, rotated in orientations:
                 # Cerca posizione Bottom-Left
                 position = self._find_bottom_left_position(
-                    width, height, placed_rectangles, autoclave, border, gap
+                    width, height, placed_rectangles, autoclave, border, gap, placed_index
                 )
                 
                 if position is None:
@@ -1323,7 +1325,7 @@ class NestingEngine:
                 
                 # Calcola "waste" per questa posizione (Bottom-Left-Fill heuristic)
                 waste = self._calculate_position_waste(
-                    x, y, width, height, placed_rectangles, autoclave
+                    x, y, width, height, placed_rectangles, autoclave, placed_index
                 )
                 
                 if waste < best_waste:
@@ -1351,6 +1353,7 @@ class NestingEngine:
                 ))
                 
                 placed_rectangles.append((x, y, width, height))
+                placed_index.insert(x, y, x + width, y + height)
                 total_weight += tool.weight
                 vacuum_used += item['vacuum_lines']
         
@@ -1375,7 +1378,8 @@ class NestingEngine:
         placed_rectangles: List[Tuple], 
         autoclave: Autoclave, 
         border: float, 
-        gap: float
+        gap: float,
+        index: Optional[SpatialIndex] = None
     ) -> Optional[Tuple[float, float]]:
         """
         Trova posizione Bottom-Left ottimale.
@@ -1408,7 +1412,7 @@ class NestingEngine:
             
             # Verifica non-overlap
             new_rect = (x, y, width, height)
-            if not self._has_overlap_with_gap(new_rect, placed_rectangles, gap):
+            if not self._has_overlap_with_gap(new_rect, placed_rectangles, gap, index):
                 valid_positions.append((x, y))
         
         if not valid_positions:
@@ -1425,7 +1429,8 @@ class NestingEngine:
         width: float,
         height: float,
         placed_rectangles: List[Tuple],
-        autoclave: Autoclave
+        autoclave: Autoclave,
+        index: Optional[SpatialIndex] = None
     ) -> float:
         """
         Calcola "waste" per una posizione (Bottom-Left-Fill heuristic).
@@ -1441,13 +1446,13 @@ class NestingEngine:
         # Calcola spazio vuoto sotto (campionamento ridotto per performance)
         for check_x in range(int(x), int(x + width), 50):
             for check_y in range(0, int(y), 50):
-                if not self._point_covered_by_rectangles(check_x, check_y, placed_rectangles):
+                if not self._point_covered_by_rectangles(check_x, check_y, placed_rectangles, index):
                     empty_space += 2500  # 50x50 grid
         
         # Calcola spazio vuoto a sinistra
         for check_x in range(0, int(x), 50):
             for check_y in range(int(y), int(y + height), 50):
-                if not self._point_covered_by_rectangles(check_x, check_y, placed_rectangles):
+                if not self._point_covered_by_rectangles(check_x, check_y, placed_rectangles, index):
                     empty_space += 2500
         
         return distance_penalty + empty_space * 0.01
@@ -1456,9 +1461,12 @@ class NestingEngine:
         self, 
         px: float, 
         py: float, 
-        rectangles: List[Tuple]
+        rectangles: List[Tuple],
+        index: Optional[SpatialIndex] = None
     ) -> bool:
         """Verifica se un punto è coperto da rettangoli esistenti"""
+        if index is not None:
+            return index.contains_point(px, py)
         for x, y, w, h in rectangles:
             if x <= px <= x + w and y <= py <= y + h:
                 return True
@@ -1468,11 +1476,16 @@ class NestingEngine:
         self, 
         new_rect: Tuple, 
         placed_rectangles: List[Tuple], 
-        gap: float
+        gap: float,
+        index: Optional[SpatialIndex] = None
     ) -> bool:
         """Verifica overlap considerando gap"""
         x1, y1, w1, h1 = new_rect
         
+        # Con l'indice: il nuovo rettangolo allargato del gap contro quelli posizionati
+        if index is not None:
+            return index.overlaps(x1 - gap, y1 - gap, x1 + w1 + gap, y1 + h1 + gap)
+        
         for x2, y2, w2, h2 in placed_rectangles:
             # Espandi rettangolo esistente del gap
             expanded = (x2 - gap, y2 - gap, w2 + 2*gap, h2 + 2*gap)
@@ -0,0 +1,32 @@
+"""
+Utility per l'esecuzione parallela dei motori di nesting
+=========================================================
+
+Contesto multiprocessing e dimensionamento dei worker condivisi dai motori
+che distribuiscono lavoro su processi (portfolio, multi-start Skyline).
+"""
+
+import multiprocessing
+import os
+
+
+def process_context():
+    """
+    Forkserver dove disponibile, altrimenti spawn. Mai fork: il servizio API
+    chiama i motori con thread attivi (uvicorn, ricerca CP-SAT, watchdog dello
+    stallo) e un fork con lock acquisiti da altri thread può bloccarsi.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def worker_count(requested: int, jobs: int) -> int:
+    """
+    Processi da usare: requested se > 0, altrimenti i core disponibili; mai più
+    dei job. Dentro un processo daemon (che non può avere figli) sempre 1.
+    """
+    if multiprocessing.current_process().daemon:
+        return 1
+    workers = requested if requested > 0 else (os.cpu_count() or 1)
+    return max(1, min(workers, jobs))
@@ -0,0 +1,309 @@
+"""
+Rifinitura dei Batch con Local Search
+=====================================
+
+Fase opzionale dopo la creazione dei batch (constraints.polish). Sposta ODL
+tra i batch dello stesso ciclo di cura, anche su autoclavi diverse, con tre
+mosse: move (un ODL in un altro batch), swap (due ODL tra due batch) ed
+ejection chain (l'ODL entra in un batch espellendone un altro, che passa a un
+terzo batch). Si accettano solo mosse migliorative: prima meno batch, poi somma
+dei quadrati dei riempimenti, che premia il consolidamento dei batch pieni e
+lo svuotamento dei deboli. I tool posizionati restano gli stessi: ogni mossa
+trasferisce i soli tool già posizionati dell'ODL.
+
+Ogni candidato (insieme di tool su un'autoclave) passa per controlli di costo
+crescente: memo dei candidati già valutati, bound (linee del vuoto, ingresso
+dei tool, area massima ottenibile), inserimento incrementale MaxRects nello
+spazio libero del layout rimasto e solo infine re-pack completo con la
+Skyline. La ricerca si ferma all'ottimo locale o al budget rigido
+(polish_time_budget e deadline della richiesta).
+"""
+
+import time
+from typing import List, Dict, Optional, Tuple, FrozenSet
+
+from domain.entities import ODL, Autoclave, BatchLayout
+from core.optimization.constraints import NestingConstraints
+from core.optimization.rectangle_packer import RectanglePacker, MaxRects, Rectangle
+from core.optimization.bounds import fits, max_batch_area
+
+# Mosse della local search, nell'ordine in cui vengono provate
+POLISH_MOVES = ("move", "swap", "ejection")
+
+# Chiave di un item: (odl_id, tool_id)
+ItemKey = Tuple[str, str]
+
+# Esito di una mossa: nuovo layout per indice di batch (None = batch svuotato)
+Change = Dict[int, Optional[BatchLayout]]
+
+
+class BatchPolisher:
+    """Local search tra batch dello stesso ciclo sotto un budget rigido"""
+
+    def __init__(self, constraints: NestingConstraints, deadline: Optional[float] = None):
+        self.constraints = constraints
+        self.deadline = deadline
+        self.packer = RectanglePacker(constraints)
+        self.last_run: Dict = {}
+
+    def polish(
+        self,
+        batches: List[BatchLayout],
+        odls: List[ODL],
+        autoclaves: List[Autoclave],
+        elevated_tools: Optional[Dict[str, List[str]]] = None
+    ) -> List[BatchLayout]:
+        """
+        Restituisce i batch rifiniti (i batch svuotati spariscono). Batch con
+        autoclave o ODL sconosciuti restano invariati e fuori dalla ricerca.
+        """
+        started = time.time()
+        budget_end = started + self.constraints.polish_time_budget
+        if self.deadline is not None:
+            budget_end = min(budget_end, self.deadline)
+
+        elevated_tools = elevated_tools or {}
+        odl_by_id = {odl.id: odl for odl in odls}
+        self._autoclaves = {a.id: a for a in autoclaves}
+        self._items: Dict[ItemKey, Dict] = {
+            (item['odl_id'], item['tool_id']): item
+            for odl in odls
+            for item in RectanglePacker.odl_items(odl, elevated_tools.get(odl.id))
+        }
+        self._memo: Dict[Tuple[FrozenSet[ItemKey], str], Optional[BatchLayout]] = {}
+        self._counters = {'evaluations': 0, 'memo_hits': 0, 'bound_rejections': 0,
+                          'incremental': 0, 'repacks': 0}
+
+        layouts: List[Optional[BatchLayout]] = list(batches)
+        cycles: List[Optional[str]] = []
+        for batch in batches:
+            known = batch.autoclave_id in self._autoclaves and all(
+                (p.odl_id, p.tool_id) in self._items for p in batch.placements
+            )
+            cycles.append(odl_by_id[batch.placements[0].odl_id].curing_cycle if known and batch.placements else None)
+
+        moves = {name: {'tried': 0, 'accepted': 0} for name in POLISH_MOVES}
+        before = self._summary(layouts)
+        stop_reason = 'local_optimum'
+
+        try:
+            improved = True
+            while improved:
+                improved = False
+                for name, change in self._neighbours(layouts, cycles, budget_end):
+                    moves[name]['tried'] += 1
+                    if self._improves(layouts, change):
+                        moves[name]['accepted'] += 1
+                        for index, layout in change.items():
+                            layouts[index] = layout
+                        improved = True
+                        break
+        except _BudgetExceeded:
+            stop_reason = 'deadline' if self.deadline is not None and time.time() >= self.deadline else 'time_budget'
+
+        result = [layout for layout in layouts if layout and layout.placements]
+        self.last_run = {
+            'before': before,
+            'after': self._summary(result),
+            'moves': moves,
+            **self._counters,
+            'stop_reason': stop_reason,
+            'time': round(time.time() - started, 3)
+        }
+        return result
+
+    def _neighbours(self, layouts: List[Optional[BatchLayout]], cycles: List[Optional[str]], budget_end: float):
+        """
+        Mosse candidate, dai batch meno pieni verso i più pieni: per ogni ODL
+        del batch sorgente prova move, poi swap e ejection chain con gli ODL
+        del batch di destinazione. Genera (nome mossa, cambiamento).
+        """
+        active = [i for i, layout in enumerate(layouts) if layout and layout.placements and cycles[i]]
+        by_fill = sorted(active, key=lambda i: self._fill(layouts[i]))
+
+        for source in by_fill:
+            targets = [i for i in reversed(by_fill) if i != source and cycles[i] == cycles[source]]
+            for odl_id in self._odls_by_area(layouts[source]):
+                moved = self._keys(layouts[source], odl_id)
+                source_left = self._without(layouts[source], moved)
+
+                for target in targets:
+                    self._check_budget(budget_end)
+                    received = self._evaluate(layouts[target], moved, frozenset())
+                    if received is not None:
+                        yield "move", {source: source_left, target: received}
+                        continue
+
+                    # Il target non ha spazio: si espelle uno dei suoi ODL
+                    for ejected_id in self._odls_by_area(layouts[target]):
+                        self._check_budget(budget_end)
+                        ejected = self._keys(layouts[target], ejected_id)
+                        received = self._evaluate(layouts[target], moved, ejected)
+                        if received is None:
+                            continue
+
+                        swapped = self._evaluate(layouts[source], ejected, moved)
+                        if swapped is not None:
+                            yield "swap", {source: swapped, target: received}
+
+                        for third in targets:
+                            if third == target:
+                                continue
+                            self._check_budget(budget_end)
+                            chained = self._evaluate(layouts[third], ejected, frozenset())
+                            if chained is not None:
+                                yield "ejection", {source: source_left, target: received, third: chained}
+
+    def _evaluate(
+        self,
+        base: BatchLayout,
+        added: FrozenSet[ItemKey],
+        removed: FrozenSet[ItemKey]
+    ) -> Optional[BatchLayout]:
+        """
+        Layout che contiene i tool di base meno removed più added, o None.
+        Memo, bound, inserimento incrementale e infine re-pack completo.
+        """
+        autoclave = self._autoclaves[base.autoclave_id]
+        kept = [p for p in base.placements if (p.odl_id, p.tool_id) not in removed]
+        keys = frozenset((p.odl_id, p.tool_id) for p in kept) | added
+
+        memo_key = (keys, autoclave.id)
+        if memo_key in self._memo:
+            self._counters['memo_hits'] += 1
+            return self._memo[memo_key]
+        self._counters['evaluations'] += 1
+
+        items = [self._items[key] for key in sorted(keys)]
+        layout = None
+        if not self._within_bounds(items, autoclave):
+            self._counters['bound_rejections'] += 1
+        else:
+            layout = self._insert(kept, [self._items[key] for key in sorted(added)], items, autoclave)
+            if layout is not None:
+                self._counters['incremental'] += 1
+            else:
+                self._counters['repacks'] += 1
+                packed = self.packer.pack_best(items, autoclave)
+                if packed and len(packed.placements) == len(items):
+                    layout = packed
+
+        self._memo[memo_key] = layout
+        return layout
+
+    def _within_bounds(self, items: List[Dict], autoclave: Autoclave) -> bool:
+        """Controllo senza geometria: linee del vuoto, ingresso dei tool e area ottenibile"""
+        if sum(item['vacuum_lines'] for item in items) > autoclave.vacuum_lines:
+            return False
+        if not all(fits(item['tool'], autoclave, self.constraints) for item in items):
+            return False
+        required = sum(int(item['tool'].area) for item in items)
+        return max_batch_area(items, autoclave, self.constraints) >= required
+
+    def _insert(
+        self,
+        kept,
+        added: List[Dict],
+        items: List[Dict],
+        autoclave: Autoclave
+    ) -> Optional[BatchLayout]:
+        """
+        Inserimento incrementale: MaxRects con i posizionamenti rimasti fissi e
+        i tool aggiunti nello spazio libero (per area decrescente).
+        """
+        border = self.constraints.min_border_distance
+        maxrects = MaxRects(autoclave.width, autoclave.height, self.constraints, self.constraints.maxrects_rule)
+
+        for p in kept:
+            item = self._items[(p.odl_id, p.tool_id)]
+            maxrects.place_at(Rectangle(
+                width=p.width,
+                height=p.height,
+                odl_id=p.odl_id,
+                tool_id=p.tool_id,
+                tool=item['tool'],
+                vacuum_lines=item['vacuum_lines'],
+                is_elevated=item['is_elevated'],
+                rotated=p.rotated
+            ), p.x - border, p.y - border)
+
+        for item in sorted(added, key=lambda item: item['tool'].area, reverse=True):
+            best = None
+            for rect in self.packer.orientations(item):
+                found = maxrects.find_best_position(rect)
+                if found and (best is None or found[0] < best[0][0]):
+                    best = (found, rect)
+            if best is None:
+                return None
+            (_, x, y), rect = best
+            maxrects.place_at(rect, x, y)
+
+        return self.packer.build_layout(
+            maxrects,
+            autoclave,
+            sum(item['vacuum_lines'] for item in items),
+            sum(item['tool'].weight for item in items)
+        )
+
+    def _without(self, layout: BatchLayout, removed: FrozenSet[ItemKey]) -> Optional[BatchLayout]:
+        """Layout senza i tool rimossi: gli altri restano dove sono (None se vuoto)"""
+        placements = [p for p in layout.placements if (p.odl_id, p.tool_id) not in removed]
+        if not placements:
+            return None
+        autoclave = self._autoclaves[layout.autoclave_id]
+        items = [self._items[(p.odl_id, p.tool_id)] for p in placements]
+        return BatchLayout(
+            autoclave_id=layout.autoclave_id,
+            placements=placements,
+            efficiency=round(sum(p.width * p.height for p in placements) / autoclave.area, 3),
+            total_weight=round(sum(item['tool'].weight for item in items), 2),
+            vacuum_lines_used=sum(item['vacuum_lines'] for item in items)
+        )
+
+    def _improves(self, layouts: List[Optional[BatchLayout]], change: Change) -> bool:
+        """Meno batch usati o, a parità, somma dei quadrati dei riempimenti maggiore"""
+        before = self._score(layouts[index] for index in change)
+        after = self._score(change.values())
+        return after[0] > before[0] or (after[0] == before[0] and after[1] > before[1] + 1e-9)
+
+    def _score(self, layouts) -> Tuple[int, float]:
+        used = [layout for layout in layouts if layout and layout.placements]
+        return -len(used), sum(self._fill(layout) ** 2 for layout in used)
+
+    def _fill(self, layout: BatchLayout) -> float:
+        autoclave = self._autoclaves.get(layout.autoclave_id)
+        if autoclave is None:
+            return layout.efficiency
+        return sum(p.width * p.height for p in layout.placements) / autoclave.area
+
+    @staticmethod
+    def _keys(layout: BatchLayout, odl_id: str) -> FrozenSet[ItemKey]:
+        return frozenset((p.odl_id, p.tool_id) for p in layout.placements if p.odl_id == odl_id)
+
+    @staticmethod
+    def _odls_by_area(layout: BatchLayout) -> List[str]:
+        """ODL del batch per area posizionata decrescente"""
+        areas: Dict[str, float] = {}
+        for p in layout.placements:
+            areas[p.odl_id] = areas.get(p.odl_id, 0.0) + p.width * p.height
+        return sorted(areas, key=lambda odl_id: areas[odl_id], reverse=True)
+
+    @staticmethod
+    def _summary(layouts) -> Dict:
+        used = [layout for layout in layouts if layout and layout.placements]
+        efficiencies = [layout.efficiency for layout in used]
+        return {
+            'batches': len(used),
+            'average_efficiency': round(sum(efficiencies) / len(efficiencies), 3) if used else 0.0,
+            'min_efficiency': min(efficiencies) if used else 0.0,
+            'placed_area': round(sum(p.width * p.height for layout in used for p in layout.placements))
+        }
+
+    @staticmethod
+    def _check_budget(budget_end: float):
+        if time.time() >= budget_end:
+            raise _BudgetExceeded()
+
+
+class _BudgetExceeded(Exception):
+    """Budget della rifinitura esaurito: si interrompe la generazione delle mosse"""
@@ -0,0 +1,183 @@
+"""
+Portfolio di Motori di Nesting
+==============================
+
+Esegue in parallelo, in processi separati e sotto un'unica deadline, le
+strategie di packing disponibili (CP-SAT, Skyline, greedy MaxRects, Guillotine)
+e restituisce il layout migliore. Un motore che va in errore è registrato
+nelle metriche (engine_errors), distinto da uno che non trova layout.
+Appena un motore raggiunge l'upper bound sull'area gli altri vengono
+terminati: sulle istanze facili si paga la latenza dell'euristica, su quelle
+difficili si ottiene la qualità di CP-SAT.
+"""
+
+import queue
+import time
+import dataclasses
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+from domain.entities import Autoclave, BatchLayout
+from core.optimization.constraints import NestingConstraints
+from core.optimization.rectangle_packer import RectanglePacker
+from core.optimization.parallel import process_context
+from core.optimization.bounds import placed_area
+
+if TYPE_CHECKING:
+    from core.optimization.nesting_engine import NestingEngine
+
+# Motori in gara
+PORTFOLIO_ENGINES = ("cpsat", "skyline", "greedy", "guillotine")
+
+# Margine oltre il budget del solver per avvio processi e costruzione modello (s)
+PROCESS_GRACE_SECONDS = 2.0
+
+
+def _run_engine(
+    engine_name: str,
+    constraints: NestingConstraints,
+    deadline: float,
+    items: List[Dict],
+    autoclave: Autoclave,
+    hint: Optional[BatchLayout],
+    results
+):
+    """Entry point dei processi del portfolio: esegue un motore e pubblica il risultato"""
+    from core.optimization.nesting_engine import NestingEngine
+
+    # I motori sono già in processi separati: multi-start sequenziale, niente pool annidati
+    constraints = dataclasses.replace(constraints, multistart_workers=1)
+    started = time.time()
+    engine = NestingEngine(constraints)
+    engine.start_request(deadline=deadline)
+    layout = None
+    error = None
+
+    try:
+        if engine_name == "cpsat":
+            if hint is None and constraints.warm_start:
+                hint = RectanglePacker(constraints).pack_best(items, autoclave)
+            layout = engine._solve_with_cpsat(items, autoclave, hint=hint)
+        elif engine_name == "skyline":
+            layout = RectanglePacker(constraints).pack_best(items, autoclave)
+        elif engine_name == "guillotine":
+            layout = RectanglePacker(constraints).pack_guillotine(items, autoclave)
+        else:
+            layout = engine._solve_with_greedy(items, autoclave)
+    except Exception as exc:
+        # Il crash va distinto da "nessun layout": lo riporta il processo principale
+        error = f"{type(exc).__name__}: {exc}"
+    finally:
+        results.put((
+            engine_name,
+            layout,
+            time.time() - started,
+            engine.solver_totals,
+            engine.last_solve_stats,
+            error
+        ))
+
+
+class PortfolioSolver:
+    """
+    Corsa tra motori di nesting per un singolo autoclave.
+    Usa budget e upper bound del NestingEngine chiamante e ne aggiorna le metriche.
+    """
+
+    def __init__(self, engine: 'NestingEngine'):
+        self.engine = engine
+        self.constraints = engine.constraints
+
+    def solve(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        hint: Optional[BatchLayout] = None
+    ) -> Optional[BatchLayout]:
+        """
+        Avvia tutti i motori e attende i risultati fino alla deadline.
+        Vince il layout con più area posizionata; a parità il primo arrivato.
+        """
+        max_x = int(autoclave.width - 2 * self.constraints.min_border_distance)
+        max_y = int(autoclave.height - 2 * self.constraints.min_border_distance)
+
+        time_limit, _ = self.engine._solver_budget(items, max_x, max_y)
+        upper_bound = self.engine._area_upper_bound(items, autoclave, max_x, max_y)
+
+        started = time.time()
+        solver_deadline = started + max(time_limit, 0.0)
+        deadline = solver_deadline + PROCESS_GRACE_SECONDS
+
+        context = process_context()
+        results = context.Queue()
+        processes = {
+            name: context.Process(
+                target=_run_engine,
+                args=(name, self.constraints, solver_deadline, items, autoclave, hint, results)
+            )
+            for name in PORTFOLIO_ENGINES
+        }
+        for process in processes.values():
+            process.start()
+
+        best: Optional[BatchLayout] = None
+        best_area = -1
+        winner = None
+        engines: Dict[str, Dict] = {}
+
+        try:
+            while len(engines) < len(processes):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    name, layout, elapsed, totals, stats, error = results.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                engines[name] = {
+                    'time': round(elapsed, 3),
+                    'efficiency': layout.efficiency if layout else 0.0
+                }
+                if error:
+                    engines[name]['error'] = error
+                    self.engine.record_engine_error(name, error)
+                    print(f"Portfolio: motore {name} fallito: {error}")
+                if totals['calls']:
+                    self.engine.merge_solver_totals(totals)
+                    self.engine.last_solve_stats = stats
+
+                area = placed_area(layout, items)
+                if layout and layout.placements and area > best_area:
+                    best, best_area, winner = layout, area, name
+
+                # Upper bound raggiunto o ottimo dimostrato da CP-SAT a 1 mm:
+                # inutile aspettare gli altri motori
+                if best_area >= upper_bound or self._proven_optimal(name, stats):
+                    break
+        finally:
+            cancelled = [
+                name for name, process in processes.items()
+                if name not in engines and process.is_alive()
+            ]
+            for process in processes.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        self.engine.record_portfolio({
+            'winner': winner,
+            'engines': engines,
+            'cancelled': cancelled,
+            'upper_bound_reached': best_area >= upper_bound,
+            'time': round(time.time() - started, 3)
+        })
+
+        return best
+
+    def _proven_optimal(self, engine_name: str, stats: Dict) -> bool:
+        """CP-SAT ha dimostrato l'ottimo sulla griglia a piena risoluzione"""
+        return (
+            engine_name == "cpsat" and
+            stats.get('stop_reason') == 'optimal' and
+            stats.get('grid_resolution') == 1
+        )
@@ -6,12 +6,33 @@ Implementa algoritmi ottimizzati specificatamente per forme rettangolari,
 che sono molto più efficienti del constraint programming generico.
 """
 
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union, Callable
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+import random
+from array import array
+from collections import deque
 import bisect
 
 from domain.entities import Tool, ODL, Autoclave, Placement, BatchLayout
 from core.optimization.constraints import NestingConstraints
+from core.optimization.spatial_index import SpatialIndex
+from core.optimization.parallel import process_context, worker_count
+from core.optimization.bounds import max_batch_area, placed_area
+
+# Criteri di ordinamento per il multi-start (tutti decrescenti)
+MULTISTART_ORDERINGS: Tuple[Tuple[str, Callable[[Tool], float]], ...] = (
+    ("area", lambda tool: tool.area),
+    ("perimeter", lambda tool: tool.width + tool.height),
+    ("max_side", lambda tool: max(tool.width, tool.height)),
+    ("height", lambda tool: tool.height),
+)
+
+# Perturbazione relativa delle chiavi di ordinamento nei restart randomizzati
+MULTISTART_NOISE = 0.15
+
+# Restart minimi per processo: sotto questa soglia l'avvio dei processi non conviene
+MULTISTART_MIN_RUNS_PER_WORKER = 8
 
 @dataclass
 class Rectangle:
@@ -41,6 +62,17 @@ class Skyline:
     """
     Algoritmo Skyline per rectangle packing.
     Più efficiente di CP-SAT per rettangoli regolari.
+    
+    Lavora in coordinate locali con origine nell'angolo interno ai margini:
+    ogni rettangolo occupa (width + gap) x (height + gap) in un contenitore
+    allargato di gap, così la distanza minima tra tool è garantita per costruzione.
+    Le Position restituite sono invece in coordinate autoclave.
+    
+    L'orizzonte è memorizzato in array paralleli: xs[i] è l'inizio del segmento i
+    (xs[-1] chiude sul bordo destro allargato), heights[i] la sua altezza.
+    Ricerca dei segmenti con bisect, fusione in-place dei segmenti adiacenti di
+    pari altezza e massimo su finestra scorrevole per l'altezza su un intervallo:
+    ogni posizionamento costa O(segmenti) invece di O(segmenti²).
     """
     
     def __init__(self, container_width: float, container_height: float, constraints: NestingConstraints):
@@ -48,12 +80,6 @@ class Skyline:
         self.container_height = container_height
         self.constraints = constraints
         
-        # Skyline: lista di punti (x, y) che rappresentano l'orizzonte
-        self.skyline = [(0, 0), (container_width, 0)]
-        
-        # Rettangoli posizionati
-        self.placed_rectangles: List[Tuple[Rectangle, Position]] = []
-        
         # Margini
         self.border = constraints.min_border_distance
         self.gap = constraints.min_tool_distance
@@ -61,173 +87,458 @@ class Skyline:
         # Area disponibile (con margini)
         self.available_width = container_width - 2 * self.border
         self.available_height = container_height - 2 * self.border
-    
-    def can_place(self, rect: Rectangle, x: float, y: float) -> bool:
-        """Verifica se un rettangolo può essere posizionato in una posizione"""
         
-        # Verifica bounds
-        if x + rect.width > self.available_width + self.border:
-            return False
-        if y + rect.height > self.available_height + self.border:
-            return False
+        # Skyline: un solo segmento a quota 0 esteso fino al bordo destro allargato
+        self.xs = array('d', [0.0, self.available_width + self.gap])
+        self.heights = array('d', [0.0])
         
-        # Verifica sovrapposizioni con gap
-        new_rect_bounds = (x, y, x + rect.width, y + rect.height)
-        
-        for _, pos in self.placed_rectangles:
-            existing_bounds = (
-                pos.x - self.gap, 
-                pos.y - self.gap,
-                pos.x + pos.width + self.gap,
-                pos.y + pos.height + self.gap
-            )
-            
-            if self._rectangles_overlap(new_rect_bounds, existing_bounds):
-                return False
-        
-        return True
+        # Rettangoli posizionati e indice spaziale dei loro footprint (locali, con gap)
+        self.placed_rectangles: List[Tuple[Rectangle, Position]] = []
+        self.index = SpatialIndex()
+        self._index_keys: List[int] = []
+    
+    @property
+    def skyline(self) -> List[Tuple[float, float]]:
+        """Orizzonte come lista di punti (x, y); l'ultimo chiude sul bordo destro"""
+        points = list(zip(self.xs, self.heights))
+        points.append((self.xs[-1], 0.0))
+        return points
+    
+    def snapshot(self) -> Tuple[array, array, int]:
+        """Stato corrente, per annullare posizionamenti successivi con restore()"""
+        return array('d', self.xs), array('d', self.heights), len(self.placed_rectangles)
     
-    def _rectangles_overlap(self, rect1: Tuple, rect2: Tuple) -> bool:
-        """Verifica sovrapposizione tra due rettangoli"""
-        x1, y1, x2, y2 = rect1
-        x3, y3, x4, y4 = rect2
-        return not (x2 <= x3 or x4 <= x1 or y2 <= y3 or y4 <= y1)
+    def restore(self, state: Tuple[array, array, int]):
+        """Riporta skyline, rettangoli e indice allo stato di snapshot()"""
+        xs, heights, count = state
+        self.xs = array('d', xs)
+        self.heights = array('d', heights)
+        for key in self._index_keys[count:]:
+            self.index.remove(key)
+        del self._index_keys[count:]
+        del self.placed_rectangles[count:]
     
     def find_best_position(self, rect: Rectangle) -> Optional[Tuple[float, float]]:
         """
         Trova la migliore posizione per un rettangolo usando Bottom-Left-Fill.
+        Restituisce coordinate locali.
+        
+        Un rettangolo appoggiato sulla skyline non interseca mai quelli già
+        posizionati (stanno tutti sotto l'orizzonte): basta verificare i bounds.
+        L'altezza su [x, x + width + gap) è il massimo di una finestra di segmenti
+        che scorre solo in avanti, mantenuto con una deque monotona.
         """
+        xs = self.xs
+        heights = self.heights
+        count = len(heights)
+        footprint = rect.width + self.gap
+        max_y = self.available_height - rect.height
+        
         best_position = None
         best_y = float('inf')
-        best_x = float('inf')
+        
+        window = deque()  # indici dei segmenti con altezze decrescenti
+        end = 0
         
         # Prova tutte le posizioni sulla skyline
-        for i in range(len(self.skyline) - 1):
-            x = self.skyline[i][0]
+        for i in range(count):
+            x = xs[i]
+            if x + rect.width > self.available_width:
+                break
             
-            if x + rect.width > self.container_width - self.border:
-                continue
+            # Estendi la finestra ai segmenti che iniziano prima della fine del footprint
+            x_end = x + footprint
+            while end < count and xs[end] < x_end:
+                while window and heights[window[-1]] <= heights[end]:
+                    window.pop()
+                window.append(end)
+                end += 1
+            while window[0] < i:
+                window.popleft()
             
-            # Trova l'altezza massima in questo intervallo
-            y = self._get_skyline_height(x, x + rect.width)
+            y = heights[window[0]]
             
-            # Verifica se può essere posizionato
-            if self.can_place(rect, x, y):
-                # Bottom-Left-Fill: preferisci posizioni più basse e più a sinistra
-                if y < best_y or (y == best_y and x < best_x):
-                    best_position = (x, y)
-                    best_y = y
-                    best_x = x
+            # Bottom-Left-Fill: preferisci posizioni più basse e più a sinistra
+            # (a parità di y vince il primo segmento, il più a sinistra)
+            if y <= max_y and y < best_y:
+                best_position = (x, y)
+                best_y = y
         
         return best_position
     
-    def _get_skyline_height(self, x_start: float, x_end: float) -> float:
-        """Ottiene l'altezza massima della skyline in un intervallo"""
-        max_height = 0
-        
-        for i in range(len(self.skyline) - 1):
-            seg_start = self.skyline[i][0]
-            seg_end = self.skyline[i + 1][0]
-            seg_height = self.skyline[i][1]
-            
-            # Se il segmento si sovrappone con l'intervallo
-            if seg_start < x_end and seg_end > x_start:
-                max_height = max(max_height, seg_height)
+    def place_at(self, rect: Rectangle, x: float, y: float):
+        """Registra un rettangolo in una posizione locale già validata"""
+        pos = Position(x + self.border, y + self.border, rect.width, rect.height)
+        self.placed_rectangles.append((rect, pos))
+        self._index_keys.append(
+            self.index.insert(x, y, x + rect.width + self.gap, y + rect.height + self.gap)
+        )
         
-        return max_height
+        # Aggiorna skyline con il footprint comprensivo di gap
+        self._update_skyline(x, y, rect.width + self.gap, rect.height + self.gap)
     
-    def place_rectangle(self, rect: Rectangle) -> bool:
-        """Posiziona un rettangolo sulla skyline"""
+    def _update_skyline(self, x: float, y: float, width: float, height: float):
+        """
+        Aggiorna la skyline dopo aver posizionato un rettangolo: i segmenti coperti
+        da [x, x + width) vengono sostituiti in-place dal nuovo segmento, mantenendo
+        le parti scoperte dei segmenti di bordo.
+        """
+        xs = self.xs
+        heights = self.heights
+        x_end = min(x + width, xs[-1])
+        new_height = y + height
         
-        position = self.find_best_position(rect)
-        if not position:
-            return False
+        # Segmenti first..last-1 intersecano [x, x_end)
+        first = bisect.bisect_right(xs, x) - 1
+        last = bisect.bisect_left(xs, x_end)
+        tail_height = heights[last - 1]
         
-        x, y = position
+        new_xs = array('d')
+        new_heights = array('d')
         
-        # Crea posizione
-        pos = Position(x, y, rect.width, rect.height)
-        self.placed_rectangles.append((rect, pos))
+        # Segmento parzialmente coperto a sinistra: mantieni la parte sinistra
+        if xs[first] < x:
+            new_xs.append(xs[first])
+            new_heights.append(heights[first])
         
-        # Aggiorna skyline
-        self._update_skyline(x, y, rect.width, rect.height)
+        new_xs.append(x)
+        new_heights.append(new_height)
         
-        return True
+        # Segmento parzialmente coperto a destra: mantieni la parte destra
+        if xs[last] > x_end:
+            new_xs.append(x_end)
+            new_heights.append(tail_height)
+        
+        xs[first:last] = new_xs
+        heights[first:last] = new_heights
+        
+        # Fondi i segmenti di pari altezza attorno alla zona modificata
+        self._merge_segments(first, first + len(new_heights))
     
-    def _update_skyline(self, x: float, y: float, width: float, height: float):
-        """Aggiorna la skyline dopo aver posizionato un rettangolo"""
+    def _merge_segments(self, start: int, stop: int):
+        """Fonde in-place i segmenti adiacenti di pari altezza tra start-1 e stop"""
+        xs = self.xs
+        heights = self.heights
+        # All'indietro: le cancellazioni non spostano gli indici ancora da visitare
+        for i in range(min(stop, len(heights) - 1), max(start, 1) - 1, -1):
+            if heights[i] == heights[i - 1]:
+                del xs[i]
+                del heights[i]
+
+class MaxRects:
+    """
+    Algoritmo MaxRects per rectangle packing.
+    Mantiene l'elenco dei rettangoli liberi massimali (anche sovrapposti tra
+    loro): il costo di un posizionamento dipende dal numero di rettangoli
+    liberi, non dalle dimensioni dell'autoclave.
+    
+    Stesse convenzioni della Skyline: coordinate locali interne ai margini,
+    footprint allargato di gap, Position restituite in coordinate autoclave.
+    Regole di scelta: "bssf" (best short side fit), "baf" (best area fit),
+    "bl" (bottom-left).
+    """
+    
+    def __init__(
+        self,
+        container_width: float,
+        container_height: float,
+        constraints: NestingConstraints,
+        rule: str = "bssf"
+    ):
+        self.container_width = container_width
+        self.container_height = container_height
+        self.constraints = constraints
+        self.rule = rule
         
-        # Trova i segmenti che si sovrappongono
-        x_start = x
-        x_end = x + width
-        new_height = y + height
+        # Margini
+        self.border = constraints.min_border_distance
+        self.gap = constraints.min_tool_distance
+        
+        # Area disponibile (con margini)
+        self.available_width = container_width - 2 * self.border
+        self.available_height = container_height - 2 * self.border
         
-        # Rimuovi i segmenti sovrappost e trova altezza minima
-        min_height = float('inf')
-        to_remove = []
+        # Rettangoli liberi (x, y, width, height) nel contenitore allargato di gap
+        self.free_rects: List[Tuple[float, float, float, float]] = []
+        if self.available_width > 0 and self.available_height > 0:
+            self.free_rects.append(
+                (0, 0, self.available_width + self.gap, self.available_height + self.gap)
+            )
+        
+        # Rettangoli posizionati
+        self.placed_rectangles: List[Tuple[Rectangle, Position]] = []
+    
+    def find_best_position(self, rect: Rectangle) -> Optional[Tuple[Tuple, float, float]]:
+        """
+        Trova il rettangolo libero migliore secondo la regola configurata.
+        Restituisce (punteggio, x, y) in coordinate locali; punteggio minore è migliore.
+        """
+        width = rect.width + self.gap
+        height = rect.height + self.gap
+        best = None
         
-        for i, (seg_x, seg_y) in enumerate(self.skyline[:-1]):
-            seg_x_end = self.skyline[i + 1][0]
+        for free_x, free_y, free_width, free_height in self.free_rects:
+            if width > free_width or height > free_height:
+                continue
             
-            if seg_x >= x_end:
-                break
-            if seg_x_end <= x_start:
+            score = self._score(free_x, free_y, free_width, free_height, width, height)
+            if best is None or score < best[0]:
+                best = (score, free_x, free_y)
+        
+        return best
+    
+    def _score(
+        self,
+        free_x: float,
+        free_y: float,
+        free_width: float,
+        free_height: float,
+        width: float,
+        height: float
+    ) -> Tuple:
+        """Punteggio di un posizionamento nell'angolo in basso a sinistra del rettangolo libero"""
+        leftover_x = free_width - width
+        leftover_y = free_height - height
+        
+        if self.rule == "baf":
+            return (free_width * free_height - width * height, min(leftover_x, leftover_y))
+        if self.rule == "bl":
+            return (free_y + height, free_x)
+        return (min(leftover_x, leftover_y), max(leftover_x, leftover_y))
+    
+    def place_at(self, rect: Rectangle, x: float, y: float):
+        """Registra un rettangolo in una posizione locale già validata"""
+        pos = Position(x + self.border, y + self.border, rect.width, rect.height)
+        self.placed_rectangles.append((rect, pos))
+        
+        # Divide i rettangoli liberi intersecati dal footprint comprensivo di gap
+        used_x1, used_y1 = x, y
+        used_x2, used_y2 = x + rect.width + self.gap, y + rect.height + self.gap
+        
+        updated = []
+        for free in self.free_rects:
+            free_x, free_y, free_width, free_height = free
+            free_x2, free_y2 = free_x + free_width, free_y + free_height
+            
+            if used_x1 >= free_x2 or used_x2 <= free_x or used_y1 >= free_y2 or used_y2 <= free_y:
+                updated.append(free)
                 continue
             
-            min_height = min(min_height, seg_y)
+            # Fino a quattro nuovi rettangoli massimali attorno al footprint
+            if used_x1 > free_x:
+                updated.append((free_x, free_y, used_x1 - free_x, free_height))
+            if used_x2 < free_x2:
+                updated.append((used_x2, free_y, free_x2 - used_x2, free_height))
+            if used_y1 > free_y:
+                updated.append((free_x, free_y, free_width, used_y1 - free_y))
+            if used_y2 < free_y2:
+                updated.append((free_x, used_y2, free_width, free_y2 - used_y2))
+        
+        self.free_rects = self._prune(updated)
+    
+    def _prune(self, free_rects: List[Tuple]) -> List[Tuple]:
+        """Rimuove i rettangoli liberi contenuti in un altro (e i duplicati)"""
+        pruned = []
+        for i, (x, y, width, height) in enumerate(free_rects):
+            contained = False
+            for j, (other_x, other_y, other_width, other_height) in enumerate(free_rects):
+                if i == j:
+                    continue
+                if (other_x <= x and other_y <= y and
+                        x + width <= other_x + other_width and
+                        y + height <= other_y + other_height):
+                    # A parità di rettangolo tiene solo il primo
+                    if (other_x, other_y, other_width, other_height) != (x, y, width, height) or j < i:
+                        contained = True
+                        break
+            if not contained:
+                pruned.append((x, y, width, height))
+        return pruned
+
+class Guillotine:
+    """
+    Algoritmo Guillotine per rectangle packing.
+    Ogni posizionamento taglia il rettangolo libero scelto con un unico taglio
+    passante (orizzontale o verticale): i rettangoli liberi restano disgiunti e
+    il layout finale è ottenibile con tagli a ghigliottina, cioè a file e colonne
+    come preferito dagli operatori.
+    
+    Stesse convenzioni della Skyline: coordinate locali interne ai margini,
+    footprint allargato di gap, Position restituite in coordinate autoclave.
+    Scelta del rettangolo libero: "baf" (best area fit), "bssf" (best short side fit).
+    Regole di taglio: "shorter_leftover_axis", "longer_leftover_axis",
+    "min_area", "max_area".
+    """
+    
+    def __init__(
+        self,
+        container_width: float,
+        container_height: float,
+        constraints: NestingConstraints,
+        choice: str = "baf",
+        split: str = "shorter_leftover_axis"
+    ):
+        self.container_width = container_width
+        self.container_height = container_height
+        self.constraints = constraints
+        self.choice = choice
+        self.split = split
+        
+        # Margini
+        self.border = constraints.min_border_distance
+        self.gap = constraints.min_tool_distance
+        
+        # Area disponibile (con margini)
+        self.available_width = container_width - 2 * self.border
+        self.available_height = container_height - 2 * self.border
+        
+        # Rettangoli liberi disgiunti (x, y, width, height) nel contenitore allargato di gap
+        self.free_rects: List[Tuple[float, float, float, float]] = []
+        if self.available_width > 0 and self.available_height > 0:
+            self.free_rects.append(
+                (0, 0, self.available_width + self.gap, self.available_height + self.gap)
+            )
+        
+        # Rettangoli posizionati
+        self.placed_rectangles: List[Tuple[Rectangle, Position]] = []
+    
+    def find_best_position(self, rect: Rectangle) -> Optional[Tuple[Tuple, int]]:
+        """
+        Trova il rettangolo libero migliore secondo la regola di scelta.
+        Restituisce (punteggio, indice del rettangolo libero); punteggio minore è migliore.
+        """
+        width = rect.width + self.gap
+        height = rect.height + self.gap
+        best = None
+        
+        for index, (_, _, free_width, free_height) in enumerate(self.free_rects):
+            if width > free_width or height > free_height:
+                continue
             
-            # Segmento completamente coperto
-            if seg_x >= x_start and seg_x_end <= x_end:
-                to_remove.append(i)
-            # Segmento parzialmente coperto a sinistra
-            elif seg_x < x_start and seg_x_end > x_start:
-                # Mantieni la parte sinistra
-                pass
-            # Segmento parzialmente coperto a destra  
-            elif seg_x < x_end and seg_x_end > x_end:
-                # Mantieni la parte destra
-                pass
-        
-        # Rimuovi segmenti coperti (in ordine inverso)
-        for i in reversed(to_remove):
-            del self.skyline[i]
-        
-        # Inserisci nuovi punti
-        new_points = []
-        
-        # Punto iniziale del rettangolo
-        if x_start > 0:
-            new_points.append((x_start, new_height))
-        
-        # Punto finale del rettangolo
-        new_points.append((x_end, min_height))
-        
-        # Inserisci i nuovi punti nella skyline
-        for point in new_points:
-            pos = bisect.bisect_left([(x, y) for x, y in self.skyline], point)
-            self.skyline.insert(pos, point)
-        
-        # Rimuovi punti ridondanti
-        self._clean_skyline()
-    
-    def _clean_skyline(self):
-        """Rimuove punti ridondanti dalla skyline"""
-        if len(self.skyline) <= 2:
-            return
-        
-        cleaned = [self.skyline[0]]
-        
-        for i in range(1, len(self.skyline) - 1):
-            prev_y = cleaned[-1][1]
-            curr_y = self.skyline[i][1]
-            next_y = self.skyline[i + 1][1]
+            leftover_x = free_width - width
+            leftover_y = free_height - height
+            if self.choice == "bssf":
+                score = (min(leftover_x, leftover_y), max(leftover_x, leftover_y))
+            else:
+                score = (free_width * free_height - width * height, min(leftover_x, leftover_y))
             
-            # Mantieni solo i punti che cambiano altezza
-            if curr_y != prev_y or curr_y != next_y:
-                cleaned.append(self.skyline[i])
+            if best is None or score < best[0]:
+                best = (score, index)
+        
+        return best
+    
+    def place_in(self, rect: Rectangle, index: int):
+        """Posiziona il rettangolo nell'angolo in basso a sinistra del rettangolo libero index"""
+        free_x, free_y, free_width, free_height = self.free_rects.pop(index)
+        width = rect.width + self.gap
+        height = rect.height + self.gap
         
-        cleaned.append(self.skyline[-1])
-        self.skyline = cleaned
+        pos = Position(free_x + self.border, free_y + self.border, rect.width, rect.height)
+        self.placed_rectangles.append((rect, pos))
+        
+        leftover_x = free_width - width
+        leftover_y = free_height - height
+        
+        if self._split_horizontal(width, height, leftover_x, leftover_y):
+            # Taglio orizzontale: striscia destra alta quanto il pezzo, sopra tutta la larghezza
+            right = (free_x + width, free_y, leftover_x, height)
+            top = (free_x, free_y + height, free_width, leftover_y)
+        else:
+            # Taglio verticale: striscia destra a tutta altezza, sopra largo quanto il pezzo
+            right = (free_x + width, free_y, leftover_x, free_height)
+            top = (free_x, free_y + height, width, leftover_y)
+        
+        for free in (right, top):
+            if free[2] > 0 and free[3] > 0:
+                self.free_rects.append(free)
+    
+    def _split_horizontal(self, width: float, height: float, leftover_x: float, leftover_y: float) -> bool:
+        """Direzione del taglio secondo la regola configurata"""
+        if self.split == "longer_leftover_axis":
+            return leftover_x > leftover_y
+        if self.split == "min_area":
+            return width * leftover_y > leftover_x * height
+        if self.split == "max_area":
+            return width * leftover_y <= leftover_x * height
+        return leftover_x <= leftover_y
+
+class Shelf:
+    """
+    Shelf packing per anteprime in tempo reale.
+    I tool, ordinati per altezza decrescente, vengono allineati su ripiani
+    orizzontali; l'altezza di un ripiano è quella del primo tool che lo apre.
+    Regole: "nfdh" (solo l'ultimo ripiano), "ffdh" (primo ripiano in cui entra),
+    "bfdh" (ripiano con meno larghezza residua).
+    
+    Stesse convenzioni della Skyline: coordinate locali interne ai margini,
+    footprint allargato di gap, Position restituite in coordinate autoclave.
+    """
+    
+    def __init__(
+        self,
+        container_width: float,
+        container_height: float,
+        constraints: NestingConstraints,
+        rule: str = "ffdh"
+    ):
+        self.container_width = container_width
+        self.container_height = container_height
+        self.constraints = constraints
+        self.rule = rule
+        
+        # Margini
+        self.border = constraints.min_border_distance
+        self.gap = constraints.min_tool_distance
+        
+        # Area disponibile (con margini), allargata di gap come i footprint
+        self.width_limit = container_width - 2 * self.border + self.gap
+        self.height_limit = container_height - 2 * self.border + self.gap
+        
+        # Ripiani aperti: [y, altezza, larghezza occupata]
+        self.shelves: List[List[float]] = []
+        self.top = 0.0
+        
+        # Rettangoli posizionati
+        self.placed_rectangles: List[Tuple[Rectangle, Position]] = []
+    
+    def place(self, rect: Rectangle) -> bool:
+        """Posiziona il rettangolo su un ripiano esistente o su uno nuovo in cima"""
+        width = rect.width + self.gap
+        height = rect.height + self.gap
+        if width > self.width_limit:
+            return False
+        
+        shelf = self._find_shelf(width, height)
+        if shelf is None:
+            if self.top + height > self.height_limit:
+                return False
+            shelf = [self.top, height, 0.0]
+            self.shelves.append(shelf)
+            self.top += height
+        
+        pos = Position(shelf[2] + self.border, shelf[0] + self.border, rect.width, rect.height)
+        self.placed_rectangles.append((rect, pos))
+        shelf[2] += width
+        return True
+    
+    def _find_shelf(self, width: float, height: float) -> Optional[List[float]]:
+        """Ripiano esistente che accoglie il rettangolo secondo la regola"""
+        if self.rule == "nfdh":
+            candidates = self.shelves[-1:]
+        else:
+            candidates = self.shelves
+        
+        best = None
+        for shelf in candidates:
+            residual = self.width_limit - shelf[2] - width
+            if height > shelf[1] or residual < 0:
+                continue
+            if self.rule != "bfdh":
+                return shelf
+            if best is None or residual < best[0]:
+                best = (residual, shelf)
+        
+        return best[1] if best else None
 
 class RectanglePacker:
     """
@@ -251,98 +562,300 @@ class RectanglePacker:
         
         elevated_tools = elevated_tools or {}
         
-        # Prepara rettangoli
-        rectangles = []
-        total_vacuum = 0
-        
+        # Prepara items nello stesso formato del NestingEngine
+        items = []
         for odl in odls:
-            elevated_for_odl = elevated_tools.get(odl.id, [])
-            
-            for tool in odl.tools:
-                is_elevated = tool.id in elevated_for_odl
-                
-                # Crea rettangoli con e senza rotazione
-                options = []
-                
-                # Orientazione normale
-                options.append(Rectangle(
-                    width=tool.width,
-                    height=tool.height,
-                    odl_id=odl.id,
-                    tool_id=tool.id,
-                    tool=tool,
-                    vacuum_lines=odl.vacuum_lines,
-                    is_elevated=is_elevated,
-                    rotated=False
-                ))
-                
-                # Orientazione ruotata (se permessa e diversa)
-                if self.constraints.allow_rotation and tool.width != tool.height:
-                    options.append(Rectangle(
-                        width=tool.height,
-                        height=tool.width,
-                        odl_id=odl.id,
-                        tool_id=tool.id,
-                        tool=tool,
-                        vacuum_lines=odl.vacuum_lines,
-                        is_elevated=is_elevated,
-                        rotated=True
-                    ))
-                
-                rectangles.extend(options)
+            items.extend(self.odl_items(odl, elevated_tools.get(odl.id, [])))
+        
+        return self.pack_items(items, autoclave)
+    
+    def pack_items(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave
+    ) -> Optional[BatchLayout]:
+        """
+        Packa items (formato NestingEngine) con Skyline Bottom-Left-Fill.
+        Per ogni tool valuta entrambe le orientazioni e sceglie la posizione
+        più bassa, poi più a sinistra.
+        """
+        if not items:
+            return None
         
         # Ordina per area decrescente (First Fit Decreasing)
-        rectangles.sort(key=lambda r: r.area, reverse=True)
+        sorted_items = sorted(items, key=lambda item: item['tool'].area, reverse=True)
+        
+        return self.pack_sequence([(item, self.orientations(item)) for item in sorted_items], autoclave)
+    
+    def pack_sequence(
+        self,
+        sequence: List[Tuple[Dict, List[Rectangle]]],
+        autoclave: Autoclave
+    ) -> Optional[BatchLayout]:
+        """Packa items nell'ordine dato, ciascuno con le sole orientazioni candidate indicate"""
         
         # Inizializza skyline
         skyline = Skyline(autoclave.width, autoclave.height, self.constraints)
         
-        # Posiziona rettangoli
-        placed = []
         vacuum_used = 0
         weight_used = 0
+        rejected = set()
+        
+        for item, orientations in sequence:
+            # Verifica vincoli vacuum
+            if vacuum_used + item['vacuum_lines'] > autoclave.vacuum_lines:
+                continue
+            
+            shape = self.shape(orientations)
+            if shape in rejected:
+                continue
+            
+            if self.place_item(skyline, item, orientations):
+                vacuum_used += item['vacuum_lines']
+                weight_used += item['tool'].weight
+            else:
+                rejected.add(shape)
+        
+        return self.build_layout(skyline, autoclave, vacuum_used, weight_used)
+    
+    def pack_guillotine(self, items: List[Dict], autoclave: Autoclave) -> Optional[BatchLayout]:
+        """
+        Packa items con tagli a ghigliottina, per area decrescente.
+        Per ogni tool valuta entrambe le orientazioni e tiene il punteggio migliore.
+        """
+        if not items:
+            return None
         
-        # Traccia quali ODL/tool sono già stati posizionati
-        placed_tools = set()
+        guillotine = Guillotine(
+            autoclave.width, autoclave.height, self.constraints,
+            self.constraints.guillotine_choice, self.constraints.guillotine_split
+        )
         
-        for rect in rectangles:
-            tool_key = (rect.odl_id, rect.tool_id)
+        vacuum_used = 0
+        weight_used = 0
+        rejected = set()
+        
+        for item in sorted(items, key=lambda item: item['tool'].area, reverse=True):
+            # Verifica vincoli vacuum
+            if vacuum_used + item['vacuum_lines'] > autoclave.vacuum_lines:
+                continue
             
-            # Salta se questo tool è già stato posizionato
-            if tool_key in placed_tools:
+            orientations = self.orientations(item)
+            shape = self.shape(orientations)
+            if shape in rejected:
                 continue
             
+            best = None
+            for rect in orientations:
+                found = guillotine.find_best_position(rect)
+                if found and (best is None or found[0] < best[0]):
+                    best = (found[0], rect, found[1])
+            
+            if best:
+                _, rect, index = best
+                guillotine.place_in(rect, index)
+                vacuum_used += item['vacuum_lines']
+                weight_used += item['tool'].weight
+            else:
+                rejected.add(shape)
+        
+        return self.build_layout(guillotine, autoclave, vacuum_used, weight_used)
+    
+    def pack_shelf(self, items: List[Dict], autoclave: Autoclave) -> Optional[BatchLayout]:
+        """
+        Anteprima shelf packing in O(n log n) sull'ordinamento: ogni tool è orientato
+        per minimizzare l'altezza del ripiano, poi posizionato per altezza decrescente.
+        """
+        if not items:
+            return None
+        
+        shelf = Shelf(autoclave.width, autoclave.height, self.constraints, self.constraints.shelf_rule)
+        
+        # Orientazioni per altezza crescente: la prima che entra in larghezza apre ripiani più bassi
+        candidates = []
+        for item in items:
+            options = sorted(self.orientations(item), key=lambda rect: rect.height)
+            fitting = [rect for rect in options if rect.width + shelf.gap <= shelf.width_limit]
+            candidates.append((item, fitting or options))
+        candidates.sort(key=lambda candidate: candidate[1][0].height, reverse=True)
+        
+        vacuum_used = 0
+        weight_used = 0
+        
+        for item, options in candidates:
             # Verifica vincoli vacuum
-            if vacuum_used + rect.vacuum_lines > autoclave.vacuum_lines:
+            if vacuum_used + item['vacuum_lines'] > autoclave.vacuum_lines:
                 continue
             
-            # Prova a posizionare
-            if skyline.place_rectangle(rect):
-                placed.append(rect)
-                placed_tools.add(tool_key)
-                vacuum_used += rect.vacuum_lines
-                weight_used += rect.tool.weight
-        
-        if not placed:
+            if any(shelf.place(rect) for rect in options):
+                vacuum_used += item['vacuum_lines']
+                weight_used += item['tool'].weight
+        
+        return self.build_layout(shelf, autoclave, vacuum_used, weight_used)
+    
+    def pack_best(self, items: List[Dict], autoclave: Autoclave) -> Optional[BatchLayout]:
+        """Skyline singola o multi-start, secondo constraints.multistart_runs"""
+        if self.constraints.multistart_runs > 1:
+            return self.pack_multistart(items, autoclave)
+        return self.pack_items(items, autoclave)
+    
+    def pack_multistart(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        runs: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> Optional[BatchLayout]:
+        """
+        Multi-start randomizzato (GRASP): K ordinamenti perturbati per area,
+        perimetro, lato massimo o altezza, con preferenze casuali di rotazione.
+        Il restart 0 è il passaggio deterministico per area, quindi il risultato
+        non è mai peggiore di pack_items. Ogni restart ha il proprio RNG derivato
+        dal seed: il layout scelto non dipende dal numero di processi.
+        """
+        if not items:
+            return None
+        
+        runs = max(1, runs if runs is not None else self.constraints.multistart_runs)
+        seed = seed if seed is not None else self.constraints.random_seed
+        
+        workers = worker_count(
+            self.constraints.multistart_workers, runs // MULTISTART_MIN_RUNS_PER_WORKER
+        )
+        
+        if workers <= 1:
+            return self.pack_starts(items, autoclave, range(runs), seed)[1]
+        
+        chunks = [range(w, runs, workers) for w in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+            results = list(pool.map(
+                _pack_starts_worker,
+                [self.constraints] * workers,
+                [items] * workers,
+                [autoclave] * workers,
+                chunks,
+                [seed] * workers
+            ))
+        
+        # Miglior area posizionata; a parità il restart con indice minore
+        results = [result for result in results if result[1]]
+        if not results:
+            return None
+        return min(results, key=lambda result: (-self._placed_area(result[1]), result[0]))[1]
+    
+    def pack_starts(
+        self,
+        items: List[Dict],
+        autoclave: Autoclave,
+        starts: range,
+        seed: int
+    ) -> Tuple[Optional[int], Optional[BatchLayout]]:
+        """
+        Esegue i restart indicati e restituisce (indice, layout) del migliore.
+        Si ferma al primo restart che raggiunge l'upper bound sull'area: con più
+        processi vince comunque il restart di indice minimo che lo raggiunge.
+        """
+        best_start, best_layout, best_area = None, None, -1.0
+        upper_bound = max_batch_area(items, autoclave, self.constraints)
+        
+        for start in starts:
+            layout = self.pack_sequence(self._randomized_sequence(items, start, seed), autoclave)
+            area = self._placed_area(layout)
+            if layout and area > best_area:
+                best_start, best_layout, best_area = start, layout, area
+                if placed_area(layout, items) >= upper_bound:
+                    break
+        
+        return best_start, best_layout
+    
+    def _randomized_sequence(
+        self,
+        items: List[Dict],
+        start: int,
+        seed: int
+    ) -> List[Tuple[Dict, List[Rectangle]]]:
+        """Ordine e orientazioni candidate del restart start (0 = deterministico per area)"""
+        if start == 0:
+            sorted_items = sorted(items, key=lambda item: item['tool'].area, reverse=True)
+            return [(item, self.orientations(item)) for item in sorted_items]
+        
+        rng = random.Random(seed * 1_000_003 + start)
+        _, key = MULTISTART_ORDERINGS[start % len(MULTISTART_ORDERINGS)]
+        
+        keyed = [
+            (key(item['tool']) * rng.uniform(1 - MULTISTART_NOISE, 1 + MULTISTART_NOISE), index, item)
+            for index, item in enumerate(items)
+        ]
+        keyed.sort(key=lambda entry: (-entry[0], entry[1]))
+        
+        # Bias di rotazione: con probabilità rotation_bias si impone un'orientazione casuale
+        rotation_bias = rng.uniform(0.0, 0.5)
+        sequence = []
+        for _, _, item in keyed:
+            orientations = self.orientations(item)
+            if len(orientations) > 1 and rng.random() < rotation_bias:
+                orientations = [rng.choice(orientations)]
+            sequence.append((item, orientations))
+        return sequence
+    
+    @staticmethod
+    def _placed_area(layout: Optional[BatchLayout]) -> float:
+        """Area posizionata esatta (l'efficienza del layout è arrotondata)"""
+        if not layout:
+            return 0.0
+        return sum(p.width * p.height for p in layout.placements)
+    
+    def start_layout(self, autoclave: Autoclave) -> 'IncrementalLayout':
+        """Layout vuoto da far crescere un ODL alla volta"""
+        return IncrementalLayout(self, autoclave)
+    
+    def place_item(
+        self,
+        skyline: Skyline,
+        item: Dict,
+        orientations: Optional[List[Rectangle]] = None
+    ) -> bool:
+        """Posiziona un item nell'orientazione con la posizione più bassa, poi più a sinistra"""
+        best = None
+        for rect in orientations or self.orientations(item):
+            position = skyline.find_best_position(rect)
+            if position and (best is None or (position[1], position[0]) < (best[1][1], best[1][0])):
+                best = (rect, position)
+        
+        if not best:
+            return False
+        
+        rect, (x, y) = best
+        skyline.place_at(rect, x, y)
+        return True
+    
+    def build_layout(
+        self,
+        packing: Union[Skyline, MaxRects, Guillotine, Shelf],
+        autoclave: Autoclave,
+        vacuum_used: int,
+        weight_used: float
+    ) -> Optional[BatchLayout]:
+        """Converte i rettangoli posizionati (Skyline, MaxRects, Guillotine o Shelf) in un BatchLayout"""
+        if not packing.placed_rectangles:
             return None
         
         # Crea placements
         placements = []
         total_area_used = 0
         
-        for rect, pos in skyline.placed_rectangles:
-            if rect in placed:
-                placements.append(Placement(
-                    odl_id=rect.odl_id,
-                    tool_id=rect.tool_id,
-                    x=pos.x,
-                    y=pos.y,
-                    width=pos.width,
-                    height=pos.height,
-                    rotated=rect.rotated,
-                    level=1 if rect.is_elevated else 0
-                ))
-                total_area_used += pos.width * pos.height
+        for rect, pos in packing.placed_rectangles:
+            placements.append(Placement(
+                odl_id=rect.odl_id,
+                tool_id=rect.tool_id,
+                x=pos.x,
+                y=pos.y,
+                width=pos.width,
+                height=pos.height,
+                rotated=rect.rotated,
+                level=1 if rect.is_elevated else 0
+            ))
+            total_area_used += pos.width * pos.height
         
         # Calcola efficienza
         efficiency = total_area_used / autoclave.area
@@ -353,4 +866,124 @@ class RectanglePacker:
             efficiency=round(efficiency, 3),
             total_weight=round(weight_used, 2),
             vacuum_lines_used=vacuum_used
-        )
\ No newline at end of file
+        )
+    
+    @staticmethod
+    def odl_items(odl: ODL, elevated_for_odl: List[str] = None) -> List[Dict]:
+        """Items (formato NestingEngine) dei tool di un ODL"""
+        elevated_for_odl = elevated_for_odl or []
+        return [
+            {
+                'odl_id': odl.id,
+                'tool_id': tool.id,
+                'tool': tool,
+                'is_elevated': tool.id in elevated_for_odl,
+                'vacuum_lines': odl.vacuum_lines
+            }
+            for tool in odl.tools
+        ]
+    
+    @staticmethod
+    def shape(orientations: List[Rectangle]) -> Tuple[Tuple[float, float], ...]:
+        """
+        Forma del tipo di tool con le sue orientazioni candidate. Skyline, MaxRects
+        e Guillotine perdono spazio libero a ogni posizionamento: una forma
+        rifiutata una volta non entra più e i tool identici successivi si saltano.
+        """
+        return tuple((rect.width, rect.height) for rect in orientations)
+    
+    def orientations(self, item: Dict) -> List[Rectangle]:
+        """Rettangoli candidati per un item: normale e, se permessa e diversa, ruotato"""
+        tool = item['tool']
+        
+        options = [Rectangle(
+            width=tool.width,
+            height=tool.height,
+            odl_id=item['odl_id'],
+            tool_id=item['tool_id'],
+            tool=tool,
+            vacuum_lines=item['vacuum_lines'],
+            is_elevated=item['is_elevated'],
+            rotated=False
+        )]
+        
+        if self.constraints.allow_rotation and tool.width != tool.height:
+            options.append(Rectangle(
+                width=tool.height,
+                height=tool.width,
+                odl_id=item['odl_id'],
+                tool_id=item['tool_id'],
+                tool=tool,
+                vacuum_lines=item['vacuum_lines'],
+                is_elevated=item['is_elevated'],
+                rotated=True
+            ))
+        
+        return options
+
+def _pack_starts_worker(
+    constraints: NestingConstraints,
+    items: List[Dict],
+    autoclave: Autoclave,
+    starts: range,
+    seed: int
+) -> Tuple[Optional[int], Optional[BatchLayout]]:
+    """Entry point dei processi del multi-start: miglior restart di un blocco"""
+    return RectanglePacker(constraints).pack_starts(items, autoclave, starts, seed)
+
+
+class IncrementalLayout:
+    """
+    Layout di un batch in crescita.
+    Mantiene lo stato della skyline tra un inserimento e l'altro: aggiungere un
+    ODL costa il solo posizionamento dei suoi tool nello spazio libero, invece
+    di un nuovo solve completo dell'intero batch.
+    """
+    
+    def __init__(self, packer: RectanglePacker, autoclave: Autoclave):
+        self.packer = packer
+        self.autoclave = autoclave
+        self.skyline = Skyline(autoclave.width, autoclave.height, packer.constraints)
+        self.vacuum_used = 0
+        self.weight_used = 0.0
+        self.area_used = 0.0
+        
+        # ODL accettati e relativi tool rialzati
+        self.odls: List[ODL] = []
+        self.elevated_tools: Dict[str, List[str]] = {}
+    
+    @property
+    def efficiency(self) -> float:
+        return self.area_used / self.autoclave.area
+    
+    def try_add(self, odl: ODL, elevated_for_odl: List[str] = None) -> bool:
+        """
+        Inserisce tutti i tool dell'ODL nello spazio libero.
+        Se anche un solo tool non entra lo stato torna a prima del tentativo:
+        un ODL non viene mai diviso tra batch.
+        """
+        items = self.packer.odl_items(odl, elevated_for_odl)
+        vacuum = sum(item['vacuum_lines'] for item in items)
+        if self.vacuum_used + vacuum > self.autoclave.vacuum_lines:
+            return False
+        
+        saved = self.skyline.snapshot()
+        
+        for item in sorted(items, key=lambda item: item['tool'].area, reverse=True):
+            if not self.packer.place_item(self.skyline, item):
+                self.skyline.restore(saved)
+                return False
+        
+        self.odls.append(odl)
+        if elevated_for_odl:
+            self.elevated_tools[odl.id] = elevated_for_odl
+        self.vacuum_used += vacuum
+        self.weight_used += sum(item['tool'].weight for item in items)
+        self.area_used += sum(item['tool'].area for item in items)
+        return True
+    
+    def to_layout(self) -> Optional[BatchLayout]:
+        """Layout corrente come BatchLayout"""
+        return self.packer.build_layout(
+            self.skyline, self.autoclave, self.vacuum_used, self.weight_used
+        )
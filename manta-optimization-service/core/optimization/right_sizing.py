@@ -0,0 +1,185 @@
+"""
+Right-Sizing dei Batch sulle Autoclavi
+======================================
+
+Il ciclo va sull'autoclave assegnata anche quando il batch prodotto è piccolo:
+quattro tool possono occupare l'autoclave più grande mentre una piccola resta
+libera. Dopo il packing ogni batch viene provato sulle autoclavi più piccole,
+dalla più piccola, con controlli di costo crescente:
+
+1. bound: linee del vuoto, peso massimo, ingresso di ogni tool e area
+   massima ottenibile (max_batch_area) non inferiore all'area del batch;
+2. layout invariato: le coordinate attuali entrano già nell'area utile;
+3. re-pack veloce con la Skyline (pack_best), che deve posizionare tutti i tool.
+
+Lo spostamento è accettato solo se non aumenta il makespan (cure sull'autoclave
+più carica). I batch meno pieni sono provati per primi. Le metriche riportano
+la capacità liberata sulle autoclavi grandi.
+"""
+
+import time
+from typing import List, Dict, Optional
+
+from domain.entities import ODL, Autoclave, BatchLayout, Placement
+from core.optimization.constraints import NestingConstraints
+from core.optimization.rectangle_packer import RectanglePacker
+from core.optimization.bounds import fits, max_batch_area
+
+
+class BatchRightSizer:
+    """Riassegna i batch all'autoclave più piccola in cui entrano senza peggiorare il makespan"""
+
+    def __init__(self, constraints: NestingConstraints, deadline: Optional[float] = None):
+        self.constraints = constraints
+        self.deadline = deadline
+        self.packer = RectanglePacker(constraints)
+        self.last_run: Dict = {}
+
+    def right_size(
+        self,
+        batches: List[BatchLayout],
+        odls: List[ODL],
+        autoclaves: List[Autoclave],
+        elevated_tools: Optional[Dict[str, List[str]]] = None
+    ) -> List[BatchLayout]:
+        """Batch con l'autoclave ridotta dove possibile, nello stesso ordine"""
+        started = time.time()
+        elevated_tools = elevated_tools or {}
+        autoclave_by_id = {a.id: a for a in autoclaves}
+        items_by_key = {
+            (item['odl_id'], item['tool_id']): item
+            for odl in odls
+            for item in RectanglePacker.odl_items(odl, elevated_tools.get(odl.id))
+        }
+
+        loads = {a.id: 0 for a in autoclaves}
+        for batch in batches:
+            if batch.autoclave_id in loads:
+                loads[batch.autoclave_id] += 1
+        loads_before = dict(loads)
+        makespan = max(loads.values(), default=0)
+
+        result = list(batches)
+        moves = []
+        counters = {'candidates': 0, 'bound_rejections': 0, 'kept_layouts': 0, 'repacks': 0}
+        stop_reason = 'completed'
+
+        for index in sorted(range(len(result)), key=lambda i: result[i].efficiency):
+            if self.deadline is not None and time.time() >= self.deadline:
+                stop_reason = 'deadline'
+                break
+
+            batch = result[index]
+            current = autoclave_by_id.get(batch.autoclave_id)
+            keys = [(p.odl_id, p.tool_id) for p in batch.placements]
+            if current is None or any(key not in items_by_key for key in keys):
+                continue
+            items = [items_by_key[key] for key in keys]
+
+            smaller = sorted(
+                (a for a in autoclaves if a.area < current.area and loads[a.id] + 1 <= makespan),
+                key=lambda a: (a.area, a.id)
+            )
+            for target in smaller:
+                counters['candidates'] += 1
+                layout = self._fit(batch, items, target, counters)
+                if layout is None:
+                    continue
+
+                result[index] = layout
+                loads[current.id] -= 1
+                loads[target.id] += 1
+                moves.append({
+                    'from': current.id,
+                    'to': target.id,
+                    'odl_count': len({p.odl_id for p in batch.placements}),
+                    'efficiency_before': batch.efficiency,
+                    'efficiency_after': layout.efficiency,
+                    'freed_area_m2': round((current.area - target.area) / 1_000_000, 2)
+                })
+                break
+
+        self.last_run = {
+            'batches_moved': len(moves),
+            'freed_area_m2': round(sum(move['freed_area_m2'] for move in moves), 2),
+            'freed_by_autoclave': self._freed_by_autoclave(moves),
+            'average_efficiency_before': self._average_efficiency(batches),
+            'average_efficiency_after': self._average_efficiency(result),
+            'loads_before': loads_before,
+            'loads_after': loads,
+            'moves': moves,
+            **counters,
+            'stop_reason': stop_reason,
+            'time': round(time.time() - started, 3)
+        }
+        return result
+
+    def _fit(
+        self,
+        batch: BatchLayout,
+        items: List[Dict],
+        target: Autoclave,
+        counters: Dict[str, int]
+    ) -> Optional[BatchLayout]:
+        """Layout del batch sull'autoclave target, o None: bound, layout invariato, re-pack"""
+        vacuum = sum(item['vacuum_lines'] for item in items)
+        required = sum(int(item['tool'].area) for item in items)
+        if (vacuum > target.vacuum_lines or
+                (target.max_weight is not None and batch.total_weight > target.max_weight) or
+                not all(fits(item['tool'], target, self.constraints) for item in items) or
+                max_batch_area(items, target, self.constraints) < required):
+            counters['bound_rejections'] += 1
+            return None
+
+        kept = self._keep_layout(batch, items, target)
+        if kept is not None:
+            counters['kept_layouts'] += 1
+            return kept
+
+        counters['repacks'] += 1
+        layout = self.packer.pack_best(items, target)
+        if layout and len(layout.placements) == len(items):
+            return layout
+        return None
+
+    def _keep_layout(self, batch: BatchLayout, items: List[Dict], target: Autoclave) -> Optional[BatchLayout]:
+        """Stesse coordinate sul target se i tool restano dentro i margini"""
+        border = self.constraints.min_border_distance
+        if any(p.x + p.width > target.width - border or p.y + p.height > target.height - border
+               for p in batch.placements):
+            return None
+
+        placements = [
+            Placement(
+                odl_id=p.odl_id,
+                tool_id=p.tool_id,
+                x=p.x,
+                y=p.y,
+                width=p.width,
+                height=p.height,
+                rotated=p.rotated,
+                level=p.level
+            )
+            for p in batch.placements
+        ]
+        return BatchLayout(
+            autoclave_id=target.id,
+            placements=placements,
+            efficiency=round(sum(p.width * p.height for p in placements) / target.area, 3),
+            total_weight=batch.total_weight,
+            vacuum_lines_used=sum(item['vacuum_lines'] for item in items)
+        )
+
+    @staticmethod
+    def _freed_by_autoclave(moves: List[Dict]) -> Dict[str, int]:
+        """Cure liberate per autoclave di partenza"""
+        freed: Dict[str, int] = {}
+        for move in moves:
+            freed[move['from']] = freed.get(move['from'], 0) + 1
+        return freed
+
+    @staticmethod
+    def _average_efficiency(batches: List[BatchLayout]) -> float:
+        if not batches:
+            return 0.0
+        return round(sum(batch.efficiency for batch in batches) / len(batches), 3)
@@ -0,0 +1,97 @@
+"""
+Indice Spaziale per Rettangoli
+==============================
+
+Griglia uniforme a bucket (hash per cella) per query di sovrapposizione tra
+rettangoli allineati agli assi. Ogni rettangolo è registrato in tutte le celle
+che copre: una query esamina solo i rettangoli delle celle toccate, quindi il
+costo dipende dalla densità locale e non dal numero totale di rettangoli.
+
+L'indice non conosce il gap: i packer inseriscono e interrogano footprint già
+allargati della distanza minima tra tool, così sovrapposizione equivale a
+violazione della distanza.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+# Lato cella di default (mm): dell'ordine del lato dei tool più piccoli
+DEFAULT_CELL_SIZE = 250.0
+
+Bounds = Tuple[float, float, float, float]
+
+
+class SpatialIndex:
+    """Indice a griglia uniforme su rettangoli (x1, y1, x2, y2)"""
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size deve essere positivo, ricevuto {cell_size}")
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._rects: Dict[int, Bounds] = {}
+        self._next_key = 0
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def insert(self, x1: float, y1: float, x2: float, y2: float) -> int:
+        """Registra un rettangolo e restituisce la chiave per rimuoverlo"""
+        key = self._next_key
+        self._next_key += 1
+        self._rects[key] = (x1, y1, x2, y2)
+        for cell in self._cells_for(x1, y1, x2, y2):
+            self._cells[cell].append(key)
+        return key
+
+    def remove(self, key: int):
+        """Rimuove un rettangolo registrato"""
+        x1, y1, x2, y2 = self._rects.pop(key)
+        for cell in self._cells_for(x1, y1, x2, y2):
+            bucket = self._cells[cell]
+            bucket.remove(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def overlaps(self, x1: float, y1: float, x2: float, y2: float) -> bool:
+        """True se il rettangolo interseca l'interno di uno registrato (il contatto è ammesso)"""
+        for key in self._candidates(x1, y1, x2, y2):
+            rx1, ry1, rx2, ry2 = self._rects[key]
+            if not (x2 <= rx1 or rx2 <= x1 or y2 <= ry1 or ry2 <= y1):
+                return True
+        return False
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> List[Bounds]:
+        """Rettangoli registrati che intersecano l'interno di quello dato"""
+        found = []
+        for key in self._candidates(x1, y1, x2, y2):
+            rx1, ry1, rx2, ry2 = self._rects[key]
+            if not (x2 <= rx1 or rx2 <= x1 or y2 <= ry1 or ry2 <= y1):
+                found.append((rx1, ry1, rx2, ry2))
+        return found
+
+    def contains_point(self, px: float, py: float) -> bool:
+        """True se il punto cade in un rettangolo registrato (bordi inclusi)"""
+        cell = (math.floor(px / self.cell_size), math.floor(py / self.cell_size))
+        for key in self._cells.get(cell, ()):
+            x1, y1, x2, y2 = self._rects[key]
+            if x1 <= px <= x2 and y1 <= py <= y2:
+                return True
+        return False
+
+    def _candidates(self, x1: float, y1: float, x2: float, y2: float) -> Set[int]:
+        """Chiavi dei rettangoli registrati nelle celle toccate"""
+        candidates: Set[int] = set()
+        for cell in self._cells_for(x1, y1, x2, y2):
+            bucket = self._cells.get(cell)
+            if bucket:
+                candidates.update(bucket)
+        return candidates
+
+    def _cells_for(self, x1: float, y1: float, x2: float, y2: float):
+        """Celle coperte dal rettangolo (bordi inclusi, per i punti di contatto)"""
+        size = self.cell_size
+        for cx in range(math.floor(x1 / size), math.floor(x2 / size) + 1):
+            for cy in range(math.floor(y1 / size), math.floor(y2 / size) + 1):
+                yield (cx, cy)
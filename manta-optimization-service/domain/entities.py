@@ -73,6 +73,7 @@ class BatchLayout:
     efficiency: float
     total_weight: float
     vacuum_lines_used: int
+    area_upper_bound: Optional[int] = None  # Area massima ottenibile (mm²), da bounds
     
     @property
     def is_valid(self) -> bool:
@@ -1,14 +1,32 @@
 import pytest
 import sys
 import os
+import random
+import time
+import dataclasses
+import queue
+from unittest.mock import patch
+from ortools.sat.python import cp_model
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from domain.entities import Tool, ODL, Autoclave, CycleGroup
+from domain.entities import Tool, ODL, Autoclave, CycleGroup, BatchLayout
 from core.pre_filters.curing_cycle_filter import CuringCycleFilter
 from core.pre_filters.elevated_support_filter import ElevatedSupportFilter
 from core.optimization.multi_autoclave_optimizer import MultiAutoclaveOptimizer
-from core.optimization.constraints import NestingConstraints
+from core.optimization.constraints import (
+    NestingConstraints, MAXRECTS_RULES, GUILLOTINE_CHOICES, GUILLOTINE_SPLITS, SHELF_RULES
+)
 from core.optimization.nesting_engine import NestingEngine
+from core.optimization.rectangle_packer import RectanglePacker
+from core.optimization.portfolio import PORTFOLIO_ENGINES, _run_engine
+from core.optimization.spatial_index import SpatialIndex
+from core.optimization.genetic import GeneticSolver
+from core.optimization.bounds import max_batch_area, batch_count_lower_bound, placed_area, fits
+from core.optimization.conflict_graph import build_conflict_graph
+from core.optimization.item_types import aggregate_items
+from core.optimization.assignment import CycleAssignmentSolver
+from core.optimization.multi_bin import MultiBinSolver
+from core.optimization.layout_cache import layout_fingerprint
 
 class TestOptimizationAlgorithm:
     """Test suite per verificare l'efficienza e il funzionamento dell'algoritmo"""
@@ -161,6 +179,946 @@ class TestOptimizationAlgorithm:
                     (p2.x, p2.y, p2.x + p2.width, p2.y + p2.height)
                 )
     
+    def test_no_overlap_2d_model(self):
+        """Test formulazione CP-SAT a intervalli NoOverlap2D"""
+        constraints = NestingConstraints(
+            min_border_distance=50,
+            min_tool_distance=30,
+            allow_rotation=True,
+            cpsat_model="no_overlap_2d"
+        )
+        assert constraints.validate()
+        engine = NestingEngine(constraints)
+
+        odls = self.odls_cycle_b[:3]
+        result = engine.optimize_single_autoclave(odls, self.autoclaves[2])
+
+        assert result is not None
+        assert len(result.placements) == len(odls)
+        assert engine.last_solve_stats['cpsat_model'] == "no_overlap_2d"
+
+        # Verifica gap minimo e contenimento nei margini
+        self._assert_valid_layout(result, self.autoclaves[2], constraints)
+
+    def test_symmetry_breaking_identical_tools(self):
+        """Test rottura simmetrie tra tool identici"""
+        engine = NestingEngine(self.constraints)
+        odls = [
+            ODL(
+                id=f"ODL-SYM{i}",
+                odl_number=f"ODL-SYM-{i:04d}",
+                part_number="PN-SYM",
+                curing_cycle="CICLO_A",
+                vacuum_lines=1,
+                tools=[Tool(id=f"T-SYM{i}", width=300, height=400, weight=5)]
+            )
+            for i in range(6)
+        ]
+
+        items = [
+            {'odl_id': odl.id, 'tool_id': odl.tools[0].id, 'tool': odl.tools[0],
+             'is_elevated': False, 'vacuum_lines': odl.vacuum_lines}
+            for odl in odls
+        ]
+        assert engine._find_identical_item_groups(items) == [list(range(6))]
+
+        result = engine.optimize_single_autoclave(odls, self.autoclaves[2])
+        assert result is not None
+        assert len(result.placements) == len(odls)
+
+        # Gli item identici sono ordinati lessicograficamente su (y, x)
+        keys = [(p.y, p.x) for p in result.placements]
+        assert keys == sorted(keys)
+
+    def test_skyline_packer_respects_gaps(self):
+        """Test packer Skyline con bordi e distanza minima tra tool"""
+
+        packer = RectanglePacker(self.constraints)
+        odls = self.odls_cycle_a + self.odls_cycle_b[:3]  # 19/20 linee vuoto
+        for odl in odls:
+            odl.curing_cycle = "CICLO_A"
+
+        result = packer.pack_rectangles(odls, self.autoclaves[0])
+
+        assert result is not None
+        assert len(result.placements) == len(odls)
+        self._assert_valid_layout(result, self.autoclaves[0], self.constraints)
+
+    def test_warm_start_from_skyline(self):
+        """Test avvio CP-SAT dalla soluzione euristica Skyline"""
+        engine = NestingEngine(self.constraints)
+        odls = self.odls_cycle_b
+
+        result = engine.optimize_single_autoclave(odls, self.autoclaves[1])
+
+        stats = engine.last_solve_stats
+        assert stats['warm_start_efficiency'] is not None
+        assert stats['warm_start_bound']
+        assert result.efficiency >= stats['warm_start_efficiency']
+        self._assert_valid_layout(result, self.autoclaves[1], self.constraints)
+        assert stats['warm_start_won'] == (engine.solver_summary()['warm_start_wins'] == 1)
+
+        # CP-SAT senza soluzione: resta il layout di partenza, il motore riportato è cpsat
+        items = engine.build_items(odls, {})
+        with patch.object(engine, '_solve_with_cpsat', return_value=None):
+            layout, engine_name = engine._solve_with_engine(items, self.autoclaves[1])
+        assert engine_name == "cpsat" and layout is not None
+        assert engine.last_solve_stats['warm_start_won']
+
+        # Hint già all'upper bound: CP-SAT saltato, restituito il layout di partenza
+        engine.start_request()
+        small = [
+            ODL(id=f"ODL-UB{i}", odl_number=f"ODL-UB{i}", part_number="PN-UB", curing_cycle="CICLO_B",
+                vacuum_lines=1, tools=[Tool(id=f"T-UB{i}", width=300, height=200, weight=2)])
+            for i in range(3)
+        ]
+        result = engine.optimize_single_autoclave(small, self.autoclaves[1])
+        assert len(result.placements) == 3
+        assert engine.last_solve_stats['stop_reason'] == 'upper_bound'
+        assert engine.last_solve_stats['warm_start_won']
+        summary = engine.solver_summary()
+        assert summary['engines_used'] == {'cpsat': 1} and summary['warm_start_wins'] == 1
+
+    def test_adaptive_solver_budget(self):
+        """Test budget adattivo: istanze piccole ricevono poco tempo e pochi worker"""
+        import time
+
+        engine = NestingEngine(self.constraints)
+        result = engine.optimize_single_autoclave(self.odls_cycle_a[:3], self.autoclaves[2])
+
+        stats = engine.last_solve_stats
+        assert result is not None
+        assert stats['time_limit'] < self.constraints.timeout_seconds
+        assert stats['workers'] <= 2
+        assert stats['stop_reason'] in ('optimal', 'upper_bound')
+
+        # Deadline globale già scaduta: CP-SAT saltato, resta il layout euristico
+        engine.start_request(deadline=time.time() - 1)
+        result = engine.optimize_single_autoclave(self.odls_cycle_a[:3], self.autoclaves[2])
+
+        assert result is not None
+        assert len(result.placements) == 3
+        summary = engine.solver_summary()
+        assert summary['stop_reasons'] == {'deadline': 1}
+        assert summary['deadline_reached']
+
+    def test_grid_resolution_is_collision_free(self):
+        """Test griglia grossolana: soluzione valida a piena risoluzione"""
+        odls = [
+            ODL(
+                id=f"ODL-GRID{i}",
+                odl_number=f"ODL-GRID-{i:04d}",
+                part_number="PN-GRID",
+                curing_cycle="CICLO_A",
+                vacuum_lines=1,
+                tools=[Tool(id=f"T-GRID{i}", width=333 + i * 7, height=417 - i * 3, weight=5)]
+            )
+            for i in range(6)
+        ]
+
+        for refinement in (False, True):
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                grid_resolution=25,
+                grid_refinement=refinement,
+                warm_start=False
+            )
+            engine = NestingEngine(constraints)
+            result = engine.optimize_single_autoclave(odls, self.autoclaves[2])
+
+            assert result is not None
+            assert len(result.placements) == len(odls)
+            self._assert_valid_layout(result, self.autoclaves[2], constraints)
+
+            if not refinement:
+                # Coordinate sulla griglia da 25 mm (a partire dal bordo)
+                assert all((p.x - 50) % 25 == 0 and (p.y - 50) % 25 == 0 for p in result.placements)
+
+    def test_incremental_batch_growth(self):
+        """Test crescita incrementale: ODL mai divisi, non più batch del re-solve completo"""
+        odls = [
+            ODL(
+                id=f"ODL-INC{i}",
+                odl_number=f"ODL-INC-{i:04d}",
+                part_number="PN-INC",
+                curing_cycle="CICLO_A",
+                vacuum_lines=1 + i % 3,
+                tools=[Tool(id=f"T-INC{i}_{j}", width=500 + 40 * i, height=350 + 25 * i, weight=5)
+                       for j in range(1 + i % 2)]
+            )
+            for i in range(12)
+        ]
+        autoclave = self.autoclaves[2]
+
+        batches_by_mode = {}
+        for incremental in (True, False):
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                incremental_batches=incremental
+            )
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            batches_by_mode[incremental] = optimizer._create_multiple_batches_per_autoclave(
+                odls, autoclave, {}
+            )
+
+        batches = batches_by_mode[True]
+        placed = [p.odl_id for b in batches for p in b.placements]
+        assert set(placed) == {odl.id for odl in odls}
+        assert len(placed) == sum(len(odl.tools) for odl in odls)
+        assert len(batches) <= len(batches_by_mode[False])
+
+        for batch in batches:
+            self._assert_valid_layout(batch, autoclave, self.constraints)
+            assert batch.vacuum_lines_used <= autoclave.vacuum_lines
+
+    def test_parallel_cycles_match_sequential(self):
+        """Test pool di processi per cicli: stessi batch, nello stesso ordine, del sequenziale"""
+        cycle_jobs = [
+            (self.odls_cycle_a, self.autoclaves[0]),
+            (self.odls_cycle_b, self.autoclaves[1])
+        ]
+
+        results = {}
+        for workers in (1, 2):
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                cycle_workers=workers
+            )
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            results[workers], parallelism = optimizer._optimize_cycles(
+                cycle_jobs, {}, time.time() + 60
+            )
+            assert parallelism['processes'] == workers
+
+        for sequential, parallel in zip(results[1], results[2]):
+            assert [sorted({p.odl_id for p in b.placements}) for b in sequential] == \
+                   [sorted({p.odl_id for p in b.placements}) for b in parallel]
+            assert [b.efficiency for b in sequential] == [b.efficiency for b in parallel]
+            assert all(b.autoclave_id == sequential[0].autoclave_id for b in parallel)
+
+        # Default (cycle_workers=0) su 8 core: un processo per ciclo, thread ridotti
+        optimizer = MultiAutoclaveOptimizer(NestingConstraints(solver_threads=6))
+        with patch("core.optimization.multi_autoclave_optimizer.os.cpu_count", return_value=8):
+            assert optimizer._cycle_pool_size(5) == (5, 1)
+            assert optimizer._cycle_pool_size(2) == (2, 4)
+            assert optimizer._cycle_pool_size(1) == (1, 6)
+            assert optimizer._cycle_pool_size(12) == (8, 1)
+            # Dentro un processo daemon niente pool annidato
+            with patch("core.optimization.parallel.multiprocessing.current_process") as current:
+                current.return_value.daemon = True
+                assert optimizer._cycle_pool_size(5) == (1, 6)
+
+    def test_portfolio_engine(self):
+        """Test portfolio: motori in gara, vincitore registrato, stop all'upper bound"""
+        constraints = NestingConstraints(
+            min_border_distance=50,
+            min_tool_distance=30,
+            engine="auto"
+        )
+        engine = NestingEngine(constraints)
+
+        # Istanza facile: tutti i tool entrano, l'upper bound è raggiungibile
+        result = engine.optimize_single_autoclave(self.odls_cycle_a, self.autoclaves[0])
+
+        assert result is not None
+        assert len(result.placements) == len(self.odls_cycle_a)
+        self._assert_valid_layout(result, self.autoclaves[0], constraints)
+
+        portfolio = engine.last_portfolio
+        assert portfolio['winner'] in PORTFOLIO_ENGINES
+        assert portfolio['upper_bound_reached']
+        assert set(portfolio['engines']) | set(portfolio['cancelled']) <= set(PORTFOLIO_ENGINES)
+        assert engine.solver_summary()['portfolio_wins'] == {portfolio['winner']: 1}
+
+    def test_portfolio_with_parallel_multistart(self):
+        """Test portfolio con multi-start parallelo: i motori in processi separati non aprono pool annidati"""
+        constraints = NestingConstraints(
+            min_border_distance=50,
+            min_tool_distance=30,
+            engine="auto",
+            multistart_runs=64,
+            multistart_workers=4
+        )
+        engine = NestingEngine(constraints)
+        result = engine.optimize_single_autoclave(self.odls_cycle_b, self.autoclaves[2])
+
+        assert result is not None
+        self._assert_valid_layout(result, self.autoclaves[2], constraints)
+        # Nessun motore arrivato a mani vuote (prima: AssertionError nei processi daemon)
+        portfolio = engine.last_portfolio
+        assert portfolio['engines']
+        assert all(stats['efficiency'] > 0 for stats in portfolio['engines'].values())
+        assert engine.solver_summary()['engine_errors'] == {}
+
+        # Un motore che va in errore pubblica il messaggio invece di un risultato vuoto
+        results = queue.Queue()
+        broken_hint = BatchLayout(autoclave_id="AC3", placements=None, efficiency=0.5,
+                                  total_weight=0, vacuum_lines_used=0)
+        _run_engine("cpsat", constraints, time.time() + 5, engine.build_items(self.odls_cycle_b),
+                    self.autoclaves[2], broken_hint, results)
+        name, layout, _, _, _, error = results.get_nowait()
+        assert name == "cpsat" and layout is None and error.startswith("TypeError")
+        engine.record_engine_error(name, error)
+        assert engine.solver_summary()['engine_errors'] == {"cpsat": 1}
+        assert engine.solver_summary()['engine_error_messages']["cpsat"] == error
+
+    def test_greedy_maxrects_rules(self):
+        """Test greedy MaxRects: layout valido per ogni regola, anche su autoclavi enormi"""
+        odls = self.odls_cycle_a + self.odls_cycle_b[:3]
+        huge = Autoclave(id="AC-HUGE", code="AC-HUGE", width=60000, height=30000, vacuum_lines=20)
+
+        for rule in MAXRECTS_RULES:
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                maxrects_rule=rule
+            )
+            assert constraints.validate()
+            engine = NestingEngine(constraints)
+            items = [
+                {'odl_id': odl.id, 'tool_id': tool.id, 'tool': tool,
+                 'is_elevated': False, 'vacuum_lines': odl.vacuum_lines}
+                for odl in odls for tool in odl.tools
+            ]
+
+            for autoclave in (self.autoclaves[0], huge):
+                start = time.time()
+                result = engine._solve_with_greedy(items, autoclave)
+
+                assert time.time() - start < 1.0
+                assert result is not None
+                assert len(result.placements) == len(items)
+                self._assert_valid_layout(result, autoclave, constraints)
+
+    def test_guillotine_packer(self):
+        """Test packer a ghigliottina: layout valido e separabile con tagli passanti"""
+        odls = self.odls_cycle_a + self.odls_cycle_b[:3]
+        autoclave = self.autoclaves[0]
+        items = [
+            {'odl_id': odl.id, 'tool_id': tool.id, 'tool': tool,
+             'is_elevated': False, 'vacuum_lines': odl.vacuum_lines}
+            for odl in odls for tool in odl.tools
+        ]
+
+        for choice in GUILLOTINE_CHOICES:
+            for split in GUILLOTINE_SPLITS:
+                constraints = NestingConstraints(
+                    min_border_distance=50,
+                    min_tool_distance=30,
+                    guillotine_choice=choice,
+                    guillotine_split=split
+                )
+                assert constraints.validate()
+                result = RectanglePacker(constraints).pack_guillotine(items, autoclave)
+
+                assert result is not None
+                assert len(result.placements) == len(items)
+                self._assert_valid_layout(result, autoclave, constraints)
+                rects = [
+                    (p.x, p.y, p.x + p.width + constraints.min_tool_distance,
+                     p.y + p.height + constraints.min_tool_distance)
+                    for p in result.placements
+                ]
+                assert self._is_guillotine(rects)
+
+        assert not NestingConstraints(guillotine_split="diagonal").validate()
+
+    def test_shelf_preview_engine(self):
+        """Test anteprima shelf: layout valido per ogni regola, 200 tool sotto i 20 ms"""
+        rng = random.Random(3)
+        autoclave = Autoclave(id="AC-LONG", code="AC-LONG", width=4000, height=40000, vacuum_lines=1000)
+        items = []
+        for i in range(200):
+            tool = Tool(id=f"T-SH-{i}", width=rng.randint(300, 1500), height=rng.randint(200, 900), weight=1)
+            items.append({'odl_id': f"ODL-SH-{i}", 'tool_id': tool.id, 'tool': tool,
+                          'is_elevated': False, 'vacuum_lines': 1})
+
+        for rule in SHELF_RULES:
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                shelf_rule=rule
+            )
+            assert constraints.validate()
+            packer = RectanglePacker(constraints)
+
+            # Migliore di più ripetizioni: misura la latenza, non il rumore della macchina
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                result = packer.pack_shelf(items, autoclave)
+                timings.append(time.perf_counter() - start)
+
+            assert min(timings) < 0.02
+            assert len(result.placements) == len(items)
+            self._assert_valid_layout(result, autoclave, constraints)
+
+        engine = NestingEngine(NestingConstraints(engine="shelf"))
+        result = engine.optimize_single_autoclave(self.odls_cycle_a, self.autoclaves[0])
+        assert result is not None
+        assert engine.solver_summary()['engines_used'] == {"shelf": 1}
+
+    def _is_guillotine(self, rects) -> bool:
+        """True se i rettangoli sono separabili ricorsivamente con tagli passanti"""
+        if len(rects) <= 1:
+            return True
+        for axis in (0, 1):
+            for cut in sorted({r[axis + 2] for r in rects}):
+                lower = [r for r in rects if r[axis + 2] <= cut]
+                upper = [r for r in rects if r[axis] >= cut]
+                if lower and upper and len(lower) + len(upper) == len(rects):
+                    return self._is_guillotine(lower) and self._is_guillotine(upper)
+        return False
+
+    def test_spatial_index_matches_linear_scan(self):
+        """Test indice spaziale: stesse risposte della scansione lineare, anche dopo rimozioni"""
+        rng = random.Random(7)
+        rects = []
+        for _ in range(300):
+            x, y = rng.uniform(0, 5000), rng.uniform(0, 5000)
+            rects.append((x, y, x + rng.uniform(10, 600), y + rng.uniform(10, 600)))
+
+        index = SpatialIndex(cell_size=200)
+        keys = [index.insert(*r) for r in rects]
+        for key in keys[::3]:
+            index.remove(key)
+        remaining = [r for i, r in enumerate(rects) if i % 3 != 0]
+        assert len(index) == len(remaining)
+
+        for _ in range(500):
+            x, y = rng.uniform(-100, 5100), rng.uniform(-100, 5100)
+            probe = (x, y, x + rng.uniform(1, 400), y + rng.uniform(1, 400))
+            expected = [r for r in remaining if self._rectangles_overlap(probe, r)]
+            assert index.overlaps(*probe) == bool(expected)
+            assert sorted(index.query(*probe)) == sorted(expected)
+            assert index.contains_point(x, y) == any(
+                r[0] <= x <= r[2] and r[1] <= y <= r[3] for r in remaining
+            )
+
+        # Il contatto tra bordi non è una sovrapposizione
+        touching = SpatialIndex()
+        touching.insert(0, 0, 250, 250)
+        assert not touching.overlaps(250, 0, 500, 250)
+
+    def test_skyline_scales_to_thousands_of_tools(self):
+        """Test Skyline su array: layout valido e ~10k rettangoli in meno di un secondo"""
+        rng = random.Random(3)
+        packer = RectanglePacker(self.constraints)
+
+        def random_items(count):
+            return [
+                {'odl_id': f"ODL-SKY{i}", 'tool_id': f"T-SKY{i}",
+                 'tool': Tool(id=f"T-SKY{i}", width=rng.randint(100, 600), height=rng.randint(100, 600), weight=1),
+                 'is_elevated': False, 'vacuum_lines': 0}
+                for i in range(count)
+            ]
+
+        autoclave = Autoclave(id="AC-SKY", code="AC-SKY", width=3000, height=40000, vacuum_lines=1)
+        result = packer.pack_items(random_items(300), autoclave)
+        assert len(result.placements) == 300
+        self._assert_valid_layout(result, autoclave, self.constraints)
+
+        tall = Autoclave(id="AC-TALL", code="AC-TALL", width=6000, height=10 ** 7, vacuum_lines=1)
+        items = random_items(10000)
+        start = time.time()
+        result = packer.pack_items(items, tall)
+        assert time.time() - start < 1.0
+        assert len(result.placements) == len(items)
+
+    def test_engine_selection(self):
+        """Test scelta motore: skyline e greedy usati davvero e riportati nelle metriche"""
+        for engine_name in ("skyline", "greedy"):
+            odls = [
+                ODL(
+                    id=f"ODL-ENG-{engine_name}{i}",
+                    odl_number=f"ODL-ENG-{i:04d}",
+                    part_number="PN-ENG",
+                    curing_cycle="CICLO_A",
+                    vacuum_lines=2,
+                    tools=[Tool(id=f"T-ENG-{engine_name}{i}", width=400 + 50 * i, height=300, weight=5)]
+                )
+                for i in range(6)
+            ]
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                engine=engine_name
+            )
+            assert constraints.validate()
+
+            optimizer = MultiAutoclaveOptimizer(constraints)
+            batches, metrics = optimizer.optimize(odls, self.autoclaves[:1])
+
+            # Il validator scarta gli ODL con stato produzione (simulato) incompatibile
+            assert metrics['total_odls_placed'] == metrics['total_odls_valid'] > 0
+            assert metrics['engine'] == engine_name
+            assert set(metrics['solver']['engines_used']) == {engine_name}
+            assert metrics['solver']['calls'] == 0  # Nessuna chiamata CP-SAT
+            for batch in batches:
+                self._assert_valid_layout(batch, self.autoclaves[0], constraints)
+
+        assert not NestingConstraints(engine="simplex").validate()
+
+    def test_multistart_skyline(self):
+        """Test multi-start Skyline: mai peggio del passaggio singolo, stesso esito con più processi"""
+        rng = random.Random(11)
+        items = [
+            {'odl_id': f"ODL-MS{i}", 'tool_id': f"T-MS{i}",
+             'tool': Tool(id=f"T-MS{i}", width=rng.randint(300, 1500), height=rng.randint(200, 1000), weight=5),
+             'is_elevated': False, 'vacuum_lines': 1}
+            for i in range(25)
+        ]
+        autoclave = self.autoclaves[1]
+
+        single = RectanglePacker(self.constraints).pack_items(items, autoclave)
+        layouts = []
+        for workers in (1, 2):
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                multistart_runs=32,
+                multistart_workers=workers,
+                random_seed=5
+            )
+            layouts.append(RectanglePacker(constraints).pack_best(items, autoclave))
+
+        sequential, parallel = layouts
+        assert sequential.efficiency >= single.efficiency
+        assert [(p.tool_id, p.x, p.y, p.rotated) for p in sequential.placements] == \
+               [(p.tool_id, p.x, p.y, p.rotated) for p in parallel.placements]
+        self._assert_valid_layout(sequential, autoclave, self.constraints)
+
+    def test_genetic_engine(self):
+        """Test GA: mai peggio della Skyline, deterministico col seed, stesso esito con più processi"""
+        rng = random.Random(13)
+        items = [
+            {'odl_id': f"ODL-GA{i}", 'tool_id': f"T-GA{i}",
+             'tool': Tool(id=f"T-GA{i}", width=rng.randint(300, 1500), height=rng.randint(200, 1000), weight=5),
+             'is_elevated': False, 'vacuum_lines': 1}
+            for i in range(25)
+        ]
+        autoclave = self.autoclaves[1]
+
+        single = RectanglePacker(self.constraints).pack_items(items, autoclave)
+        layouts = []
+        for workers in (1, 2):
+            constraints = NestingConstraints(
+                min_border_distance=50,
+                min_tool_distance=30,
+                genetic_population=16,
+                genetic_generations=10,
+                genetic_workers=workers,
+                random_seed=5
+            )
+            assert constraints.validate()
+            solver = GeneticSolver(constraints)
+            layouts.append(solver.solve(items, autoclave))
+            assert solver.last_run['generations'] == 10
+
+        sequential, parallel = layouts
+
+        # Solve successivo: stesso pool di processi, nessun nuovo avvio
+        again = solver.solve(items, autoclave)
+        assert solver.last_run['workers'] == 2 and not solver.last_run['pool_started']
+        assert [(p.tool_id, p.x, p.y) for p in again.placements] == [(p.tool_id, p.x, p.y) for p in parallel.placements]
+        single_area = sum(p.width * p.height for p in single.placements)
+        assert sum(p.width * p.height for p in sequential.placements) >= single_area
+        assert [(p.tool_id, p.x, p.y, p.rotated) for p in sequential.placements] == \
+               [(p.tool_id, p.x, p.y, p.rotated) for p in parallel.placements]
+        self._assert_valid_layout(sequential, autoclave, self.constraints)
+
+        assert not NestingConstraints(genetic_population=4, genetic_elite=4).validate()
+
+    def test_lns_improves_layout(self):
+        """Test LNS: layout valido, mai peggio del punto di partenza, traiettoria crescente"""
+        rng = random.Random(17)
+        items = [
+            {'odl_id': f"ODL-LNS{i // 2}", 'tool_id': f"T-LNS{i}",
+             'tool': Tool(id=f"T-LNS{i}", width=rng.randint(150, 600), height=rng.randint(100, 450), weight=1),
+             'is_elevated': False, 'vacuum_lines': 1}
+            for i in range(60)
+        ]
+        autoclave = Autoclave(id="AC-LNS", code="AC-LNS", width=3000, height=2000, vacuum_lines=1000)
+        constraints = NestingConstraints(
+            min_border_distance=50,
+            min_tool_distance=30,
+            timeout_seconds=2,
+            engine="lns"
+        )
+        assert constraints.validate()
+
+        start = RectanglePacker(constraints).pack_best(items, autoclave)
+        engine = NestingEngine(constraints)
+        result, engine_name = engine._solve_with_engine(items, autoclave)
+
+        assert engine_name == "lns"
+        assert result.efficiency >= start.efficiency
+        self._assert_valid_layout(result, autoclave, constraints)
+
+        trajectory = engine.last_lns['trajectory']
+        areas = [step['area'] for step in trajectory]
+        assert areas == sorted(areas)
+        assert areas[-1] == sum(int(i['tool'].area) for i in items
+                                if (i['odl_id'], i['tool_id']) in {(p.odl_id, p.tool_id) for p in result.placements})
+        assert engine.solver_summary()['lns_iterations'] == engine.last_lns['iterations'] > 0
+
+    def test_area_and_batch_bounds(self):
+        """Test bound: knapsack esatto sul vuoto, lower bound sui batch, stop di CP-SAT all'upper bound"""
+        import itertools
+
+        rng = random.Random(18)
+        items = [
+            {'odl_id': f"ODL-BND{i}", 'tool_id': f"T-BND{i}",
+             'tool': Tool(id=f"T-BND{i}", width=rng.randint(100, 400), height=rng.randint(100, 400), weight=1),
+             'is_elevated': False, 'vacuum_lines': rng.randint(1, 4)}
+            for i in range(8)
+        ]
+        large = Autoclave(id="AC-BND", code="AC-BND", width=10000, height=10000, vacuum_lines=7)
+
+        # Con area non vincolante il bound coincide con il knapsack esatto sulle linee vuoto
+        best = max(
+            sum(int(item['tool'].area) for item in subset)
+            for r in range(len(items) + 1)
+            for subset in itertools.combinations(items, r)
+            if sum(item['vacuum_lines'] for item in subset) <= large.vacuum_lines
+        )
+        assert max_batch_area(items, large, self.constraints) == best
+
+        # Il lower bound sui batch non supera mai i batch effettivamente creati
+        odls = self.odls_cycle_a + self.odls_cycle_b
+        for odl in odls:
+            odl.curing_cycle = "CICLO_A"
+        engine = NestingEngine(self.constraints)
+        autoclave = self.autoclaves[2]
+        batches = MultiAutoclaveOptimizer(self.constraints)._create_multiple_batches_per_autoclave(
+            odls, autoclave, {}
+        )
+        assert batch_count_lower_bound(engine.build_items(odls), autoclave, self.constraints) <= len(batches)
+        for batch in batches:
+            assert placed_area(batch, engine.build_items(odls)) <= batch.area_upper_bound
+
+        # Tutti i tool entrano: l'hint Skyline è ottimo dimostrato e CP-SAT non viene risolto
+        engine = NestingEngine(self.constraints)
+        result = engine.optimize_single_autoclave(self.odls_cycle_a[:3], self.autoclaves[0])
+        assert len(result.placements) == 3
+        assert engine.last_solve_stats['status'] == 'SKIPPED'
+        assert engine.last_solve_stats['stop_reason'] == 'upper_bound'
+
+    def test_conflict_graph_pruning(self):
+        """Test grafo dei conflitti: relazioni possibili, clique AtMostOne, item fuori misura scartati"""
+        # Area utile 1000 x 600, gap 20
+        dims = [(700, 500), (650, 400), (280, 550), (200, 60), (1200, 300), (400, 450)]
+        graph = build_conflict_graph(dims, 20, 1000, 600, allow_rotation=False)
+
+        assert graph.fits.tolist() == [True, True, True, True, False, True]
+        assert not graph.horizontal[0, 1] and not graph.vertical[0, 1]   # Conflitto
+        assert graph.horizontal[0, 2] and not graph.vertical[0, 2]       # Solo affiancati
+        assert graph.horizontal[0, 3] and graph.vertical[0, 3]
+        assert graph.conflict_count() == 3
+        assert not graph.conflicts[4].any()
+        assert graph.cliques() == [[0, 1, 5]]
+
+        # Ruotato il tool 4 resta fuori misura (300 x 1200)
+        assert not build_conflict_graph(dims, 20, 1000, 600, allow_rotation=True).fits[4]
+
+        border = self.constraints.min_border_distance
+        autoclave = Autoclave(id="AC-CNF", code="AC-CNF", width=1000 + 2 * border,
+                              height=600 + 2 * border, vacuum_lines=10)
+        items = [
+            {'odl_id': f"ODL-CNF{i}", 'tool_id': f"T-CNF{i}", 'tool': Tool(id=f"T-CNF{i}", width=w, height=h, weight=1),
+             'is_elevated': False, 'vacuum_lines': 1}
+            for i, (w, h) in enumerate(dims)
+        ]
+        constraints = NestingConstraints(
+            min_border_distance=border,
+            min_tool_distance=20,
+            allow_rotation=False,
+            timeout_seconds=5
+        )
+        engine = NestingEngine(constraints)
+        result = engine._solve_with_cpsat(items, autoclave)
+
+        stats = engine.last_solve_stats
+        assert stats['dropped_items'] == 1 and stats['conflicts'] == 3
+        placed = {p.tool_id for p in result.placements}
+        assert len(placed & {"T-CNF0", "T-CNF1", "T-CNF5"}) == 1 and "T-CNF4" not in placed
+        self._assert_valid_layout(result, autoclave, constraints)
+
+    def test_item_type_aggregation(self):
+        """Test aggregazione per tipo: bound e grafo sui tipi uguali a quelli per item, packing ripetitivo"""
+        import itertools
+        import numpy as np
+
+        geometries = [(400, 300, 1), (350, 350, 2), (900, 500, 3)]
+        items = [
+            {'odl_id': f"ODL-TYP{i}", 'tool_id': f"T-TYP{i}",
+             'tool': Tool(id=f"T-TYP{i}", width=w, height=h, weight=2),
+             'is_elevated': False, 'vacuum_lines': lines}
+            for i, (w, h, lines) in enumerate(geometries * 4)
+        ]
+        types = aggregate_items(items)
+        assert [(t.width, t.height, t.count) for t in types] == [(400, 300, 4), (350, 350, 4), (900, 500, 4)]
+        assert types[1].indices == [1, 4, 7, 10]
+        assert types[2].fitting_orientations(600, 1000, allow_rotation=True) == [(500, 900, True)]
+
+        # Knapsack limitato sui tipi uguale al knapsack esatto sui singoli item
+        large = Autoclave(id="AC-TYP", code="AC-TYP", width=20000, height=20000, vacuum_lines=11)
+        best = max(
+            sum(int(item['tool'].area) for item in subset)
+            for r in range(len(items) + 1)
+            for subset in itertools.combinations(items, r)
+            if sum(item['vacuum_lines'] for item in subset) <= large.vacuum_lines
+        )
+        assert max_batch_area(items, large, self.constraints) == best
+
+        # Grafo dei conflitti sui tipi espanso sugli item
+        engine = NestingEngine(self.constraints)
+        dims = [engine._grid_dims(item['tool'], 1) for item in items]
+        expected = build_conflict_graph(dims, 30, 1300, 700, allow_rotation=True)
+        graph = engine._conflict_graph(items, 1, 30, 1300, 700)
+        assert np.array_equal(graph.horizontal, expected.horizontal)
+        assert np.array_equal(graph.vertical, expected.vertical)
+
+        # Molti tool identici: ogni item posizionato al più una volta, layout valido
+        autoclave = self.autoclaves[0]
+        repeated = [dict(item, odl_id=f"{item['odl_id']}-{k}", tool_id=f"{item['tool_id']}-{k}")
+                    for k in range(10) for item in items]
+        for item in repeated:
+            item['vacuum_lines'] = 0
+        layout = RectanglePacker(self.constraints).pack_items(repeated, autoclave)
+        keys = [(p.odl_id, p.tool_id) for p in layout.placements]
+        assert len(keys) == len(set(keys)) < len(repeated)
+        self._assert_valid_layout(layout, autoclave, self.constraints)
+
+    def test_cycle_assignment(self):
+        """Test assegnazione globale cicli -> autoclavi: ODL coperti una volta, makespan bilanciato"""
+        large = Autoclave(id="AC-ASG1", code="AC-ASG1", width=3000, height=2000, vacuum_lines=6)
+        small = Autoclave(id="AC-ASG2", code="AC-ASG2", width=1500, height=1200, vacuum_lines=6)
+        cycles = {
+            f"CICLO_ASG{c}": [
+                ODL(id=f"ODL-ASG{c}-{i}", odl_number=f"ODL-ASG{c}-{i}", part_number=f"PN-ASG{c}",
+                    curing_cycle=f"CICLO_ASG{c}", vacuum_lines=1,
+                    tools=[Tool(id=f"T-ASG{c}-{i}", width=w, height=h, weight=5)])
+                for i, (w, h) in enumerate([(1800 if c < 2 else 550, 1000 if c < 2 else 450),
+                                            (500, 400), (450, 350), (400, 300), (600, 300)])
+            ]
+            for c in range(4)
+        }
+
+        solver = CycleAssignmentSolver(self.constraints)
+        allocations = solver.solve(cycles, [large, small])
+        plan = solver.last_plan
+        assert plan['status'] in ("OPTIMAL", "FEASIBLE")
+
+        # Ogni ODL esattamente una volta, sul suo ciclo e su un'autoclave in cui entra
+        assigned = [odl.id for allocation in allocations for odl in allocation.odls]
+        expected = [odl.id for odls in cycles.values() for odl in odls]
+        assert sorted(assigned) == sorted(expected)
+        autoclaves = {large.id: large, small.id: small}
+        for allocation in allocations:
+            assert all(odl.curing_cycle == allocation.cycle_code for odl in allocation.odls)
+            assert allocation.estimated_batches >= 1
+            for odl in allocation.odls:
+                assert all(fits(tool, autoclaves[allocation.autoclave_id], self.constraints)
+                           for tool in odl.tools)
+
+        # Più cicli che autoclavi: i cicli con tool piccoli vanno sulla piccola
+        assert plan['loads'] == {large.id: 2, small.id: 2}
+        assert plan['makespan'] == 2
+
+        # L'assegnazione per rango resta disponibile come modalità esplicita
+        optimizer = MultiAutoclaveOptimizer(NestingConstraints(assignment_mode="rank"))
+        stats = optimizer._analyze_cycle_areas([odl for odls in cycles.values() for odl in odls])
+        jobs, suggestions = optimizer._assign_autoclaves(stats, [large, small])
+        assert sorted(odl.id for odls, _ in jobs for odl in odls) == sorted(expected)
+        assert len(suggestions) == len(jobs)
+        assert not NestingConstraints(assignment_mode="hungarian").validate()
+
+        # Con il rango come riferimento il piano non lo peggiora su nessuna metrica
+        assignments, _ = optimizer._assign_autoclaves_by_area_and_count(stats, [large, small])
+        allocations = solver.solve(cycles, [large, small], baseline=assignments)
+        plan, reference = solver.last_plan, solver.last_plan['baseline']
+        for metric in ('unplaced_tools', 'makespan', 'total_runs'):
+            assert plan[metric] <= reference[metric]
+
+        # Le cure stimate sono quelle che la crescita dei batch produce davvero
+        optimizer = MultiAutoclaveOptimizer(NestingConstraints(engine="skyline"))
+        for allocation in allocations:
+            batches = optimizer._create_multiple_batches_per_autoclave(
+                allocation.odls, autoclaves[allocation.autoclave_id], {}
+            )
+            assert len(batches) == allocation.estimated_batches
+
+    def test_multi_bin_packing(self):
+        """Test modello multi-bin: ODL interi, bin minimi, bin identici ordinati per riempimento"""
+        autoclave = Autoclave(id="AC-MB", code="AC-MB", width=1100, height=700, vacuum_lines=3)
+        geometries = {
+            "A": [(600, 270), (600, 250)],
+            "B": [(370, 550)],
+            "C": [(500, 550)],
+            "D": [(470, 550)],
+        }
+        odls = [
+            ODL(id=f"ODL-MB{name}", odl_number=f"ODL-MB{name}", part_number="PN-MB",
+                curing_cycle="CICLO_MB", vacuum_lines=1,
+                tools=[Tool(id=f"T-MB{name}{k}", width=w, height=h, weight=3) for k, (w, h) in enumerate(tools)])
+            for name, tools in geometries.items()
+        ]
+
+        constraints = NestingConstraints(min_border_distance=50, min_tool_distance=30, multi_bin=True)
+        optimizer = MultiAutoclaveOptimizer(constraints)
+        solver = MultiBinSolver(optimizer.nesting_engine)
+        layouts = solver.solve(odls, [autoclave] * 3)
+
+        # Due bin bastano: A+B e C+D affiancati (600+30+370 e 500+30+470 = 1000)
+        assert len(layouts) == 2 and solver.last_run['bins_used'] == 2
+        homes = {}
+        for b, layout in enumerate(layouts):
+            self._assert_valid_layout(layout, autoclave, constraints)
+            assert layout.vacuum_lines_used <= autoclave.vacuum_lines
+            for p in layout.placements:
+                assert homes.setdefault(p.odl_id, b) == b
+        assert len(homes) == len(odls)
+        assert sum(len(layout.placements) for layout in layouts) == 5
+        areas = [sum(p.width * p.height for p in layout.placements) for layout in layouts]
+        assert areas[0] >= areas[1]
+
+        # Hint in ordine opposto: riordinato per rispettare il symmetry breaking
+        hint = list(reversed(layouts))
+        odl_area = {odl.id: sum(int(tool.area) for tool in odl.tools) for odl in odls}
+        assert solver._order_hint(hint, [autoclave] * 3, odl_area) == layouts
+        assert len(solver.solve(odls, [autoclave] * 3, hint=hint)) == 2
+        assert optimizer.nesting_engine.last_solve_stats['stop_reason'] in ('optimal', 'time_limit')
+        assert solver._stop_reason(cp_model.INFEASIBLE) == 'infeasible'
+        assert solver._stop_reason(cp_model.MODEL_INVALID) == 'model_invalid'
+
+        # Limite di dimensione: sopra il cap il chiamante resta sul sequenziale
+        assert solver.within_cap(5, 3)
+        assert not solver.within_cap(constraints.multi_bin_max_pairs + 1, 1)
+
+        # Nel flusso dei batch il risultato congiunto non perde tool rispetto al sequenziale
+        batches = optimizer._create_multiple_batches_per_autoclave(odls, autoclave, {})
+        assert sum(len(batch.placements) for batch in batches) == 5
+        assert len(batches) == 2
+
+    def test_batch_polish(self):
+        """Test rifinitura: ODL spostati solo nello stesso ciclo, meno batch, stessi tool, budget rispettato"""
+        autoclave = Autoclave(id="AC-PL", code="AC-PL", width=1100, height=700, vacuum_lines=4)
+        geometries = {"A": (600, 550, "CICLO_PL"), "B": (370, 550, "CICLO_PL"),
+                      "C": (470, 550, "CICLO_PL"), "D": (370, 550, "CICLO_ALTRO")}
+        odls = [
+            ODL(id=f"ODL-PL{name}", odl_number=f"ODL-PL{name}", part_number="PN-PL",
+                curing_cycle=cycle, vacuum_lines=1,
+                tools=[Tool(id=f"T-PL{name}", width=w, height=h, weight=3)])
+            for name, (w, h, cycle) in geometries.items()
+        ]
+
+        constraints = NestingConstraints(min_border_distance=50, min_tool_distance=30, polish=True)
+        optimizer = MultiAutoclaveOptimizer(constraints)
+        # Un batch per ODL, come un packing sequenziale sfortunato
+        batches = [RectanglePacker(constraints).pack_rectangles([odl], autoclave) for odl in odls]
+
+        polished, summary = optimizer._optimize_inter_autoclave(batches, odls, [autoclave], {})
+
+        # B raggiunge A o C; D (altro ciclo) resta da solo anche se entrerebbe con C
+        assert len(polished) == 3
+        assert summary['before']['batches'] == 4 and summary['after']['batches'] == 3
+        assert summary['stop_reason'] == 'local_optimum'
+        placed = sorted((p.odl_id, p.tool_id) for batch in polished for p in batch.placements)
+        assert placed == sorted((p.odl_id, p.tool_id) for batch in batches for p in batch.placements)
+        for batch in polished:
+            self._assert_valid_layout(batch, autoclave, constraints)
+            assert batch.area_upper_bound is not None
+            cycles = {next(o.curing_cycle for o in odls if o.id == p.odl_id) for p in batch.placements}
+            assert len(cycles) == 1
+
+        # Budget esaurito subito: nessuna mossa, batch invariati
+        constraints.polish_time_budget = 1e-9
+        unchanged, summary = optimizer._optimize_inter_autoclave(batches, odls, [autoclave], {})
+        assert summary['stop_reason'] == 'time_budget' and len(unchanged) == 4
+
+    def test_batch_right_sizing(self):
+        """Test right-sizing: batch piccoli sull'autoclave piccola, tool grandi e makespan rispettati"""
+        big = Autoclave(id="AC-RS-BIG", code="AC-RS-BIG", width=2500, height=2000, vacuum_lines=10)
+        small = Autoclave(id="AC-RS-SMALL", code="AC-RS-SMALL", width=1000, height=800, vacuum_lines=4)
+        geometries = {"A": [(300, 300), (300, 300)], "B": [(400, 250)], "C": [(1800, 1200)]}
+        odls = [
+            ODL(id=f"ODL-RS{name}", odl_number=f"ODL-RS{name}", part_number="PN-RS",
+                curing_cycle=f"CICLO_RS{name}", vacuum_lines=1,
+                tools=[Tool(id=f"T-RS{name}{k}", width=w, height=h, weight=3) for k, (w, h) in enumerate(tools)])
+            for name, tools in geometries.items()
+        ]
+
+        constraints = NestingConstraints(min_border_distance=50, min_tool_distance=30, right_size=True)
+        optimizer = MultiAutoclaveOptimizer(constraints)
+        packer = RectanglePacker(constraints)
+        batches = [packer.pack_rectangles([odl], big) for odl in odls]
+
+        resized, summary = optimizer._right_size_batches(batches, odls, [big, small], {})
+
+        # A e B passano sulla piccola (makespan 3 invariato), C non entra e resta sulla grande
+        assert [batch.autoclave_id for batch in resized] == [small.id, small.id, big.id]
+        assert summary['batches_moved'] == 2
+        assert summary['loads_after'] == {big.id: 1, small.id: 2}
+        assert summary['freed_area_m2'] == round(2 * (big.area - small.area) / 1_000_000, 2)
+        assert summary['bound_rejections'] >= 1
+        for before, after in zip(batches, resized):
+            assert sorted((p.odl_id, p.tool_id) for p in after.placements) == \
+                sorted((p.odl_id, p.tool_id) for p in before.placements)
+        for batch in resized[:2]:
+            self._assert_valid_layout(batch, small, constraints)
+            assert batch.efficiency > batches[0].efficiency and batch.area_upper_bound is not None
+
+        # Makespan: con la piccola già occupata il batch resta sulla grande
+        occupied = packer.pack_rectangles([odls[1]], small)
+        resized, summary = optimizer._right_size_batches([batches[0], occupied], odls, [big, small], {})
+        assert [batch.autoclave_id for batch in resized] == [big.id, small.id]
+        assert summary['batches_moved'] == 0
+
+    def test_layout_cache(self, tmp_path):
+        """Test cache dei layout: istanza equivalente rimappata sui nuovi ID, livello SQLite tra processi"""
+        constraints = NestingConstraints(
+            min_border_distance=50, min_tool_distance=30, engine="skyline",
+            layout_cache=True, layout_cache_path=str(tmp_path / "layouts.sqlite")
+        )
+        engine = NestingEngine(constraints)
+        engine.layout_cache.clear()
+        first = engine.optimize_single_autoclave(self.odls_cycle_b[:3], self.autoclaves[2])
+
+        # Stesse geometrie con ID diversi e in ordine inverso: hit rimappato
+        renamed = [
+            ODL(id=f"NEW-{odl.id}", odl_number=odl.odl_number, part_number=odl.part_number,
+                curing_cycle=odl.curing_cycle, vacuum_lines=odl.vacuum_lines,
+                tools=[Tool(id=f"NEW-{t.id}", width=t.width, height=t.height, weight=t.weight) for t in odl.tools])
+            for odl in reversed(self.odls_cycle_b[:3])
+        ]
+        cached = engine.optimize_single_autoclave(renamed, self.autoclaves[2])
+        assert {p.odl_id for p in cached.placements} == {odl.id for odl in renamed}
+        assert sorted((p.x, p.y, p.width, p.height) for p in cached.placements) == \
+            sorted((p.x, p.y, p.width, p.height) for p in first.placements)
+        assert cached.efficiency == first.efficiency and cached.total_weight == first.total_weight
+        self._assert_valid_layout(cached, self.autoclaves[2], constraints)
+
+        # Autoclave diversa: miss
+        engine.optimize_single_autoclave(renamed, self.autoclaves[1])
+        summary = engine.solver_summary()
+        assert summary['layout_cache_hits'] == 1 and summary['layout_cache_misses'] == 2
+        assert summary['layout_cache_hit_rate'] == round(1 / 3, 3)
+
+        # Memoria svuotata (es. nuovo processo): il layout arriva dal file SQLite
+        engine.layout_cache.clear()
+        engine.start_request()
+        assert engine.optimize_single_autoclave(self.odls_cycle_b[:3], self.autoclaves[1]) is not None
+        assert engine.solver_summary()['layout_cache_disk_hits'] == 1
+
+        # I thread del solver (ridotti nei worker dei cicli paralleli) non cambiano la chiave
+        key = layout_fingerprint(self.odls_cycle_b[:3], self.autoclaves[2], constraints).key
+        fewer_threads = dataclasses.replace(constraints, solver_threads=1)
+        assert layout_fingerprint(renamed, self.autoclaves[2], fewer_threads).key == key
+
     def test_multi_autoclave_optimization(self):
         """Test ottimizzazione multi-autoclave"""
         optimizer = MultiAutoclaveOptimizer(self.constraints)
@@ -291,6 +1249,20 @@ class TestOptimizationAlgorithm:
         print(f"ODL/secondo: {len(many_odls)/execution_time:.1f}")
         print(f"ODL posizionati: {metrics['total_odls_placed']}")
     
+    def _assert_valid_layout(self, layout, autoclave, constraints):
+        """Verifica contenimento nei margini e distanza minima tra tool"""
+        border = constraints.min_border_distance
+        gap = constraints.min_tool_distance
+        for i, p1 in enumerate(layout.placements):
+            assert p1.x >= border and p1.y >= border
+            assert p1.x + p1.width <= autoclave.width - border
+            assert p1.y + p1.height <= autoclave.height - border
+            for p2 in layout.placements[i+1:]:
+                assert not self._rectangles_overlap(
+                    (p1.x - gap, p1.y - gap, p1.x + p1.width + gap, p1.y + p1.height + gap),
+                    (p2.x, p2.y, p2.x + p2.width, p2.y + p2.height)
+                )
+
     def _rectangles_overlap(self, rect1, rect2):
         """Verifica sovrapposizione rettangoli"""
         x1, y1, x2, y2 = rect1